@@ -1,34 +1,13 @@
-import pandas as pd
-import random
-import os
-
-
-df = pd.read_csv("csv/bio-decagon-targets-all.csv")
-
-unique_drugs = list(df['STITCH'].unique())
-
-random.shuffle(unique_drugs)
+from pipeline import extract_drug_sets
 
 drugs_per_file = 80
 num_files = 15
 
-total_needed = drugs_per_file * num_files
-if total_needed > len(unique_drugs):
-    raise ValueError(f"Not enough unique drugs ({len(unique_drugs)}) for {num_files} files of {drugs_per_file} each.")
-
-os.makedirs("csv/random_drug_sets_80", exist_ok=True)
-
-for i in range(num_files):
-    start_idx = i * drugs_per_file
-    end_idx = start_idx + drugs_per_file
-    drug_subset = unique_drugs[start_idx:end_idx]
-
-    subset_df = df[df['STITCH'].isin(drug_subset)]
-    
+# Set files whose content did not change are left untouched, so the
+# incremental pipeline (python code/pipeline.py run) keeps their results
+written = extract_drug_sets("csv/bio-decagon-targets-all.csv", "csv/random_drug_sets_80", drugs_per_file, num_files)
 
-    output_path = f"csv/random_drug_sets_80/random_80_drugs_set_{i+1}.csv"
-    subset_df.to_csv(output_path, index=False)
-    
-    print(f"Saved {len(drug_subset)} unique drugs with {len(subset_df)} interactions → {output_path}")
+for output_path, num_drugs, num_rows, changed in written:
+    print(f"Saved {num_drugs} unique drugs with {num_rows} interactions → {output_path}")
 
 print("\nAll 15 CSV files created successfully. Each file has 100 unique, non-overlapping drugs.")
@@ -1,62 +1,50 @@
-import pandas as pd
-import networkx as nx
-from itertools import combinations
-
-drug_protein_df = pd.read_csv("csv/bio-decagon-targets-all.csv")  
-drug_drug_df = pd.read_csv("csv/bio-decagon-combo.csv")          
-ppi_df = pd.read_csv("csv/bio-decagon-ppi.csv")                  
-
-drugs = drug_protein_df['STITCH'].unique()
-proteins = drug_protein_df['Gene'].unique()
-drug_set = set(drugs)
-
-filtered_dd = drug_drug_df[
-    drug_drug_df['STITCH 1'].isin(drug_set) &
-    drug_drug_df['STITCH 2'].isin(drug_set)
-]
-
-drug_to_proteins = {
-    drug: set(drug_protein_df.loc[drug_protein_df['STITCH'] == drug, 'Gene'])
-    for drug in drugs
-}
-
-all_pairs = set(tuple(sorted(pair)) for pair in combinations(drugs, 2))
-side_effect_pairs = set(tuple(sorted((row['STITCH 1'], row['STITCH 2']))) for _, row in filtered_dd.iterrows())
-no_side_effect_pairs = all_pairs - side_effect_pairs
+import argparse
+from blocked_scores import blocked_pair_stats
+from combo_stream import check_memory, chunk_rows_for
+from drug_set_stats import all_drug_scores
+from pair_scores import summarize_pairs
+
+combo_file = "csv/bio-decagon-combo.csv"
+
+parser = argparse.ArgumentParser(description="Side-effect vs no-side-effect stats over all drugs")
+parser.add_argument("--streaming", action="store_true", help="stream the combo file in chunks instead of caching it")
+parser.add_argument("--memory-limit", type=int, default=1024, help="memory ceiling in MB for --streaming")
+parser.add_argument("--block-size", type=int, default=0,
+                    help="score the drug pairs by tiles of this many drugs, resuming an interrupted run (0 = off)")
+parser.add_argument("--keep-scores", action="store_true",
+                    help="with --block-size, also store every pair's scores in memory-mapped files")
+args = parser.parse_args()
+chunk_rows = chunk_rows_for(combo_file, args.memory_limit) if args.streaming else None
+
+# Shared proteins (B.B^T) and PPI links (B.A.B^T) for every drug pair,
+# from the drug x protein incidence B and the PPI adjacency A
+if args.block_size:
+    drugs, stats = blocked_pair_stats(
+        "csv/bio-decagon-targets-all.csv", combo_file, "csv/bio-decagon-ppi.csv", args.block_size,
+        keep_scores=args.keep_scores, chunk_rows=chunk_rows
+    )
+else:
+    drugs, shared, ppi, side_rows, side_cols = all_drug_scores(
+        "csv/bio-decagon-targets-all.csv", combo_file, "csv/bio-decagon-ppi.csv", chunk_rows
+    )
+    stats = summarize_pairs(shared, ppi, side_rows, side_cols)
 
 print(f"Total drugs: {len(drugs)}")
-print(f"Total drug pairs: {len(all_pairs)}")
-print(f"Side-effect pairs: {len(side_effect_pairs)}")
-print(f"No-side-effect pairs: {len(no_side_effect_pairs)}")
+print(f"Total drug pairs: {len(drugs) * (len(drugs) - 1) // 2}")
+print(f"Side-effect pairs: {stats['num_side_effect_pairs']}")
+print(f"No-side-effect pairs: {stats['num_no_side_effect_pairs']}")
 
-ppi_edges = {(min(u, v), max(u, v)) for u, v in zip(ppi_df['Gene 1'], ppi_df['Gene 2'])}
+avg_shared_side = stats["avg_shared_proteins_side_effect"]
+avg_ppi_side = stats["avg_ppi_side_effect"]
 
-
-def compute_metrics(pairs):
-    shared_list = []
-    ppi_list = []
-    for d1, d2 in pairs:
-        proteins_u = drug_to_proteins.get(d1, set())
-        proteins_v = drug_to_proteins.get(d2, set())
-        shared = proteins_u & proteins_v
-        shared_list.append(len(shared))
-        ppi_count = sum((min(p1, p2), max(p1, p2)) in ppi_edges for p1 in proteins_u for p2 in proteins_v)
-        ppi_list.append(ppi_count)
-    return shared_list, ppi_list
-
-# Side-effect combos
-shared_side, ppi_side = compute_metrics(side_effect_pairs)
-# No-side-effect combos
-shared_none, ppi_none = compute_metrics(no_side_effect_pairs)
-
-avg_shared_side = sum(shared_side)/len(shared_side) if shared_side else 0
-avg_ppi_side = sum(ppi_side)/len(ppi_side) if ppi_side else 0
-
-avg_shared_none = sum(shared_none)/len(shared_none) if shared_none else 0
-avg_ppi_none = sum(ppi_none)/len(ppi_none) if ppi_none else 0
+avg_shared_none = stats["avg_shared_proteins_no_side_effect"]
+avg_ppi_none = stats["avg_ppi_no_side_effect"]
 
 print("\n=== Protein Interaction & Shared Target Stats (All Drugs) ===")
 print(f"Average shared proteins (side-effect combos): {avg_shared_side:.2f}")
 print(f"Average PPI interactions (side-effect combos): {avg_ppi_side:.2f}")
 print(f"Average shared proteins (no-side-effect combos): {avg_shared_none:.2f}")
 print(f"Average PPI interactions (no-side-effect combos): {avg_ppi_none:.2f}")
+
+if args.streaming:
+    check_memory(args.memory_limit)
@@ -0,0 +1,229 @@
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(CODE_DIR, "benchmark_baseline.json")
+DATA_ROOT = os.path.join(tempfile.gettempdir(), "decagon_bench")
+SCALES = [0.05, 0.25]
+
+# Slower or bigger than the baseline by this factor counts as a regression;
+# differences below the noise floor of a metric are ignored
+TOLERANCE = 1.25
+NOISE = {"seconds": 0.05, "peak_rss_mb": 5, "alloc_peak_mb": 1}
+
+
+# Pipeline stages, each as (setup, run). Both run inside the synthetic data
+# directory in a fresh process; only `run` is measured.
+def _warm_caches():
+    from decagon_data import load_combo, load_ppi, load_targets
+    from effect_index import load_index
+    load_combo("csv/bio-decagon-combo.csv")
+    load_targets("csv/bio-decagon-targets-all.csv")
+    load_ppi("csv/bio-decagon-ppi.csv")
+    load_index("csv/bio-decagon-combo.csv")
+
+
+def _cold_caches():
+    shutil.rmtree(os.path.join("csv", ".decagon_cache"), ignore_errors=True)
+
+
+# 15 sets of 80 drugs, fewer drugs per set on small scales
+def _drug_sets():
+    from decagon_data import load_targets
+    from pipeline import DRUG_DIR, extract_drug_sets
+    _warm_caches()
+    if not os.path.isdir(DRUG_DIR):
+        drugs = len(load_targets("csv/bio-decagon-targets-all.csv")["drugs"])
+        extract_drug_sets(out_dir=DRUG_DIR, drugs_per_file=min(80, drugs // 15), num_files=15, seed=0)
+
+
+def cache_build():
+    from decagon_data import load_combo, load_ppi, load_targets
+    load_combo("csv/bio-decagon-combo.csv")
+    load_ppi("csv/bio-decagon-ppi.csv")
+    load_targets("csv/bio-decagon-targets-all.csv")
+
+
+def all_drugs_stats(streaming=False):
+    from combo_stream import chunk_rows_for
+    from drug_set_stats import all_drug_scores
+    from pair_scores import summarize_pairs
+    combo = "csv/bio-decagon-combo.csv"
+    chunk_rows = chunk_rows_for(combo, 1024) if streaming else None
+    _, shared, ppi, side_rows, side_cols = all_drug_scores(
+        "csv/bio-decagon-targets-all.csv", combo, "csv/bio-decagon-ppi.csv", chunk_rows)
+    summarize_pairs(shared, ppi, side_rows, side_cols)
+
+
+# blocked scoring resumes from earlier runs, so every run starts without tiles
+def _no_tiles():
+    from decagon_data import cache_path
+    _warm_caches()
+    shutil.rmtree(os.path.join(cache_path("csv/bio-decagon-targets-all.csv"), "pair_blocks"), ignore_errors=True)
+
+
+def all_drugs_stats_blocked():
+    from blocked_scores import blocked_pair_stats
+    blocked_pair_stats("csv/bio-decagon-targets-all.csv", "csv/bio-decagon-combo.csv", "csv/bio-decagon-ppi.csv",
+                       block=256)
+
+
+def drug_sets():
+    from drug_set_stats import run_drug_sets
+    from pipeline import DRUG_DIR
+    run_drug_sets(DRUG_DIR, workers=1)
+
+
+def extract(streaming=False):
+    import extract_drug_drug_effect as ex
+    if streaming:
+        similar, different = ex.stream_side_effect_pairs("C0006826", limit=30), ex.stream_all_combo_pairs()
+    else:
+        similar, different = ex.get_side_effect_pairs("C0006826", limit=30), ex.get_all_combo_pairs()
+    ex.extract_drug_protein(similar, "csv/similar_drug_protein.csv")
+    ex.extract_drug_protein(different, "csv/different_drug_protein.csv")
+
+
+def side_effect_stats():
+    from side_effect_stats import side_effect_stats as run
+    run()
+
+
+STAGES = {
+    "cache_build": (_cold_caches, cache_build),
+    "all_drugs_stats": (_warm_caches, all_drugs_stats),
+    "all_drugs_stats_streaming": (None, lambda: all_drugs_stats(streaming=True)),
+    "all_drugs_stats_blocked": (_no_tiles, all_drugs_stats_blocked),
+    "drug_sets": (_drug_sets, drug_sets),
+    "extract": (_warm_caches, extract),
+    "extract_streaming": (None, lambda: extract(streaming=True)),
+    "side_effect_stats": (_warm_caches, side_effect_stats),
+}
+
+
+# Child side: set up and run one stage, print its measurements as JSON
+def _run_stage(name, trace):
+    import contextlib
+    import gc
+    import io
+    import tracemalloc
+
+    from combo_stream import peak_rss_mb
+    # module imports are not part of any stage
+    import blocked_scores, drug_set_stats, extract_drug_drug_effect, pipeline, side_effect_stats  # noqa: F401
+
+    setup, run = STAGES[name]
+    with contextlib.redirect_stdout(io.StringIO()):
+        if setup:
+            setup()
+        gc.collect()
+        if trace:
+            tracemalloc.start()
+        start = time.perf_counter()
+        run()
+        seconds = time.perf_counter() - start
+    result = {"seconds": seconds, "peak_rss_mb": peak_rss_mb()}
+    if trace:
+        result["alloc_peak_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    print(json.dumps(result))
+
+
+def _stage_process(name, data_dir, trace):
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [CODE_DIR, os.environ.get("PYTHONPATH")]))}
+    args = [sys.executable, os.path.abspath(__file__), "--stage", name] + (["--trace"] if trace else [])
+    out = subprocess.run(args, cwd=data_dir, env=env, capture_output=True, text=True)
+    if out.returncode:
+        raise RuntimeError(f"stage {name} failed:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+# Synthetic data of one scale, generated once per data root. Generated in a
+# child process: the peak RSS of this process carries over to the stages.
+def data_dir(scale, seed=0, root=DATA_ROOT):
+    path = os.path.join(root, f"scale_{scale:g}_seed_{seed}")
+    marker = os.path.join(path, "done")
+    if not os.path.exists(marker):
+        print(f"Generating synthetic data at scale {scale:g} ...")
+        subprocess.run([sys.executable, os.path.join(CODE_DIR, "synthetic_decagon.py"), path,
+                        "--scale", str(scale), "--seed", str(seed)], check=True, stdout=subprocess.DEVNULL)
+        open(marker, "w").close()
+    return path
+
+
+# Best time of `repeat` runs and the memory of one traced run, per stage and scale
+def run_benchmarks(scales=SCALES, stages=None, repeat=3, memory=True, root=DATA_ROOT):
+    results = {}
+    for scale in scales:
+        path = data_dir(scale, root=root)
+        for name in stages or STAGES:
+            runs = [_stage_process(name, path, trace=False) for _ in range(repeat)]
+            entry = {"seconds": round(min(r["seconds"] for r in runs), 4),
+                     "peak_rss_mb": round(max(r["peak_rss_mb"] for r in runs), 1)}
+            if memory:
+                entry["alloc_peak_mb"] = round(_stage_process(name, path, trace=True)["alloc_peak_mb"], 1)
+            results[f"{scale:g}/{name}"] = entry
+            print(f"{scale:g}/{name}: " + ", ".join(f"{k} {v}" for k, v in entry.items()))
+    return results
+
+
+# Metrics outside TOLERANCE of the baseline: [(benchmark, metric, baseline, now)]
+def compare(results, baseline, tolerance=TOLERANCE):
+    changes = []
+    for key, entry in results.items():
+        for metric, value in entry.items():
+            before = baseline.get(key, {}).get(metric)
+            if not before or abs(value - before) < NOISE.get(metric, 0):
+                continue
+            if value > before * tolerance or value < before / tolerance:
+                changes.append((key, metric, before, value))
+    return changes
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Timed and memory-profiled benchmarks on synthetic Decagon data")
+    parser.add_argument("--stage", choices=list(STAGES), help=argparse.SUPPRESS)
+    parser.add_argument("--trace", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--scales", type=float, nargs="+", default=SCALES)
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), help="stages to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage, the best one is kept")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--data-root", default=DATA_ROOT, help="where the synthetic data is generated")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    if args.stage:
+        _run_stage(args.stage, args.trace)
+        sys.exit()
+
+    results = run_benchmarks(args.scales, args.stages, args.repeat, not args.no_memory, args.data_root)
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+    except (OSError, ValueError):
+        baseline = {}
+
+    changes = compare(results, baseline, args.tolerance)
+    regressions = [c for c in changes if c[3] > c[2]]
+    for key, metric, before, now in changes:
+        mark = "❌ slower/bigger" if now > before else "✅ faster/smaller"
+        print(f"{mark}: {key} {metric} {before} -> {now} ({now / before:.2f}x)")
+    if not changes and any(key in baseline for key in results):
+        print(f"No change beyond {args.tolerance}x of the baseline")
+
+    if args.save:
+        machine = {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()}
+        with open(args.baseline, "w") as f:
+            json.dump({"machine": machine, "results": {**baseline, **results}}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\n✅ Baseline saved to: {args.baseline}")
+    sys.exit(1 if regressions else 0)
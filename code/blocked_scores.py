@@ -0,0 +1,133 @@
+import json
+import os
+import shutil
+
+import numpy as np
+from decagon_data import COMBO_PATH, PPI_PATH, TARGETS_PATH, cache_path, source_hash
+from drug_set_stats import all_drug_matrices
+from pair_store import pair_index
+from profiling import count, profiled
+
+BLOCK = 1024
+BLOCKS_VERSION = 1
+
+# Per-tile partial sums, in this column order
+PARTIALS = ["pairs", "shared", "ppi", "side", "side_off_diag", "side_shared", "side_ppi",
+            "side_shared_off_diag", "side_ppi_off_diag"]
+
+
+# Upper tiles (row block <= column block) of an n x n pair matrix
+def tiles(n, block):
+    starts = range(0, n, block)
+    return [(i, min(i + block, n), j, min(j + block, n)) for i in starts for j in starts if j >= i]
+
+
+def _open(directory, meta, n_tiles, n, keep_scores):
+    try:
+        with open(os.path.join(directory, "meta.json")) as f:
+            resume = json.load(f) == meta
+    except (OSError, ValueError):
+        resume = False
+    mode = "r+" if resume else "w+"
+    if not resume:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+    state = {
+        "done": np.lib.format.open_memmap(os.path.join(directory, "done.npy"), mode, bool, (n_tiles,)),
+        "partials": np.lib.format.open_memmap(os.path.join(directory, "partials.npy"), mode, np.int64,
+                                              (n_tiles, len(PARTIALS))),
+    }
+    if keep_scores:
+        for name in ("shared", "ppi"):
+            state[name] = np.lib.format.open_memmap(os.path.join(directory, name + ".npy"), mode, np.int64,
+                                                    (n * (n - 1) // 2,))
+    if not resume:
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+    return state, resume
+
+
+# Scores of one tile, its partial sums, and (optionally) its pairs written to
+# the packed shared / ppi score files
+def _score_tile(tile, BA_rows, B, side_rows, side_cols, side_keys, state):
+    i0, i1, j0, j1 = tile
+    n = B.shape[0]
+    Bt = B[j0:j1].T.tocsr()
+    shared = (B[i0:i1] @ Bt).toarray()
+    ppi = (BA_rows @ Bt).toarray()
+
+    # pairs of the tile above the diagonal
+    upper = np.arange(i0, i1)[:, None] < np.arange(j0, j1)[None, :]
+    # side-effect pairs of the tile, self pairs included as in summarize_pairs
+    lo, hi = np.searchsorted(side_keys, [i0 * n, i1 * n])
+    r, c = side_rows[lo:hi], side_cols[lo:hi]
+    inside = (c >= j0) & (c < j1)
+    r, c = r[inside] - i0, c[inside] - j0
+    off = r + i0 != c + j0
+    side_shared, side_ppi = shared[r, c], ppi[r, c]
+    partial = [int(upper.sum()), int(shared[upper].sum()), int(ppi[upper].sum()),
+               len(r), int(off.sum()), int(side_shared.sum()), int(side_ppi.sum()),
+               int(side_shared[off].sum()), int(side_ppi[off].sum())]
+
+    if "shared" in state:
+        for row in range(i0, i1):
+            start = max(j0, row + 1)
+            if start < j1:
+                k = pair_index(n, row, start)
+                state["shared"][k:k + j1 - start] = shared[row - i0, start - j0:]
+                state["ppi"][k:k + j1 - start] = ppi[row - i0, start - j0:]
+    count("drug pairs scored", partial[0])
+    return partial
+
+
+# Side-effect vs no-side-effect averages of every drug pair, as summarize_pairs
+# returns them, computed tile by tile (block x block drugs) so that neither the
+# pair list nor the n x n score matrices are ever held. Per-tile partial sums
+# (and, with keep_scores, the packed upper-triangle shared / ppi scores in the
+# pair_store layout) go to memory-mapped files in `directory`; a rerun with the
+# same inputs and block size resumes after the last completed tile.
+@profiled("blocked scores")
+def blocked_pair_stats(targets_path=TARGETS_PATH, combo_path=COMBO_PATH, ppi_path=PPI_PATH, block=BLOCK,
+                       directory=None, keep_scores=False, chunk_rows=None):
+    drugs, B, A, side_rows, side_cols = all_drug_matrices(targets_path, combo_path, ppi_path, chunk_rows)
+    n = len(drugs)
+    side_keys = side_rows.astype(np.int64) * n + side_cols
+    order = np.argsort(side_keys, kind="stable")
+    side_rows, side_cols, side_keys = side_rows[order], side_cols[order], side_keys[order]
+
+    directory = directory or os.path.join(cache_path(targets_path), "pair_blocks")
+    meta = {"version": BLOCKS_VERSION, "drugs": n, "block": block, "keep_scores": keep_scores,
+            "targets": source_hash(targets_path), "combo": source_hash(combo_path), "ppi": source_hash(ppi_path)}
+    all_tiles = tiles(n, block)
+    state, resumed = _open(directory, meta, len(all_tiles), n, keep_scores)
+    if resumed and state["done"].any():
+        print(f"Resuming: {int(state['done'].sum())} of {len(all_tiles)} tiles already scored")
+
+    BA_rows, current = None, None
+    for t, tile in enumerate(all_tiles):
+        if state["done"][t]:
+            continue
+        if current != tile[:2]:
+            current = tile[:2]
+            BA_rows = (B[tile[0]:tile[1]] @ A).tocsr()
+        state["partials"][t] = _score_tile(tile, BA_rows, B, side_rows, side_cols, side_keys, state)
+        for name in ("shared", "ppi", "partials"):
+            if name in state:
+                state[name].flush()
+        # a tile only counts as done once its results are on disk
+        state["done"][t] = True
+        state["done"].flush()
+
+    totals = dict(zip(PARTIALS, np.asarray(state["partials"]).sum(axis=0).tolist()))
+    num_side = totals["side"]
+    num_none = n * (n - 1) // 2 - totals["side_off_diag"]
+    sum_shared_none = totals["shared"] - totals["side_shared_off_diag"]
+    sum_ppi_none = totals["ppi"] - totals["side_ppi_off_diag"]
+    return drugs, {
+        "num_side_effect_pairs": num_side,
+        "num_no_side_effect_pairs": num_none,
+        "avg_shared_proteins_side_effect": totals["side_shared"] / num_side if num_side else 0,
+        "avg_ppi_side_effect": totals["side_ppi"] / num_side if num_side else 0,
+        "avg_shared_proteins_no_side_effect": sum_shared_none / num_none if num_none else 0,
+        "avg_ppi_no_side_effect": sum_ppi_none / num_none if num_none else 0,
+    }
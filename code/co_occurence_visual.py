@@ -1,6 +1,11 @@
-import csv
-import networkx as nx
-import matplotlib.pyplot as plt
+import argparse
+import numpy as np
+import pandas as pd
+from decagon_data import load_ppi
+from effect_index import load_index, pair_labels, query
+from graph_render import MAX_LINES, force_layout, render
+from hetero_graph import HeteroGraph
+from layout_cache import WARM_ITERATIONS, cached_layout
 
 
 combo_path = "csv/bio-decagon-combo.csv"
@@ -11,20 +16,18 @@ ppi_path = "csv/bio-decagon-ppi.csv"
 FEVER_CODE = "C0018621"
 HYPERTENSION_CODE = "C0020542"
 
+parser = argparse.ArgumentParser(description="Drug-protein network of the fever & hypertension drug pairs")
+parser.add_argument("--output", help="write the figure to this .png/.svg/.pdf instead of showing it")
+parser.add_argument("--lod", choices=["auto", "lines", "sample", "density"], default="auto",
+                    help="level of detail for drug-protein and PPI edges")
+parser.add_argument("--max-edges", type=int, default=MAX_LINES, help="edges drawn as lines for auto / sample")
+parser.add_argument("--iterations", type=int, default=50, help="force layout iterations")
+args = parser.parse_args()
+
 # Drug-drug pair both side effetcs
-pair_to_effects = {}
-with open(combo_path, newline='') as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        pair = tuple(sorted([row["STITCH 1"], row["STITCH 2"]]))
-        effect = row["Polypharmacy Side Effect"]
-        pair_to_effects.setdefault(pair, set()).add(effect)
-
-# Filter for fever + hypertension
-selected_pairs = [
-    pair for pair, effects in pair_to_effects.items()
-    if FEVER_CODE in effects and HYPERTENSION_CODE in effects
-]
+index = load_index(combo_path)
+both = query(index, all_of=[FEVER_CODE, HYPERTENSION_CODE])
+selected_pairs = [tuple(pair) for pair in pair_labels(index, both).tolist()]
 
 # Extract all drugs from those pairs
 drug_list = sorted(set([d for pair in selected_pairs for d in pair]))
@@ -33,74 +36,54 @@ print(f"✅ {len(selected_pairs)} drug pairs with both fever and hypertension.")
 print(f"✅ {len(drug_list)} unique drugs involved.")
 
 # rug–protein interactions
-drug_proteins = []
-with open(drug_protein_path, newline='') as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        drug = row["Drug"] if "Drug" in row else row["col1"]
-        protein = str(row["Protein"] if "Protein" in row else row["col2"])
-        if drug in drug_list:
-            drug_proteins.append((drug, protein))
+dpi = pd.read_csv(drug_protein_path, dtype=str)
+dpi = dpi.rename(columns={"col1": "Drug", "col2": "Protein"})
+dpi = dpi[dpi["Drug"].isin(drug_list)]
 
 # protein–protein interactions
-ppi_edges = []
-with open(ppi_path, newline='') as f:
-    reader = csv.DictReader(f)
-    for row in reader:
-        p1 = str(row["Protein 1"]) if "Protein 1" in row else str(list(row.values())[0])
-        p2 = str(row["Protein 2"]) if "Protein 2" in row else str(list(row.values())[1])
-        ppi_edges.append((p1, p2))
-
-# Build graph
-G = nx.Graph()
-
-# Add drug nodes
-for d in drug_list:
-    G.add_node(d, type="drug")
-
-# Add protein nodes
-protein_nodes = {p for _, p in drug_proteins} | {p for pair in ppi_edges for p in pair}
-for p in protein_nodes:
-    G.add_node(p, type="protein")
-
-# Add edges
-for d1, d2 in selected_pairs:
-    G.add_edge(d1, d2, type="drug_drug", label="Fever+Hypertension")
-
-for d, p in drug_proteins:
-    G.add_edge(d, p, type="drug_protein")
-
-for p1, p2 in ppi_edges:
-    G.add_edge(p1, p2, type="ppi")
-
-print(f"✅ Graph built: {G.number_of_nodes()} nodes, {G.number_of_edges()} edges")
-
-
-
-plt.figure(figsize=(12, 10))
-pos = nx.spring_layout(G, k=0.3, seed=42)
-
-drug_nodes = [n for n, attr in G.nodes(data=True) if attr["type"] == "drug"]
-protein_nodes = [n for n, attr in G.nodes(data=True) if attr["type"] == "protein"]
-
-nx.draw_networkx_nodes(G, pos, nodelist=drug_nodes, node_color="skyblue", label="Drugs", node_size=300)
-nx.draw_networkx_nodes(G, pos, nodelist=protein_nodes, node_color="lightgreen", label="Proteins", node_size=200)
-
-
-edge_colors = []
-for u, v, data in G.edges(data=True):
-    if data["type"] == "drug_drug":
-        edge_colors.append("red")
-    elif data["type"] == "drug_protein":
-        edge_colors.append("gray")
-    else:
-        edge_colors.append("lightgray")
-
-nx.draw_networkx_edges(G, pos, edge_color=edge_colors, width=1.2, alpha=0.7)
-nx.draw_networkx_labels(G, pos, labels={d: d for d in drug_nodes}, font_size=8)
-
-plt.legend(scatterpoints=1)
-plt.title("Drug–Protein Interaction Network (Fever & Hypertension)")
-plt.axis("off")
-plt.tight_layout()
-plt.show()
+ppi = load_ppi(ppi_path)
+ppi_genes = np.concatenate([ppi["gene1"], ppi["gene2"]]).astype(str)
+
+# Build graph: protein nodes are every targeted or PPI protein
+graph = HeteroGraph()
+graph.add_nodes("drug", drug_list)
+graph.add_nodes("protein", np.union1d(dpi["Protein"].to_numpy(dtype=str), ppi_genes))
+
+pairs = np.array(selected_pairs, dtype=str).reshape(-1, 2)
+graph.add_edges("drug_drug", "drug", "drug", graph.index("drug", pairs[:, 0]), graph.index("drug", pairs[:, 1]),
+                label=np.full(len(pairs), "Fever+Hypertension"))
+graph.add_edges("drug_protein", "drug", "protein", graph.index("drug", dpi["Drug"]), graph.index("protein", dpi["Protein"]))
+graph.add_edges("ppi", "protein", "protein", *graph.index("protein", ppi_genes).reshape(2, -1), symmetric=True)
+
+offsets, num_nodes, edges = graph.flatten()
+
+print(f"✅ Graph built: {num_nodes} nodes, {sum(len(lo) for lo, _ in edges.values())} edges")
+
+
+# Layouts are cached per graph; a graph with a few new nodes warm-starts
+# from the previous layout
+keys = np.concatenate([[f"{t}:{x}" for x in graph.labels[t].tolist()] for t in offsets])
+rows, cols = np.concatenate([np.stack(e) for e in edges.values()], axis=1)
+pos = cached_layout(
+    keys, rows, cols,
+    lambda init: force_layout(num_nodes, rows, cols, WARM_ITERATIONS if init is not None else args.iterations,
+                              seed=42, init=init),
+    params={"layout": "force", "seed": 42, "iterations": args.iterations},
+)
+
+render(
+    pos,
+    node_groups=[
+        {"ids": offsets["drug"] + np.arange(len(drug_list)), "color": "skyblue", "label": "Drugs", "size": 300},
+        {"ids": offsets["protein"] + np.arange(graph.num_nodes("protein")), "color": "lightgreen",
+         "label": "Proteins", "size": 200},
+    ],
+    edge_groups=[
+        {"rows": edges["drug_drug"][0], "cols": edges["drug_drug"][1], "color": "red", "width": 1.2, "sample": False},
+        {"rows": edges["drug_protein"][0], "cols": edges["drug_protein"][1], "color": "gray", "width": 1.2},
+        {"rows": edges["ppi"][0], "cols": edges["ppi"][1], "color": "lightgray", "width": 1.2},
+    ],
+    labels={offsets["drug"] + i: d for i, d in enumerate(drug_list)},
+    title="Drug–Protein Interaction Network (Fever & Hypertension)",
+    output=args.output, figsize=(12, 10), lod=args.lod, max_edges=args.max_edges,
+)
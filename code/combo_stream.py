@@ -0,0 +1,133 @@
+import resource
+
+import numpy as np
+import pandas as pd
+from edge_ingest import encode, pair_keys
+from profiling import count, stage
+
+# Projected column name -> column of the combo CSV
+COLUMNS = {
+    "stitch1": "STITCH 1",
+    "stitch2": "STITCH 2",
+    "effect": "Polypharmacy Side Effect",
+    "name": "Side Effect Name",
+}
+
+CHUNK_ROWS = 1 << 18
+
+# Rows parsed to estimate the in-memory size of a CSV row
+_SAMPLE_ROWS = 10000
+
+_vocabs = {}
+
+
+# Rows per chunk so that one parsed chunk and its encoded copy stay under
+# `memory_mb`. The per-row size is measured on a sample of the file; half of
+# the budget is kept for the caller's accumulated results.
+def chunk_rows_for(path, memory_mb, columns=("stitch1", "stitch2", "effect")):
+    sample = pd.read_csv(path, dtype=str, nrows=_SAMPLE_ROWS, usecols=[COLUMNS[c] for c in columns])
+    if len(sample) == 0:
+        return CHUNK_ROWS
+    per_row = sample.memory_usage(deep=True, index=False).sum() / len(sample) + 4 * len(columns)
+    return max(1000, int(memory_mb * (1 << 20) / 2 / per_row))
+
+
+def _chunks(path, columns, chunk_rows):
+    reader = pd.read_csv(path, dtype=str, usecols=[COLUMNS[c] for c in columns], chunksize=chunk_rows or CHUNK_ROWS)
+    while True:
+        with stage("read_csv"):
+            chunk = next(reader, None)
+        if chunk is None:
+            return
+        count("combo rows read", len(chunk))
+        yield chunk
+
+
+# Sorted drug and effect vocabularies of the combo file, and the name of every
+# effect, collected in one pass that holds a single chunk at a time
+def combo_vocab(path, chunk_rows=CHUNK_ROWS):
+    if path in _vocabs:
+        return _vocabs[path]
+    drugs, names = set(), {}
+    for chunk in _chunks(path, COLUMNS, chunk_rows):
+        drugs.update(pd.unique(chunk["STITCH 1"]))
+        drugs.update(pd.unique(chunk["STITCH 2"]))
+        first = chunk.drop_duplicates("Polypharmacy Side Effect")
+        for effect, name in zip(first["Polypharmacy Side Effect"], first["Side Effect Name"]):
+            names.setdefault(effect, name if isinstance(name, str) else "")
+    effects = np.array(sorted(names), dtype=str)
+    vocab = {
+        "drugs": np.array(sorted(drugs), dtype=str),
+        "effects": effects,
+        "effect_names": np.array([names[e] for e in effects.tolist()], dtype=str),
+    }
+    _vocabs[path] = vocab
+    return vocab
+
+
+# Stream the combo file in chunks of `chunk_rows` rows and yield, per chunk,
+# the int32 codes of the requested columns for the rows that pass the filters.
+# Only the projected and filtered-on columns are parsed. Filters are applied
+# before the remaining columns are encoded:
+#   effects  - side-effect ids to keep
+#   drugs    - drug labels; a row is kept when both of its drugs are in the set
+#              (or either of them with either=True)
+# Codes index the sorted vocabularies of combo_vocab(); the effect name of a
+# row is its effect code looked up in vocab["effect_names"].
+def scan_combo(path, columns=("stitch1", "stitch2", "effect"), effects=None, drugs=None, either=False,
+               chunk_rows=CHUNK_ROWS, vocab=None):
+    vocab = vocab or combo_vocab(path, chunk_rows)
+    columns = [c for c in columns if c != "name"]
+    needed = set(columns)
+    if effects is not None:
+        needed.add("effect")
+        wanted_effects = np.unique(encode(np.asarray(effects, dtype=str), vocab["effects"])[1])
+        wanted_effects = wanted_effects[wanted_effects >= 0]
+    if drugs is not None:
+        needed.update(("stitch1", "stitch2"))
+        wanted_drugs = np.zeros(len(vocab["drugs"]) + 1, dtype=bool)
+        codes = encode(np.asarray(list(drugs), dtype=str), vocab["drugs"])[1]
+        wanted_drugs[codes[codes >= 0]] = True
+    order = [c for c in COLUMNS if c in needed]
+    labels = {"stitch1": vocab["drugs"], "stitch2": vocab["drugs"], "effect": vocab["effects"]}
+
+    for chunk in _chunks(path, order, chunk_rows):
+        rows = np.arange(len(chunk))
+        codes = {}
+        if effects is not None:
+            codes["effect"] = encode(chunk[COLUMNS["effect"]].to_numpy(), labels["effect"])[1]
+            keep = np.isin(codes["effect"], wanted_effects)
+            rows, codes = rows[keep], {c: v[keep] for c, v in codes.items()}
+        if drugs is not None:
+            for c in ("stitch1", "stitch2"):
+                codes[c] = encode(chunk[COLUMNS[c]].to_numpy()[rows], labels[c])[1]
+            hit1, hit2 = wanted_drugs[codes["stitch1"]], wanted_drugs[codes["stitch2"]]
+            keep = (hit1 | hit2) if either else (hit1 & hit2)
+            rows, codes = rows[keep], {c: v[keep] for c, v in codes.items()}
+        for c in columns:
+            if c not in codes:
+                codes[c] = encode(chunk[COLUMNS[c]].to_numpy()[rows], labels[c])[1]
+        count("combo rows kept", len(rows))
+        yield {c: codes[c] for c in columns}
+
+
+# Distinct unordered drug pairs of the (filtered) combo rows as int64 keys over
+# vocab["drugs"]; only the deduplicated keys and one chunk are held at a time
+def stream_pair_keys(path, effects=None, drugs=None, chunk_rows=CHUNK_ROWS):
+    vocab = combo_vocab(path, chunk_rows)
+    n = len(vocab["drugs"])
+    keys = np.empty(0, dtype=np.int64)
+    for chunk in scan_combo(path, ("stitch1", "stitch2"), effects, drugs, chunk_rows=chunk_rows, vocab=vocab):
+        keys = np.union1d(keys, pair_keys(chunk["stitch1"], chunk["stitch2"], n))
+    return vocab["drugs"], keys
+
+
+# Peak resident memory of this process in MB
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def check_memory(limit_mb):
+    peak = peak_rss_mb()
+    if limit_mb and peak > limit_mb:
+        print(f"⚠️ Peak memory {peak:.0f} MB exceeded the {limit_mb} MB ceiling; lower --memory-limit or the chunk size")
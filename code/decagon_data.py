@@ -0,0 +1,226 @@
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from combo_stream import combo_vocab, scan_combo
+from edge_ingest import encode
+from profiling import count, profiled, stage
+
+COMBO_PATH = "csv/bio-decagon-combo.csv"
+PPI_PATH = "csv/bio-decagon-ppi.csv"
+TARGETS_PATH = "csv/bio-decagon-targets-all.csv"
+
+CACHE_DIR = ".decagon_cache"
+CACHE_VERSION = 1
+
+_loaded = {}
+
+
+def file_hash(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def cache_path(path):
+    base = os.path.basename(path)
+    return os.path.join(os.path.dirname(path), CACHE_DIR, os.path.splitext(base)[0])
+
+
+# Sorted label vocabulary shared by several string columns + int32 codes per column
+def _encode(columns):
+    labels = np.unique(np.concatenate([pd.unique(c) for c in columns]).astype(str))
+    return labels, [encode(c, labels)[1] for c in columns]
+
+
+# The combo file is encoded chunk by chunk, so building its cache never
+# holds more than one parsed chunk plus the int32 columns
+def _build_combo(path):
+    vocab = combo_vocab(path)
+    chunks = list(scan_combo(path, vocab=vocab))
+    columns = {c: np.concatenate([ch[c] for ch in chunks]) if chunks else np.empty(0, dtype=np.int32)
+               for c in ("stitch1", "stitch2", "effect")}
+    return {**columns, "drugs": vocab["drugs"], "effects": vocab["effects"], "effect_names": vocab["effect_names"]}
+
+
+def _build_ppi(path):
+    df = pd.read_csv(path, dtype=np.int32)
+    return {"gene1": df["Gene 1"].to_numpy(), "gene2": df["Gene 2"].to_numpy()}
+
+
+def _build_targets(path):
+    df = pd.read_csv(path, dtype={"STITCH": str, "Gene": np.int32})
+    drugs, (stitch,) = _encode([df["STITCH"]])
+    return {"stitch": stitch, "gene": df["Gene"].to_numpy(), "drugs": drugs}
+
+
+def _read_meta(cache):
+    try:
+        with open(os.path.join(cache, "meta.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(cache, meta):
+    fd, tmp = tempfile.mkstemp(dir=cache, prefix="meta.", suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, os.path.join(cache, "meta.json"))
+
+
+# Exclusive lock for building `directory`, held across processes, so that
+# analyses started side by side on a cold cache build it once and never
+# delete each other's half-written files
+@contextmanager
+def build_lock(directory):
+    os.makedirs(os.path.dirname(directory), exist_ok=True)
+    with open(directory + ".lock", "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+# Saves `arrays` (and meta.json) into a private temporary directory next to
+# `directory`, then moves it into place. Call under build_lock(directory).
+def publish_arrays(directory, arrays, meta=None):
+    tmp = tempfile.mkdtemp(dir=os.path.dirname(directory), prefix=os.path.basename(directory) + ".", suffix=".tmp")
+    try:
+        for name, arr in arrays.items():
+            np.save(os.path.join(tmp, name + ".npy"), arr)
+        if meta is not None:
+            _write_meta(tmp, meta)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(tmp, directory)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+# The cache is valid if it was built from the same bytes. mtime and size are
+# checked first; the content hash is only recomputed when they changed.
+def _cache_is_valid(path, cache, meta):
+    if meta is None or meta.get("version") != CACHE_VERSION:
+        return False
+    st = os.stat(path)
+    if meta["size"] == st.st_size and meta["mtime_ns"] == st.st_mtime_ns:
+        return True
+    if meta["size"] != st.st_size or meta["hash"] != file_hash(path):
+        return False
+    # touched but unchanged: remember the new mtime
+    meta["mtime_ns"] = st.st_mtime_ns
+    _write_meta(cache, meta)
+    return True
+
+
+def _build_cache(path, cache, builder):
+    st = os.stat(path)
+    arrays = builder(path)
+    publish_arrays(cache, arrays, {
+        "version": CACHE_VERSION,
+        "source": os.path.abspath(path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "hash": file_hash(path),
+        "rows": int(len(next(iter(arrays.values())))),
+        "arrays": sorted(arrays),
+    })
+
+
+@profiled("load")
+def _load(path, builder):
+    key = (os.path.abspath(path), builder.__name__)
+    if key in _loaded:
+        return _loaded[key]
+    cache = cache_path(path)
+    meta = _read_meta(cache)
+    if not _cache_is_valid(path, cache, meta):
+        with build_lock(cache):
+            # another process may have built it while we waited
+            meta = _read_meta(cache)
+            if not _cache_is_valid(path, cache, meta):
+                print(f"Building binary cache for {path} ...")
+                with stage("build cache"):
+                    _build_cache(path, cache, builder)
+                meta = _read_meta(cache)
+                count("rows cached", meta["rows"])
+    arrays = {name: np.load(os.path.join(cache, name + ".npy"), mmap_mode="r") for name in meta["arrays"]}
+    _loaded[key] = arrays
+    return arrays
+
+
+# Content hash of a cached source file, for caches derived from several files
+def source_hash(path):
+    return _read_meta(cache_path(path))["hash"]
+
+
+# Memory-mapped, integer-encoded views of the Decagon CSVs
+def load_combo(path=COMBO_PATH):
+    return _load(path, _build_combo)
+
+
+def load_ppi(path=PPI_PATH):
+    return _load(path, _build_ppi)
+
+
+def load_targets(path=TARGETS_PATH):
+    return _load(path, _build_targets)
+
+
+# Code of a single label in a sorted vocabulary (-1 when missing)
+def label_code(labels, label):
+    i = int(np.searchsorted(labels, label))
+    return i if i < len(labels) and labels[i] == label else -1
+
+
+# Codes of `labels` translated into the vocabulary `into` (-1 when missing)
+def recode(codes, labels, into):
+    pos = np.searchsorted(into, labels)
+    pos[pos == len(into)] = 0
+    mapping = np.where(into[pos] == labels, pos, -1).astype(np.int32)
+    return mapping[codes]
+
+
+# DataFrames with the original column names, backed by categorical codes
+def combo_frame(path=COMBO_PATH):
+    c = load_combo(path)
+    names, name_codes = np.unique(c["effect_names"], return_inverse=True)
+    return pd.DataFrame({
+        "STITCH 1": pd.Categorical.from_codes(c["stitch1"], categories=c["drugs"]),
+        "STITCH 2": pd.Categorical.from_codes(c["stitch2"], categories=c["drugs"]),
+        "Polypharmacy Side Effect": pd.Categorical.from_codes(c["effect"], categories=c["effects"]),
+        "Side Effect Name": pd.Categorical.from_codes(name_codes[c["effect"]], categories=names),
+    })
+
+
+def ppi_frame(path=PPI_PATH):
+    p = load_ppi(path)
+    return pd.DataFrame({"Gene 1": np.asarray(p["gene1"]), "Gene 2": np.asarray(p["gene2"])})
+
+
+def targets_frame(path=TARGETS_PATH):
+    t = load_targets(path)
+    return pd.DataFrame({
+        "STITCH": pd.Categorical.from_codes(t["stitch"], categories=t["drugs"]),
+        "Gene": np.asarray(t["gene"]),
+    })
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Warm the caches: python code/decagon_data.py [combo.csv ppi.csv targets.csv]
+    paths = sys.argv[1:4] or [COMBO_PATH, PPI_PATH, TARGETS_PATH]
+    for path, loader in zip(paths, (load_combo, load_ppi, load_targets)):
+        arrays = loader(path)
+        print(f"{path}: {len(next(iter(arrays.values())))} rows cached in {cache_path(path)}")
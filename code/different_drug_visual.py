@@ -1,20 +1,30 @@
+import argparse
 import pandas as pd
 import networkx as nx
 import matplotlib.pyplot as plt
-from extract_drug_drug_effect import diff_drug_pair
+from edge_ingest import add_edges
+from extract_drug_drug_effect import get_all_combo_pairs
+from layout_cache import spring_layout
+from profiling import stage
+
+parser = argparse.ArgumentParser(description="Drug-protein network of every combo drug pair")
+parser.add_argument("--output", help="write the figure to this .png/.svg/.pdf instead of showing it")
+args = parser.parse_args()
+if args.output:
+    plt.switch_backend("Agg")
 
 # Load drug–protein interactions
 dpi = pd.read_csv("csv/different_drug_protein.csv", header=None, names=["drug", "protein"])
 
-# Drug–Drug side effects as list of sets
-drug_side_effects = diff_drug_pair
+# Drug–Drug side effects as an (n, 2) array of distinct pairs
+drug_side_effects = get_all_combo_pairs()
 
 # Initialize graph
 G = nx.Graph()
 
 
 # Add drug nodes
-drugs = set(dpi['drug']).union({d for pair in drug_side_effects for d in pair})
+drugs = set(dpi['drug']).union(drug_side_effects.ravel().tolist())
 for d in drugs:
     G.add_node(d, type='drug')
 
@@ -26,16 +36,13 @@ for p in proteins:
 
 
 # Add drug–protein edges
-for _, row in dpi.iterrows():
-    G.add_edge(row['drug'], row['protein'], type='drug-protein')
+add_edges(G, dpi['drug'], dpi['protein'], type='drug-protein')
 
 # Add drug–drug edges (side effects)
-for pair in drug_side_effects:
-    if len(pair) == 2:  # ensure it's a pair
-        d1, d2 = tuple(pair)
-        G.add_edge(d1, d2, type='side-effect', effect='cancer')
-    else:
-        print(f"Skipping invalid pair: {pair}")
+is_pair = drug_side_effects[:, 0] != drug_side_effects[:, 1]  # ensure it's a pair
+for pair in drug_side_effects[~is_pair].tolist():
+    print(f"Skipping invalid pair: {pair}")
+add_edges(G, drug_side_effects[is_pair, 0], drug_side_effects[is_pair, 1], type='side-effect', effect='cancer')
 
 
 
@@ -44,22 +51,28 @@ drug_nodes = [n for n, attr in G.nodes(data=True) if attr['type'] == 'drug']
 protein_nodes = [n for n, attr in G.nodes(data=True) if attr['type'] == 'protein']
 
 # Layout
-pos = nx.spring_layout(G, seed=42)
+pos = spring_layout(G, seed=42)
 
-# Draw nodes
-nx.draw_networkx_nodes(G, pos, nodelist=drug_nodes, node_color='lightcoral', node_shape='o', label='Drugs')
-nx.draw_networkx_nodes(G, pos, nodelist=protein_nodes, node_color='lightblue', node_shape='s', label='Proteins')
+# Drawing and saving the figure
+with stage("render"):
+    # Draw nodes
+    nx.draw_networkx_nodes(G, pos, nodelist=drug_nodes, node_color='lightcoral', node_shape='o', label='Drugs')
+    nx.draw_networkx_nodes(G, pos, nodelist=protein_nodes, node_color='lightblue', node_shape='s', label='Proteins')
 
-# Draw edges by type
-side_effect_edges = [(u, v) for u, v, e in G.edges(data=True) if e['type'] == 'side-effect']
-dpi_edges = [(u, v) for u, v, e in G.edges(data=True) if e['type'] == 'drug-protein']
+    # Draw edges by type
+    side_effect_edges = [(u, v) for u, v, e in G.edges(data=True) if e['type'] == 'side-effect']
+    dpi_edges = [(u, v) for u, v, e in G.edges(data=True) if e['type'] == 'drug-protein']
 
-nx.draw_networkx_edges(G, pos, edgelist=side_effect_edges, edge_color='red', style='solid', width=2, label='Presence of side effect')
-nx.draw_networkx_edges(G, pos, edgelist=dpi_edges, edge_color='gray', style='dashed', label='Drug–Protein interaction')
+    nx.draw_networkx_edges(G, pos, edgelist=side_effect_edges, edge_color='red', style='solid', width=2, label='Presence of side effect')
+    nx.draw_networkx_edges(G, pos, edgelist=dpi_edges, edge_color='gray', style='dashed', label='Drug–Protein interaction')
 
-nx.draw_networkx_labels(G, pos, font_size=8)
+    nx.draw_networkx_labels(G, pos, font_size=8)
 
-plt.legend()
-plt.title("Drug–Drug Side Effects and Drug–Protein Interactions")
-plt.axis("off")
-plt.show()
+    plt.legend()
+    plt.title("Drug–Drug Side Effects and Drug–Protein Interactions")
+    plt.axis("off")
+    if args.output:
+        plt.savefig(args.output, dpi=150)
+        print(f"✅ Figure saved to: {args.output}")
+    else:
+        plt.show()
@@ -1,7 +1,20 @@
+import argparse
+import numpy as np
 import pandas as pd
 import networkx as nx
 import matplotlib.pyplot as plt
-from extract_drug_drug_effect import diff_drug_pair 
+from decagon_data import load_ppi, recode
+from drug_subgraph import induced_subgraph, subgraph_index
+from edge_ingest import add_edges
+from extract_drug_drug_effect import get_all_combo_pairs
+from layout_cache import spring_layout
+from profiling import stage
+
+parser = argparse.ArgumentParser(description="Drug-protein and PPI network of the combo drug pairs, multi-drug proteins only")
+parser.add_argument("--output", help="write the figure to this .png/.svg/.pdf instead of showing it")
+args = parser.parse_args()
+if args.output:
+    plt.switch_backend("Agg")
 
 dpi = pd.read_csv(
     "csv/different_drug_protein.csv",
@@ -9,97 +22,84 @@ dpi = pd.read_csv(
     names=["drug", "protein"]
 )
 
-ppi = pd.read_csv("csv/bio-decagon-ppi.csv")  
+ppi = load_ppi("csv/bio-decagon-ppi.csv")
+index = subgraph_index(dpi["drug"].to_numpy(), dpi["protein"].to_numpy(), ppi["gene1"], ppi["gene2"])
 
-drug_side_effects = diff_drug_pair
+drug_side_effects = get_all_combo_pairs()
 
 
 # Keep only pairs where both drugs exist in the drug–protein file
-valid_drugs = set(dpi["drug"])
-filtered_pairs = [pair for pair in drug_side_effects if pair.issubset(valid_drugs)]
+pair_codes = np.column_stack([
+    recode(np.arange(len(drug_side_effects)), drug_side_effects[:, i], index["drugs"]) for i in (0, 1)
+])
+filtered_pairs = pair_codes[(pair_codes >= 0).all(axis=1)]
 
-# Collect drugs involved in at least one valid side-effect pair
-drugs_with_side_effects = {d for pair in filtered_pairs for d in pair}
-
-# Filter the drug–protein data to only include these drugs
-dpi_filtered = dpi[dpi["drug"].isin(drugs_with_side_effects)]
-
-
-# Count how many unique drugs interact with each protein
-protein_counts = dpi_filtered.groupby("protein")["drug"].nunique()
-
-# Keep only proteins that have interactions with ≥ 2 drugs
-multi_drug_proteins = protein_counts[protein_counts >= 2].index
-
-# Filter the dataframe
-dpi_filtered = dpi_filtered[dpi_filtered["protein"].isin(multi_drug_proteins)]
-
-
-# Keep only protein–protein edges where both proteins are already in our selected set
-selected_proteins = set(dpi_filtered["protein"])
-
-ppi_filtered = ppi[
-    ppi["Gene 1"].isin(selected_proteins) & ppi["Gene 2"].isin(selected_proteins)
-]
+# Drugs involved in at least one valid side-effect pair, their targets hit by
+# ≥ 2 of them and the protein–protein edges between those proteins
+drugs_with_side_effects = np.unique(filtered_pairs)
+sub = induced_subgraph(index, index["drugs"][drugs_with_side_effects], min_drugs=2)
 
 print(f"Original drug–drug pairs: {len(drug_side_effects)}")
 print(f"Valid pairs (both drugs in CSV): {len(filtered_pairs)}")
 print(f"Drugs with at least one side effect: {len(drugs_with_side_effects)}")
-print(f"Proteins with ≥ 2 drug interactions: {len(multi_drug_proteins)}")
-print(f"Filtered protein–protein interactions: {len(ppi_filtered)}")
+print(f"Proteins with ≥ 2 drug interactions: {len(sub['proteins'])}")
+print(f"Filtered protein–protein interactions: {len(sub['ppi_edges'])}")
 
 
 
+drug_labels, protein_labels = index["drugs"], index["proteins"]
 G = nx.Graph()
 
 # Add drug nodes
-for d in set(dpi_filtered["drug"]):
-    G.add_node(d, type="drug")
+G.add_nodes_from(drug_labels[sub["drugs"]].tolist(), type="drug")
 
 # Add protein nodes
-for p in multi_drug_proteins:
-    G.add_node(p, type="protein")
+G.add_nodes_from(protein_labels[sub["proteins"]].tolist(), type="protein")
 
 # Add drug–protein edges
-for _, row in dpi_filtered.iterrows():
-    G.add_edge(row["drug"], row["protein"], type="drug-protein")
+add_edges(G, drug_labels[sub["target_drug"]], protein_labels[sub["target_protein"]], type="drug-protein")
 
 # Add drug–drug side-effect edges
-for pair in filtered_pairs:
-    d1, d2 = tuple(pair)
-    if d1 in G.nodes and d2 in G.nodes:
-        G.add_edge(d1, d2, type="side-effect", effect="cancer")
+in_graph = np.zeros(len(drug_labels), dtype=bool)
+in_graph[sub["drugs"]] = True
+kept = filtered_pairs[in_graph[filtered_pairs].all(axis=1)]
+add_edges(G, drug_labels[kept[:, 0]], drug_labels[kept[:, 1]], type="side-effect", effect="cancer")
 
 # Add protein–protein edges
-for _, row in ppi_filtered.iterrows():
-    G.add_edge(row["Gene 1"], row["Gene 2"], type="protein-protein")
+add_edges(G, protein_labels[sub["ppi_src"]], protein_labels[sub["ppi_dst"]], type="protein-protein")
 
 
-pos = nx.spring_layout(G, seed=42)
+pos = spring_layout(G, seed=42)
 
-drug_nodes = [n for n, attr in G.nodes(data=True) if attr["type"] == "drug"]
-protein_nodes = [n for n, attr in G.nodes(data=True) if attr["type"] == "protein"]
+# Drawing and saving the figure
+with stage("render"):
+    drug_nodes = [n for n, attr in G.nodes(data=True) if attr["type"] == "drug"]
+    protein_nodes = [n for n, attr in G.nodes(data=True) if attr["type"] == "protein"]
 
 
-plt.figure(figsize=(12, 7))
-nx.draw_networkx_nodes(G, pos, nodelist=drug_nodes, node_color="lightcoral", node_shape="o", label="Drugs")
-nx.draw_networkx_nodes(G, pos, nodelist=protein_nodes, node_color="lightblue", node_shape="s", label="Proteins")
+    plt.figure(figsize=(12, 7))
+    nx.draw_networkx_nodes(G, pos, nodelist=drug_nodes, node_color="lightcoral", node_shape="o", label="Drugs")
+    nx.draw_networkx_nodes(G, pos, nodelist=protein_nodes, node_color="lightblue", node_shape="s", label="Proteins")
 
-# Draw edges by type
-side_effect_edges = [(u, v) for u, v, e in G.edges(data=True) if e["type"] == "side-effect"]
-dpi_edges = [(u, v) for u, v, e in G.edges(data=True) if e["type"] == "drug-protein"]
-ppi_edges = [(u, v) for u, v, e in G.edges(data=True) if e["type"] == "protein-protein"]
+    # Draw edges by type
+    side_effect_edges = [(u, v) for u, v, e in G.edges(data=True) if e["type"] == "side-effect"]
+    dpi_edges = [(u, v) for u, v, e in G.edges(data=True) if e["type"] == "drug-protein"]
+    ppi_edges = [(u, v) for u, v, e in G.edges(data=True) if e["type"] == "protein-protein"]
 
-nx.draw_networkx_edges(G, pos, edgelist=side_effect_edges, edge_color="red", width=2, label="Side effect: cancer")
-nx.draw_networkx_edges(G, pos, edgelist=dpi_edges, edge_color="gray", style="dashed", label="Drug–Protein interaction")
-nx.draw_networkx_edges(G, pos, edgelist=ppi_edges, edge_color="blue", style="dotted", label="Protein–Protein interaction")
+    nx.draw_networkx_edges(G, pos, edgelist=side_effect_edges, edge_color="red", width=2, label="Side effect: cancer")
+    nx.draw_networkx_edges(G, pos, edgelist=dpi_edges, edge_color="gray", style="dashed", label="Drug–Protein interaction")
+    nx.draw_networkx_edges(G, pos, edgelist=ppi_edges, edge_color="blue", style="dotted", label="Protein–Protein interaction")
 
 
-nx.draw_networkx_labels(G, pos, font_size=8)
+    nx.draw_networkx_labels(G, pos, font_size=8)
 
 
-plt.legend()
-plt.title("Drug–Drug Side Effects (Cancer) with Drug–Protein and Protein–Protein Interactions")
-plt.axis("off")
-plt.tight_layout()
-plt.show()
+    plt.legend()
+    plt.title("Drug–Drug Side Effects (Cancer) with Drug–Protein and Protein–Protein Interactions")
+    plt.axis("off")
+    plt.tight_layout()
+    if args.output:
+        plt.savefig(args.output, dpi=150)
+        print(f"✅ Figure saved to: {args.output}")
+    else:
+        plt.show()
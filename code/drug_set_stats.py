@@ -0,0 +1,107 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from combo_stream import stream_pair_keys
+from decagon_data import COMBO_PATH, PPI_PATH, TARGETS_PATH, load_ppi, load_targets, recode
+from effect_index import load_index
+from edge_ingest import decode_pair_keys
+from pair_scores import build_matrices, pair_score_matrices, side_effect_pair_codes, summarize_pairs
+from profiling import count, profiled
+
+# Per-process handles on the memory-mapped caches. Workers open the same
+# .npy files, so the combo/PPI data is shared through the page cache instead
+# of being pickled to every process.
+_shared = {}
+
+
+# Distinct combo drug pairs as (drug labels, low codes, high codes): read from
+# the cached effect index, or streamed from the CSV in chunks of `chunk_rows`
+@profiled("pairs")
+def combo_pairs(combo_path, chunk_rows=None):
+    if chunk_rows:
+        drugs, keys = stream_pair_keys(combo_path, chunk_rows=chunk_rows)
+    else:
+        index = load_index(combo_path)
+        drugs, keys = index["drugs"], np.asarray(index["pairs"])
+    lo, hi = decode_pair_keys(keys, len(drugs))
+    count("combo pairs", len(lo))
+    return drugs, lo, hi
+
+
+def _open_shared(combo_path, ppi_path, pairs=None):
+    drugs, lo, hi = pairs or combo_pairs(combo_path)
+    _shared["combo_drugs"] = drugs
+    _shared["pair_lo"], _shared["pair_hi"] = lo, hi
+    _shared["ppi"] = load_ppi(ppi_path)
+
+
+# Summary row of one drug set, identical to the former per-file loop
+@profiled("drug set")
+def drug_set_summary(path):
+    drug_protein_df = pd.read_csv(path)
+    drugs, drug_codes = np.unique(drug_protein_df['STITCH'].to_numpy(dtype=str), return_inverse=True)
+
+    ppi = _shared["ppi"]
+    proteins, B, A = build_matrices(
+        drug_codes, len(drugs), drug_protein_df['Gene'].to_numpy(), ppi["gene1"], ppi["gene2"]
+    )
+
+    # distinct combo pairs translated into this set's drug codes (-1 = not in set)
+    mapping = recode(np.arange(len(_shared["combo_drugs"])), _shared["combo_drugs"], drugs)
+    side_rows, side_cols = side_effect_pair_codes(
+        len(drugs), mapping[_shared["pair_lo"]], mapping[_shared["pair_hi"]]
+    )
+
+    shared, ppi_links = pair_score_matrices(B, A)
+    stats = summarize_pairs(shared, ppi_links, side_rows, side_cols)
+    count("drug sets")
+    return {"file": os.path.basename(path), "num_drugs": len(drugs), **stats}
+
+
+# Every drug of the targets file: drug labels, drug x protein incidence B,
+# PPI adjacency A and the canonical side-effect pairs
+def all_drug_matrices(targets_path=TARGETS_PATH, combo_path=COMBO_PATH, ppi_path=PPI_PATH, chunk_rows=None):
+    targets = load_targets(targets_path)
+    _open_shared(combo_path, ppi_path, combo_pairs(combo_path, chunk_rows))
+    drugs = targets["drugs"]
+    ppi = _shared["ppi"]
+    proteins, B, A = build_matrices(targets["stitch"], len(drugs), targets["gene"], ppi["gene1"], ppi["gene2"])
+
+    mapping = recode(np.arange(len(_shared["combo_drugs"])), _shared["combo_drugs"], drugs)
+    side_rows, side_cols = side_effect_pair_codes(
+        len(drugs), mapping[_shared["pair_lo"]], mapping[_shared["pair_hi"]]
+    )
+    return drugs, B, A, side_rows, side_cols
+
+
+# Every drug of the targets file: drug labels, shared-target and PPI-link
+# matrices, and the canonical side-effect pairs
+@profiled("all drug scores")
+def all_drug_scores(targets_path=TARGETS_PATH, combo_path=COMBO_PATH, ppi_path=PPI_PATH, chunk_rows=None):
+    drugs, B, A, side_rows, side_cols = all_drug_matrices(targets_path, combo_path, ppi_path, chunk_rows)
+    shared, ppi_links = pair_score_matrices(B, A)
+    return drugs, shared, ppi_links, side_rows, side_cols
+
+
+# chunk_rows streams the combo file instead of building its cache; the
+# distinct pairs are then computed once here and handed to the workers
+@profiled("drug sets")
+def run_drug_sets(drug_dir, combo_path=COMBO_PATH, ppi_path=PPI_PATH, workers=None, chunk_rows=None):
+    paths = [os.path.join(drug_dir, f) for f in sorted(os.listdir(drug_dir)) if f.endswith(".csv")]
+
+    # build the caches once here so workers only ever memory-map them
+    pairs = combo_pairs(combo_path, chunk_rows) if chunk_rows else None
+    _open_shared(combo_path, ppi_path, pairs)
+    if workers == 1 or len(paths) <= 1:
+        rows = [drug_set_summary(p) for p in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_open_shared,
+                                 initargs=(combo_path, ppi_path, pairs)) as pool:
+            rows = list(pool.map(drug_set_summary, paths, chunksize=max(1, len(paths) // 64)))
+    return pd.DataFrame(rows, columns=[
+        "file", "num_drugs", "num_side_effect_pairs", "num_no_side_effect_pairs",
+        "avg_shared_proteins_side_effect", "avg_ppi_side_effect",
+        "avg_shared_proteins_no_side_effect", "avg_ppi_no_side_effect",
+    ])
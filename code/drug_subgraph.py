@@ -0,0 +1,91 @@
+import numpy as np
+from decagon_data import PPI_PATH, TARGETS_PATH, load_ppi, load_targets, recode
+from hetero_graph import gather_rows
+from profiling import count, profiled
+
+_indexes = {}
+
+
+# CSR (indptr, indices) of distinct (row, col) pairs, columns sorted per row
+def _csr(rows, cols, n_rows, n_cols):
+    keys = np.unique(rows.astype(np.int64) * n_cols + cols)
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys // n_cols, minlength=n_rows), out=indptr[1:])
+    return indptr, (keys % n_cols).astype(np.int32)
+
+
+# Arrays for induced-subgraph queries over one set of drug-target rows and a
+# PPI edge list:
+#   drugs, proteins      sorted drug labels and gene ids (targets + PPI genes)
+#   target_indptr/...    drug -> distinct target proteins (CSR)
+#   ppi_src, ppi_dst     protein ids of every PPI row
+#   ppi_indptr/...       protein -> neighbor proteins with the PPI row id of
+#                        every entry, both directions (CSR)
+def subgraph_index(target_drugs, target_genes, ppi_gene1, ppi_gene2):
+    drugs, drug_codes = np.unique(np.asarray(target_drugs, dtype=str), return_inverse=True)
+    proteins = np.unique(np.concatenate([target_genes, ppi_gene1, ppi_gene2]))
+    target_indptr, target_indices = _csr(drug_codes, np.searchsorted(proteins, target_genes),
+                                         len(drugs), len(proteins))
+
+    src = np.searchsorted(proteins, ppi_gene1).astype(np.int32)
+    dst = np.searchsorted(proteins, ppi_gene2).astype(np.int32)
+    both = np.concatenate([src, dst])
+    order = np.argsort(both, kind="stable")
+    ppi_indptr = np.zeros(len(proteins) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(both, minlength=len(proteins)), out=ppi_indptr[1:])
+    return {
+        "drugs": drugs, "proteins": proteins,
+        "target_indptr": target_indptr, "target_indices": target_indices,
+        "ppi_src": src, "ppi_dst": dst,
+        "ppi_indptr": ppi_indptr,
+        "ppi_indices": np.concatenate([dst, src])[order],
+        "ppi_edges": np.tile(np.arange(len(src), dtype=np.int64), 2)[order],
+    }
+
+
+# Subgraph index of the Decagon targets and PPI files, built once per process
+def load_subgraph_index(targets_path=TARGETS_PATH, ppi_path=PPI_PATH):
+    key = (targets_path, ppi_path)
+    if key not in _indexes:
+        targets, ppi = load_targets(targets_path), load_ppi(ppi_path)
+        _indexes[key] = subgraph_index(targets["drugs"][targets["stitch"]], targets["gene"],
+                                       ppi["gene1"], ppi["gene2"])
+    return _indexes[key]
+
+
+# Drug-protein-PPI subgraph induced by a drug set (labels, unknown ones are
+# ignored), as index arrays into index["drugs"] / index["proteins"]:
+#   drugs, proteins            kept drug and protein ids
+#   target_drug/target_protein one entry per drug-target edge
+#   ppi_edges, ppi_src/ppi_dst PPI rows between two kept proteins
+# Proteins are the targets hit by at least `min_drugs` drugs of the set; with
+# min_drugs > 1 the drugs left without any kept target are dropped. Only the
+# target rows of the set and the PPI rows of the kept proteins are read.
+@profiled("subgraph")
+def induced_subgraph(index, drugs, min_drugs=1):
+    codes = recode(np.arange(len(drugs)), np.asarray(drugs, dtype=str), index["drugs"])
+    codes = np.unique(codes[codes >= 0])
+    starts = index["target_indptr"][codes]
+    counts = index["target_indptr"][codes + 1] - starts
+    target_drug = np.repeat(codes, counts)
+    target_protein = gather_rows(index["target_indptr"], index["target_indices"], codes)
+
+    hits = np.bincount(target_protein, minlength=len(index["proteins"]))
+    mask = hits >= min_drugs
+    proteins = np.flatnonzero(mask)
+    if min_drugs > 1:
+        keep = mask[target_protein]
+        target_drug, target_protein = target_drug[keep], target_protein[keep]
+        codes = np.unique(target_drug)
+
+    # PPI rows leaving a kept protein, kept when the other end is kept too
+    neighbors = gather_rows(index["ppi_indptr"], index["ppi_indices"], proteins)
+    edges = gather_rows(index["ppi_indptr"], index["ppi_edges"], proteins)
+    edges = np.unique(edges[mask[neighbors]])
+    count("drug-target edges", len(target_drug))
+    count("ppi edges", len(edges))
+    return {
+        "drugs": codes, "proteins": proteins,
+        "target_drug": target_drug, "target_protein": target_protein,
+        "ppi_edges": edges, "ppi_src": index["ppi_src"][edges], "ppi_dst": index["ppi_dst"][edges],
+    }
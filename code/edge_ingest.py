@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+
+# Integer codes of a label column against a sorted vocabulary (built from
+# the column when not given); labels outside the vocabulary get -1
+def encode(values, vocab=None):
+    if vocab is None:
+        vocab = np.unique(np.asarray(pd.unique(np.asarray(values))))
+    codes = pd.Categorical(values, categories=vocab).codes.astype(np.int32)
+    return vocab, codes
+
+
+# Unordered pair (a, b) as one int64 key: min * n + max
+def pair_keys(codes1, codes2, n):
+    codes1 = np.asarray(codes1, dtype=np.int64)
+    codes2 = np.asarray(codes2, dtype=np.int64)
+    return np.minimum(codes1, codes2) * n + np.maximum(codes1, codes2)
+
+
+def decode_pair_keys(keys, n):
+    keys = np.asarray(keys)
+    return keys // n, keys % n
+
+
+# Sorted distinct unordered pairs, as keys
+def unique_pairs(codes1, codes2, n):
+    return np.unique(pair_keys(codes1, codes2, n))
+
+
+# Rows whose two endpoints both belong to `allowed`
+def both_in(values1, values2, allowed):
+    allowed = np.asarray(list(allowed) if isinstance(allowed, (set, frozenset)) else allowed)
+    return np.isin(values1, allowed) & np.isin(values2, allowed)
+
+
+# Bulk insertion of an edge list into a networkx graph
+def add_edges(G, u, v, **attr):
+    G.add_edges_from(zip(np.asarray(u).tolist(), np.asarray(v).tolist()), **attr)
@@ -0,0 +1,126 @@
+import os
+import sys
+
+import numpy as np
+from decagon_data import COMBO_PATH, build_lock, cache_path, load_combo, publish_arrays
+from edge_ingest import decode_pair_keys, pair_keys
+
+_indexes = {}
+
+
+def normalize_name(name):
+    return str(name).lower().strip()
+
+
+# Rows of a CSR (indptr, values) layout from (group, value) pairs
+def _csr(groups, values, n_groups):
+    order = np.lexsort((values, groups))
+    indptr = np.zeros(n_groups + 1, dtype=np.int64)
+    np.cumsum(np.bincount(groups, minlength=n_groups), out=indptr[1:])
+    return indptr, values[order].astype(np.int32)
+
+
+def _build_index(combo):
+    n_drugs = len(combo["drugs"])
+    n_effects = len(combo["effects"])
+    keys = pair_keys(combo["stitch1"], combo["stitch2"], n_drugs)
+    pairs, pair_of_row = np.unique(keys, return_inverse=True)
+
+    # one entry per distinct (effect, pair)
+    combined = np.unique(combo["effect"].astype(np.int64) * len(pairs) + pair_of_row)
+    effect_of, pair_of = combined // len(pairs), combined % len(pairs)
+
+    effect_indptr, effect_pairs = _csr(effect_of, pair_of, n_effects)
+    pair_indptr, pair_effects = _csr(pair_of, effect_of, len(pairs))
+    return {
+        "pairs": pairs,
+        "effect_indptr": effect_indptr, "effect_pairs": effect_pairs,
+        "pair_indptr": pair_indptr, "pair_effects": pair_effects,
+        "names": np.array([normalize_name(n) for n in combo["effect_names"]]),
+    }
+
+
+# Inverted index over the combo file: effect -> sorted pair ids and
+# pair id -> sorted effect codes, both as CSR arrays. It is stored next to
+# the combo cache and rebuilt together with it.
+def load_index(path=COMBO_PATH):
+    combo = load_combo(path)
+    directory = os.path.join(cache_path(path), "effect_index")
+    key = os.path.abspath(directory)
+    if key in _indexes:
+        return _indexes[key]
+    names = ["pairs", "effect_indptr", "effect_pairs", "pair_indptr", "pair_effects", "names"]
+    if not os.path.isdir(directory):
+        with build_lock(directory):
+            if not os.path.isdir(directory):
+                index = _build_index(combo)
+                publish_arrays(directory, {n: index[n] for n in names})
+    index = {n: np.load(os.path.join(directory, n + ".npy"), mmap_mode="r") for n in names}
+    index["drugs"] = combo["drugs"]
+    index["effects"] = combo["effects"]
+    _indexes[key] = index
+    return index
+
+
+# Effect codes matching a side-effect code ("C0018621") or a name ("hay fever")
+def effect_codes(index, effect):
+    i = np.searchsorted(index["effects"], effect)
+    if i < len(index["effects"]) and index["effects"][i] == effect:
+        return np.array([i])
+    return np.flatnonzero(index["names"] == normalize_name(effect))
+
+
+# Sorted ids of the pairs with at least one of the matching effects
+def pairs_with(index, effect):
+    indptr, values = index["effect_indptr"], index["effect_pairs"]
+    parts = [values[indptr[c]:indptr[c + 1]] for c in effect_codes(index, effect)]
+    if not parts:
+        return np.empty(0, dtype=np.int32)
+    return parts[0] if len(parts) == 1 else np.unique(np.concatenate(parts))
+
+
+# Pairs having every effect of all_of, at least one of any_of and none of
+# none_of, computed by intersecting / merging the sorted pair-id lists
+def query(index, all_of=(), any_of=(), none_of=()):
+    result = None
+    for effect in all_of:
+        ids = pairs_with(index, effect)
+        result = ids if result is None else np.intersect1d(result, ids, assume_unique=True)
+    if any_of:
+        ids = np.unique(np.concatenate([pairs_with(index, e) for e in any_of]))
+        result = ids if result is None else np.intersect1d(result, ids, assume_unique=True)
+    if result is None:
+        result = np.arange(len(index["pairs"]), dtype=np.int32)
+    for effect in none_of:
+        result = np.setdiff1d(result, pairs_with(index, effect), assume_unique=True)
+    return result
+
+
+# (n, 2) drug labels of the given pair ids, lower code first
+def pair_labels(index, pair_ids):
+    lo, hi = decode_pair_keys(np.asarray(index["pairs"][pair_ids]), len(index["drugs"]))
+    return np.column_stack([index["drugs"][lo], index["drugs"][hi]])
+
+
+def effects_of_pair(index, pair_id):
+    indptr = index["pair_indptr"]
+    return index["effects"][index["pair_effects"][indptr[pair_id]:indptr[pair_id + 1]]]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Drug pairs by polypharmacy side effect")
+    parser.add_argument("--all", nargs="*", default=[], help="effects every pair must have")
+    parser.add_argument("--any", nargs="*", default=[], help="effects of which a pair needs one")
+    parser.add_argument("--none", nargs="*", default=[], help="effects a pair must not have")
+    parser.add_argument("--combo", default=COMBO_PATH)
+    parser.add_argument("--list", action="store_true", help="print the matching pairs")
+    args = parser.parse_args()
+
+    index = load_index(args.combo)
+    ids = query(index, args.all, args.any, args.none)
+    print(f"{len(ids)} drug pairs")
+    if args.list:
+        for d1, d2 in pair_labels(index, ids):
+            sys.stdout.write(f"{d1},{d2}\n")
@@ -1,16 +1,20 @@
 import networkx as nx
 import matplotlib.pyplot as plt
+import numpy as np
 import scipy as sp
+from graph_properties import clustering
 
 n = 7236  #nodes
 m = 22270 #edges
 
 G = nx.gnm_random_graph(n, m)
 
-# some properties
+# some properties, from the edge arrays in one pass
+edges = np.array(G.edges, dtype=np.int64).reshape(-1, 2)
+degree = np.bincount(edges.ravel(), minlength=n)
+local = clustering(n, edges[:, 0], edges[:, 1], workers=1)
 print("node degree clustering")
-for v in nx.nodes(G):
-    print(f"{v} {nx.degree(G, v)} {nx.clustering(G, v)}")
+print("\n".join(f"{v} {d} {c}" for v, d, c in zip(range(n), degree.tolist(), local.tolist())))
 
 print("the adjacency list")
 with open('erdos-renyi_edges.txt', "w") as f:
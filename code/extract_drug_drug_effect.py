@@ -1,92 +1,174 @@
 import csv
+import os
+from functools import lru_cache
+
 import numpy as np
-from pprint import pprint as print
-import pandas as pd
+from combo_stream import check_memory, chunk_rows_for, combo_vocab, scan_combo, stream_pair_keys
+from decagon_data import cache_path, label_code, load_combo, load_targets, recode
+from edge_ingest import decode_pair_keys, pair_keys
+from profiling import count, profiled
 
 file_path = "csv/bio-decagon-combo.csv"
 file_path_protein = "csv/bio-decagon-targets-all.csv"
 diff_drug_path = "csv/bio-decagon-combo.csv"
 
-drug_list = []
-drug_pair = []
-diff_drug_pair = []
-diff_drug_list = []
-test = []
-test_2 = []
-
-
-####################################
-#####SIMILAR SIDE EFFECT COMBO#####
-##################################
-
-with open(file_path, newline='') as f:
-    reader = csv.DictReader(f)
-    x = 0
-    for row in reader:
-            if row["Polypharmacy Side Effect"] == "C0006826" and x<30:
-                x+=1
-                drug_list.append(row["STITCH 1"])
-                drug_list.append(row["STITCH 2"])
-                pair = {row["STITCH 1"], row["STITCH 2"]}
-                drug_pair.append(pair)
-
-drug_list = list(dict.fromkeys(drug_list))
-
-# print(len(drug_list))
-print(drug_pair)
-# print(len(drug_pair))
-
-drug_combo = np.loadtxt(file_path_protein, delimiter=",", dtype=[('col1', '<U26'), ('col2', 'i4')], skiprows= 1)
-
-with open("csv/similar_drug_protein.csv", "w", newline='') as output_file:
-    writer = csv.writer(output_file)
-
-    for row in drug_combo:
-        for drug in drug_list:
-            if row[0] == drug:
-                writer.writerow([row[0], row[1]])
-                test.append(row[0])
-        
-test = list(dict.fromkeys(test))
-print(len(test))
-
-
-
-######################################
-#####DIFFERENT SIDE EFFECT COMBO#####
-####################################
-
-diff_drug_combo = np.loadtxt(diff_drug_path, delimiter=",", dtype=[('col1', '<U26'), ('col2', '<U26'),('col3', '<U26'),('col4', '<U26'),], skiprows= 1)
-
-for row in diff_drug_combo:
-    # Convert to Python strings using str()
-    drug1 = str(row[0])
-    drug2 = str(row[1])
-    diff_drug_list.append(drug1)
-    diff_drug_list.append(drug2)
-    pair = {drug1, drug2}
-    diff_drug_pair.append(pair)
-
-diff_drug_list = list(dict.fromkeys(diff_drug_list))
-
-print(diff_drug_pair)
-# print(len(diff_drug_list))
-# print(diff_drug_list)
-
-with open("csv/different_drug_protein.csv", "w", newline='') as output_file:
-    writer = csv.writer(output_file)
-
-    for row in drug_combo:
-        for drug in diff_drug_list:
-            if row[0] == drug:
-                writer.writerow([row[0], row[1]])
-                test_2.append(row[0])
-
-test_2 = list(dict.fromkeys(test_2))
-# print(len(test_2))
-
-
-
-
-
-
+# Combo rows handled per step when deduplicating pairs
+CHUNK_ROWS = 1 << 20
+
+
+# Distinct unordered pairs (int64 keys) over the combo rows, merged chunk by chunk so only
+# the deduplicated keys and one chunk are in memory at a time
+def unique_pair_keys(combo, rows=None):
+    n = len(combo["drugs"])
+    stitch1, stitch2 = combo["stitch1"], combo["stitch2"]
+    total = len(stitch1) if rows is None else len(rows)
+    keys = np.empty(0, dtype=np.int64)
+    for start in range(0, total, CHUNK_ROWS):
+        if rows is None:
+            chunk = pair_keys(stitch1[start:start + CHUNK_ROWS], stitch2[start:start + CHUNK_ROWS], n)
+        else:
+            idx = rows[start:start + CHUNK_ROWS]
+            chunk = pair_keys(stitch1[idx], stitch2[idx], n)
+        keys = np.union1d(keys, chunk)
+    return keys
+
+
+# Hashed semi-join: indices of the target rows whose drug is in `drugs`.
+# Drug codes address a lookup table, so each target row is probed once.
+def target_rows_for(targets, drugs):
+    drugs = np.asarray(drugs, dtype=str)
+    wanted = np.zeros(len(targets["drugs"]), dtype=bool)
+    codes = recode(np.arange(len(drugs)), drugs, targets["drugs"])
+    wanted[codes[codes >= 0]] = True
+    return np.flatnonzero(wanted[targets["stitch"]])
+
+
+def write_drug_protein(path, targets, rows):
+    with open(path, "w", newline='') as output_file:
+        writer = csv.writer(output_file)
+        writer.writerows(zip(
+            targets["drugs"][targets["stitch"][rows]].tolist(),
+            targets["gene"][rows].tolist(),
+        ))
+
+
+def _read_only(arr):
+    arr.setflags(write=False)
+    return arr
+
+
+# Persisted pair arrays live inside the combo cache, so they are dropped
+# whenever the combo cache is rebuilt from a changed CSV
+def _pairs_file(name):
+    return os.path.join(cache_path(file_path), "pairs", name + ".npy")
+
+
+def _persisted(name, compute, persist):
+    path = _pairs_file(name)
+    if persist and os.path.exists(path):
+        load_combo(file_path)  # revalidates (and possibly rebuilds) the cache
+        if os.path.exists(path):
+            return np.load(path)
+    pairs = compute()
+    if persist:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.save(path, pairs)
+    return pairs
+
+
+# (n, 2) array of drug labels, one row per combo row with side effect `code`,
+# in file order and truncated to the first `limit` rows
+@lru_cache(maxsize=None)
+@profiled("filter")
+def get_side_effect_pairs(code, limit=None, persist=False):
+    def compute():
+        combo = load_combo(file_path)
+        rows = np.flatnonzero(combo["effect"] == label_code(combo["effects"], code))[:limit]
+        drugs = combo["drugs"]
+        return np.column_stack([drugs[combo["stitch1"][rows]], drugs[combo["stitch2"][rows]]])
+
+    name = f"{code}_{'all' if limit is None else limit}"
+    return _read_only(_persisted(name, compute, persist))
+
+
+# (n, 2) array of every distinct unordered drug pair of the combo file
+@lru_cache(maxsize=None)
+@profiled("pairs")
+def get_all_combo_pairs(persist=False):
+    def compute():
+        combo = load_combo(diff_drug_path)
+        lo, hi = decode_pair_keys(unique_pair_keys(combo), len(combo["drugs"]))
+        return np.column_stack([combo["drugs"][lo], combo["drugs"][hi]])
+
+    return _read_only(_persisted("all_pairs", compute, persist))
+
+
+# Streaming variants: same results, read from the CSV in chunks of `chunk_rows`
+# rows without building the combo cache. The side-effect scan stops as soon as
+# `limit` rows were found.
+@profiled("filter")
+def stream_side_effect_pairs(code, limit=None, chunk_rows=None):
+    drugs = combo_vocab(file_path, chunk_rows)["drugs"]
+    found, total = [], 0
+    for chunk in scan_combo(file_path, ("stitch1", "stitch2"), effects=[code], chunk_rows=chunk_rows):
+        found.append(np.column_stack([drugs[chunk["stitch1"]], drugs[chunk["stitch2"]]]))
+        total += len(found[-1])
+        if limit is not None and total >= limit:
+            break
+    pairs = np.concatenate(found) if found else np.empty((0, 2), dtype=drugs.dtype)
+    return pairs[:limit]
+
+
+@profiled("pairs")
+def stream_all_combo_pairs(chunk_rows=None):
+    drugs, keys = stream_pair_keys(diff_drug_path, chunk_rows=chunk_rows)
+    lo, hi = decode_pair_keys(keys, len(drugs))
+    return np.column_stack([drugs[lo], drugs[hi]])
+
+
+# Write the target rows of every drug appearing in `pairs`
+@profiled("extract targets")
+def extract_drug_protein(pairs, output_path):
+    targets = load_targets(file_path_protein)
+    drug_list = list(dict.fromkeys(np.asarray(pairs).ravel().tolist()))
+    rows = target_rows_for(targets, drug_list)
+    write_drug_protein(output_path, targets, rows)
+    count("target rows written", len(rows))
+    return len(np.unique(targets["stitch"][rows]))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Drug-protein files of the similar / different side-effect combos")
+    parser.add_argument("--streaming", action="store_true", help="stream the combo file in chunks instead of caching it")
+    parser.add_argument("--memory-limit", type=int, default=1024, help="memory ceiling in MB for --streaming")
+    args = parser.parse_args()
+    chunk_rows = chunk_rows_for(file_path, args.memory_limit) if args.streaming else None
+
+    ####################################
+    #####SIMILAR SIDE EFFECT COMBO#####
+    ##################################
+
+    if args.streaming:
+        drug_pair = stream_side_effect_pairs("C0006826", limit=30, chunk_rows=chunk_rows)
+    else:
+        drug_pair = get_side_effect_pairs("C0006826", limit=30, persist=True)
+    print(f"{len(drug_pair)} drug pairs with side effect C0006826")
+    found = extract_drug_protein(drug_pair, "csv/similar_drug_protein.csv")
+    print(f"{found} drugs with known protein targets")
+
+    ######################################
+    #####DIFFERENT SIDE EFFECT COMBO#####
+    ####################################
+
+    if args.streaming:
+        diff_drug_pair = stream_all_combo_pairs(chunk_rows)
+    else:
+        diff_drug_pair = get_all_combo_pairs(persist=True)
+    print(f"{len(diff_drug_pair)} distinct drug pairs")
+    found = extract_drug_protein(diff_drug_pair, "csv/different_drug_protein.csv")
+    print(f"{found} drugs with known protein targets")
+
+    if args.streaming:
+        check_memory(args.memory_limit)
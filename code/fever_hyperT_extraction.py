@@ -1,22 +1,47 @@
-import pandas as pd
-
-
-df = pd.read_csv("csv/bio-decagon-combo.csv")
-
-df["Side Effect Name"] = df["Side Effect Name"].str.lower().str.strip()
-
-pairs_with_hypertension = df[df["Side Effect Name"] == "pulmonary hypertension"]
-
-num_hypertension = pairs_with_hypertension[["STITCH 1", "STITCH 2"]].drop_duplicates().shape[0]
+import argparse
+
+import numpy as np
+from combo_stream import check_memory, chunk_rows_for, combo_vocab, scan_combo
+from edge_ingest import pair_keys
+from effect_index import load_index, normalize_name, pairs_with, query
+
+combo_file = "csv/bio-decagon-combo.csv"
+
+parser = argparse.ArgumentParser(description="Pairs with pulmonary hypertension, and with hay fever as well")
+parser.add_argument("--streaming", action="store_true", help="stream the combo file in chunks instead of caching it")
+parser.add_argument("--memory-limit", type=int, default=1024, help="memory ceiling in MB for --streaming")
+args = parser.parse_args()
+
+if args.streaming:
+    # Only the rows of the two side effects are kept from each chunk, as
+    # (effect, pair) keys; names are matched on the small effect vocabulary
+    chunk_rows = chunk_rows_for(combo_file, args.memory_limit)
+    vocab = combo_vocab(combo_file, chunk_rows)
+    names = np.array([normalize_name(n) for n in vocab["effect_names"]])
+    wanted = ["pulmonary hypertension", "hay fever"]
+    effects = [np.flatnonzero(names == w) for w in wanted]
+    n = len(vocab["drugs"])
+    seen = [np.empty(0, dtype=np.int64) for _ in wanted]
+    for chunk in scan_combo(combo_file, effects=vocab["effects"][np.concatenate(effects)],
+                            chunk_rows=chunk_rows, vocab=vocab):
+        keys = pair_keys(chunk["stitch1"], chunk["stitch2"], n)
+        for i, codes in enumerate(effects):
+            seen[i] = np.union1d(seen[i], keys[np.isin(chunk["effect"], codes)])
+    hypertension_pairs = seen[0]
+    both_effects_pairs = np.intersect1d(seen[0], seen[1])
+else:
+    index = load_index(combo_file)
+
+    # Side effects are looked up by normalized (lowercased, stripped) name
+    hypertension_pairs = pairs_with(index, "pulmonary hypertension")
+    both_effects_pairs = query(index, all_of=["pulmonary hypertension", "hay fever"])
+
+num_hypertension = len(hypertension_pairs)
 print(f"Number of pairs with hypertension: {num_hypertension}")
 
-hypertension_pairs = set(zip(pairs_with_hypertension["STITCH 1"], pairs_with_hypertension["STITCH 2"]))
-
-fever_rows = df[df["Side Effect Name"] == "hay fever"]
-fever_pairs = set(zip(fever_rows["STITCH 1"], fever_rows["STITCH 2"]))
-
-both_effects_pairs = hypertension_pairs.intersection(fever_pairs)
-
 print(f"Number of pairs with both hypertension and fever: {len(both_effects_pairs)}")
 
-print(f'{len(both_effects_pairs)*100/num_hypertension:.2f}')
\ No newline at end of file
+print(f'{len(both_effects_pairs)*100/num_hypertension:.2f}')
+
+if args.streaming:
+    check_memory(args.memory_limit)
@@ -1,88 +1,67 @@
-import pandas as pd
-import networkx as nx
-import matplotlib.pyplot as plt
+import argparse
 import numpy as np
+from graph_render import MAX_LINES, render
+from hetero_graph import HeteroGraph
 
+parser = argparse.ArgumentParser(description="Drug / protein / combination network")
+parser.add_argument("--output", help="write the figure to this .png/.svg/.pdf instead of showing it")
+parser.add_argument("--lod", choices=["auto", "lines", "sample", "density"], default="auto",
+                    help="level of detail for drug-protein and PPI edges")
+parser.add_argument("--max-edges", type=int, default=MAX_LINES, help="edges drawn as lines for auto / sample")
+parser.add_argument("--max-labels", type=int, default=500, help="label nodes up to this many nodes")
+args = parser.parse_args()
 
-drug_protein_df = pd.read_csv("csv/short_bio-decagon-targets-all.csv")
-protein_protein_df = pd.read_csv("csv/bio-decagon-ppi.csv")
-drug_combo_df = pd.read_csv("csv/bio-decagon-combo.csv")  
 
-proteins_in_drug_links = set(drug_protein_df["STITCH"])
-proteins_in_protein_links = set(protein_protein_df["Gene 1"]) | set(protein_protein_df["Gene 2"])
-proteins_to_keep = proteins_in_drug_links & proteins_in_protein_links
+graph = HeteroGraph.from_decagon(
+    "csv/short_bio-decagon-targets-all.csv", "csv/bio-decagon-ppi.csv", "csv/bio-decagon-combo.csv"
+)
 
-filtered_drug_protein_df = drug_protein_df[drug_protein_df["Gene"].isin(proteins_to_keep)]
-filtered_protein_protein_df = protein_protein_df[
-    protein_protein_df["Gene 1"].isin(proteins_to_keep) &
-    protein_protein_df["Gene 2"].isin(proteins_to_keep)
-]
+# Proteins both targeted by a drug and part of the PPI network
+proteins_to_keep = (graph.degree("drug-protein", reverse=True) > 0) & (graph.degree("protein-protein") > 0)
 
+# Drug–protein / protein–protein edges on kept proteins, drug–drug edges
+# between drugs that keep at least one target
+graph = graph.subgraph({"protein": proteins_to_keep})
+drugs_to_keep = graph.degree("drug-protein") > 0
+graph = graph.subgraph({"drug": drugs_to_keep}).without_isolated()
 
-G = nx.Graph()
-
-for _, row in filtered_drug_protein_df.iterrows():
-    drug, protein = row["STITCH"], row["Gene"]
-    G.add_node(drug, mode="drug")
-    G.add_node(protein, mode="protein")
-    G.add_edge(drug, protein, relation="drug-protein")
-
-# Add Protein–Protein edges
-for _, row in filtered_protein_protein_df.iterrows():
-    p1, p2 = row["Gene 1"], row["Gene 2"]
-    G.add_node(p1, mode="protein")
-    G.add_node(p2, mode="protein")
-    G.add_edge(p1, p2, relation="protein-protein")
-
-drug_nodes = {n for n, d in G.nodes(data=True) if d["mode"] == "drug"}
-
-for _, row in drug_combo_df.iterrows():
-    d1, d2 = row["STITCH 1"], row["STITCH 2"]
-    # Add edge only if both drugs are already in the graph
-    if d1 in drug_nodes and d2 in drug_nodes:
-        G.add_edge(d1, d2, relation="drug-drug")
-
-
-drug_nodes = [n for n, d in G.nodes(data=True) if d["mode"] == "drug"]
-protein_nodes = [n for n, d in G.nodes(data=True) if d["mode"] == "protein"]
+offsets, num_nodes, edges = graph.flatten(["drug-protein", "protein-protein", "drug-drug"])
+num_drugs, num_proteins = graph.num_nodes("drug"), graph.num_nodes("protein")
 
 
+# Random points on a ring around (center_x, center_y)
 def cloud_positions(center_x, center_y, n_nodes, radius=2.0):
     angles = np.linspace(0, 2 * np.pi, n_nodes, endpoint=False)
-    positions = {}
-    for i, angle in enumerate(angles):
-        x = center_x + np.cos(angle) * radius * np.random.uniform(0.7, 1.2)
-        y = center_y + np.sin(angle) * radius * np.random.uniform(0.7, 1.2)
-        positions[i] = (x, y)
-    return positions
-
-drug_pos = cloud_positions(0, 2, len(drug_nodes), radius=2)
-protein_pos = cloud_positions(0, -2, len(protein_nodes), radius=2.5)
-
-pos = {drug: drug_pos[i] for i, drug in enumerate(drug_nodes)}
-pos.update({protein: protein_pos[i] for i, protein in enumerate(protein_nodes)})
-
-
-plt.figure(figsize=(10, 8))
-
-# Nodes
-nx.draw_networkx_nodes(G, pos, nodelist=drug_nodes, node_color="skyblue", node_shape="s", label="Drugs", node_size=600)
-nx.draw_networkx_nodes(G, pos, nodelist=protein_nodes, node_color="lightgreen", node_shape="o", label="Proteins", node_size=400)
-
-# Edges
-drug_protein_edges = [(u, v) for u, v, d in G.edges(data=True) if d["relation"] == "drug-protein"]
-protein_protein_edges = [(u, v) for u, v, d in G.edges(data=True) if d["relation"] == "protein-protein"]
-drug_drug_edges = [(u, v) for u, v, d in G.edges(data=True) if d["relation"] == "drug-drug"]
-
-nx.draw_networkx_edges(G, pos, edgelist=drug_protein_edges, edge_color="gray", alpha=0.7)
-nx.draw_networkx_edges(G, pos, edgelist=protein_protein_edges, edge_color="orange", style="dashed", alpha=0.8)
-nx.draw_networkx_edges(G, pos, edgelist=drug_drug_edges, edge_color="red", width=2.0, style="solid")
-
-# Labels
-nx.draw_networkx_labels(G, pos, font_size=8)
-
-plt.title("Drug–Protein–Protein–Combination Network", fontsize=12)
-plt.axis("off")
-plt.legend(scatterpoints=1)
-plt.tight_layout()
-plt.show()
+    spread = np.random.uniform(0.7, 1.2, (2, n_nodes))
+    return np.column_stack([center_x + np.cos(angles) * radius * spread[0],
+                            center_y + np.sin(angles) * radius * spread[1]])
+
+
+pos = np.zeros((num_nodes, 2))
+pos[offsets["drug"]:offsets["drug"] + num_drugs] = cloud_positions(0, 2, num_drugs, radius=2)
+pos[offsets["protein"]:offsets["protein"] + num_proteins] = cloud_positions(0, -2, num_proteins, radius=2.5)
+
+# Node labels only while they stay readable
+labels = {}
+if num_nodes <= args.max_labels:
+    for t in ("drug", "protein"):
+        labels.update({offsets[t] + i: str(x) for i, x in enumerate(graph.labels[t].tolist())})
+
+render(
+    pos,
+    node_groups=[
+        {"ids": offsets["drug"] + np.arange(num_drugs), "color": "skyblue", "marker": "s", "label": "Drugs", "size": 600},
+        {"ids": offsets["protein"] + np.arange(num_proteins), "color": "lightgreen", "marker": "o",
+         "label": "Proteins", "size": 400},
+    ],
+    edge_groups=[
+        {"rows": edges["drug-protein"][0], "cols": edges["drug-protein"][1], "color": "gray", "alpha": 0.7},
+        {"rows": edges["protein-protein"][0], "cols": edges["protein-protein"][1], "color": "orange",
+         "style": "dashed", "alpha": 0.8},
+        {"rows": edges["drug-drug"][0], "cols": edges["drug-drug"][1], "color": "red", "width": 2.0,
+         "alpha": 1.0, "sample": False},
+    ],
+    labels=labels,
+    title="Drug–Protein–Protein–Combination Network",
+    output=args.output, figsize=(10, 8), lod=args.lod, max_edges=args.max_edges,
+)
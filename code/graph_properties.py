@@ -0,0 +1,188 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+from decagon_data import PPI_PATH, load_ppi
+from edge_ingest import decode_pair_keys, unique_pairs
+
+# Wedges (paths u -> v -> w) checked per step of the triangle count
+WEDGE_CHUNK = 1 << 22
+
+
+# Simple undirected edges: self-loops dropped, one (low, high) copy per edge
+def simple_edges(n, rows, cols):
+    lo, hi = decode_pair_keys(unique_pairs(rows, cols, n), n)
+    keep = lo != hi
+    return lo[keep], hi[keep]
+
+
+# Edges oriented from lower to higher (degree, id) rank: every node keeps at
+# most sqrt(2m) out-neighbours, which bounds the wedges of the triangle count.
+# Returns the out-adjacency as CSR arrays and its sorted u * n + v keys.
+def _oriented(n, lo, hi, degree):
+    rank = np.empty(n, dtype=np.int64)
+    rank[np.lexsort((np.arange(n), degree))] = np.arange(n)
+    src = np.where(rank[lo] < rank[hi], lo, hi)
+    dst = np.where(rank[lo] < rank[hi], hi, lo)
+    keys = np.sort(src * n + dst)
+    src, dst = keys // n, keys % n
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(src, minlength=n))])
+    return src, dst, indptr, keys
+
+
+_state = {}
+
+
+def _init(n, src, dst, indptr, keys):
+    _state.update(n=n, src=src, dst=dst, indptr=indptr, keys=keys)
+
+
+# Per-node triangle counts of the oriented edges [start, stop): for every edge
+# u -> v each out-neighbour w of v closes a triangle when u -> w is an edge
+def _triangle_block(start, stop):
+    n, src, dst, indptr, keys = (_state[k] for k in ("n", "src", "dst", "indptr", "keys"))
+    counts = np.zeros(n, dtype=np.int64)
+    wedges = np.cumsum(indptr[dst[start:stop] + 1] - indptr[dst[start:stop]])
+    first = start
+    while first < stop:
+        done = wedges[first - start - 1] if first > start else 0
+        last = start + int(np.searchsorted(wedges, done + WEDGE_CHUNK, side="right"))
+        last = min(max(last, first + 1), stop)
+        u, v = src[first:last], dst[first:last]
+        out = indptr[v + 1] - indptr[v]
+        edge = np.repeat(np.arange(len(v)), out)
+        offset = np.arange(len(edge)) - np.repeat(np.cumsum(out) - out, out)
+        w = dst[indptr[v][edge] + offset]
+        probe = u[edge] * n + w
+        pos = np.minimum(np.searchsorted(keys, probe), len(keys) - 1)
+        hit = keys[pos] == probe
+        for nodes in (u[edge[hit]], v[edge[hit]], w[hit]):
+            counts += np.bincount(nodes, minlength=n)
+        first = last
+    return counts
+
+
+# Triangles through every node of a simple graph (edges from simple_edges),
+# counted on `workers` processes (None = all cores)
+def triangles(n, lo, hi, workers=None):
+    degree = np.bincount(np.concatenate([lo, hi]), minlength=n)
+    src, dst, indptr, keys = _oriented(n, np.asarray(lo, dtype=np.int64), np.asarray(hi, dtype=np.int64), degree)
+    init_args = (n, src, dst, indptr, keys)
+    _init(*init_args)
+
+    # edge blocks of about equal wedge counts
+    wedges = np.cumsum(indptr[dst + 1] - indptr[dst])
+    total = int(wedges[-1]) if len(wedges) else 0
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or total <= WEDGE_CHUNK:
+        return _triangle_block(0, len(src))
+    bounds = np.searchsorted(wedges, np.linspace(0, total, 4 * workers + 1)[1:-1])
+    bounds = np.unique(np.concatenate([[0], bounds, [len(src)]]))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=init_args) as pool:
+        return sum(pool.map(_triangle_block, bounds[:-1], bounds[1:]))
+
+
+# Local clustering coefficient of every node (0 below degree 2), as in nx.clustering
+def clustering(n, lo, hi, workers=None, tri=None):
+    degree = np.bincount(np.concatenate([lo, hi]), minlength=n)
+    tri = triangles(n, lo, hi, workers) if tri is None else tri
+    pairs = degree * (degree - 1) / 2
+    return np.divide(tri, pairs, out=np.zeros(n), where=pairs > 0)
+
+
+# Degree assortativity: Pearson correlation of the degrees at both ends of
+# every edge, each edge taken in both directions (nx.degree_assortativity_coefficient)
+def assortativity(degree, lo, hi):
+    x = np.concatenate([degree[lo], degree[hi]]).astype(float)
+    y = np.concatenate([degree[hi], degree[lo]]).astype(float)
+    if len(x) < 2 or x.std() == 0:
+        return None
+    return float(np.corrcoef(x, y)[0, 1])
+
+
+# Global properties of the undirected graph on nodes 0..n-1 given by int edge
+# arrays; self-loops and repeated edges are dropped
+def graph_properties(n, rows, cols, workers=None):
+    rows, cols = np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)
+    lo, hi = simple_edges(n, rows, cols)
+    m = len(lo)
+    degree = np.bincount(np.concatenate([lo, hi]), minlength=n)
+    tri = triangles(n, lo, hi, workers)
+    local = clustering(n, lo, hi, tri=tri)
+    connected_triples = (degree * (degree - 1) // 2).sum()
+
+    A = sp.csr_matrix((np.ones(m, dtype=np.int8), (lo, hi)), shape=(n, n))
+    num_components, component = connected_components(A, directed=False)
+    sizes = np.sort(np.bincount(component))[::-1]
+    values, counts = np.unique(degree, return_counts=True)
+    return {
+        "nodes": int(n),
+        "edges": int(m),
+        "input_edges": int(len(rows)),
+        "self_loops": int((rows == cols).sum()),
+        "density": 2 * m / (n * (n - 1)) if n > 1 else 0.0,
+        "average_degree": 2 * m / n if n else 0.0,
+        "highest_degree": int(degree.max()) if n else 0,
+        "median_degree": float(np.median(degree)) if n else 0.0,
+        "triangles": int(tri.sum() // 3),
+        "average_clustering": float(local.mean()) if n else 0.0,
+        "transitivity": float(tri.sum() / connected_triples) if connected_triples else 0.0,
+        "degree_assortativity": assortativity(degree, lo, hi),
+        "connected_components": int(num_components),
+        "largest_component": int(sizes[0]) if n else 0,
+        "isolated_nodes": int((degree == 0).sum()),
+        "degree_distribution": {"degree": values.tolist(), "count": counts.tolist()},
+    }
+
+
+# Properties of the PPI network, nodes being the genes of the edge list
+def ppi_properties(ppi_path=PPI_PATH, workers=None):
+    ppi = load_ppi(ppi_path)
+    genes, codes = np.unique(np.concatenate([ppi["gene1"], ppi["gene2"]]), return_inverse=True)
+    rows, cols = codes.reshape(2, -1)
+    return graph_properties(len(genes), rows, cols, workers)
+
+
+# JSON report, plus the two plain-text files of results/ when paths are given
+def write_report(report, json_path, text_path=None, degdist_path=None):
+    with open(json_path, "w") as f:
+        json.dump(report, f, indent=2)
+    if text_path:
+        with open(text_path, "w") as f:
+            f.write(f"Number of nodes: {report['nodes']}\n")
+            f.write(f"Number of edges: {report['edges']}\n")
+            f.write(f"Density: {report['density']}\n")
+            f.write(f"Average degree: {report['average_degree']}\n")
+            f.write(f"Highest degree: {report['highest_degree']}\n")
+            f.write(f"Clustering coefficient: {report['average_clustering']}\n")
+    if degdist_path:
+        dist = report["degree_distribution"]
+        with open(degdist_path, "w") as f:
+            f.writelines(f"{d} {c}\n" for d, c in zip(dist["degree"], dist["count"]))
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Global graph properties of the PPI network")
+    parser.add_argument("--ppi", default=PPI_PATH)
+    parser.add_argument("--output", default="results/properties_bio_decagon.json")
+    parser.add_argument("--text", action="store_true",
+                        help="also write results/properties_bio_decagon.txt and degdist_bio_decagon.txt")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (0 = all cores)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    report = ppi_properties(args.ppi, args.workers or None)
+    folder = os.path.dirname(args.output)
+    write_report(report, args.output,
+                 os.path.join(folder, "properties_bio_decagon.txt") if args.text else None,
+                 os.path.join(folder, "degdist_bio_decagon.txt") if args.text else None)
+    for name, value in report.items():
+        if name != "degree_distribution":
+            print(f"{name}: {value}")
+    print(f"\n✅ Report saved to: {args.output} ({time.perf_counter() - start:.1f}s)")
@@ -0,0 +1,218 @@
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba
+from matplotlib.lines import Line2D
+from profiling import count, profiled
+
+# Grid points per side of the repulsion field (capped)
+LAYOUT_GRID = 256
+
+# Above this many edges the default level of detail draws sampled-group edges
+# as a density image instead of individual lines
+MAX_LINES = 100000
+
+# Most points sampled along one edge for the density image, and edges
+# sampled per step
+DENSITY_SAMPLES = 256
+DENSITY_CHUNK = 1 << 16
+
+
+# Linear (cloud-in-cell) weights of points on a g x g grid spanning [lo, lo + span]
+def _cic(pos, lo, span, g):
+    x = (pos - lo) / span * (g - 1)
+    i0 = np.minimum(np.floor(x).astype(np.int64), g - 2)
+    f = x - i0
+    corners = []
+    for dx in (0, 1):
+        for dy in (0, 1):
+            w = (f[:, 0] if dx else 1 - f[:, 0]) * (f[:, 1] if dy else 1 - f[:, 1])
+            corners.append(((i0[:, 0] + dx) * g + i0[:, 1] + dy, w))
+    return corners
+
+
+# Fourier transform of the repulsion kernel r / |r|^2 on a g x g grid with unit
+# spacing, zero-padded to 2g x 2g for a linear (non-periodic) convolution
+def _repulsion_kernel(g):
+    off = np.arange(2 * g)
+    off = np.where(off < g, off, off - 2 * g).astype(float)
+    dx, dy = np.meshgrid(off, off, indexing="ij")
+    d2 = dx * dx + dy * dy + 0.25
+    kx, ky = dx / d2, dy / d2
+    kx[0, 0] = ky[0, 0] = 0
+    return np.fft.rfft2(kx), np.fft.rfft2(ky)
+
+
+# Fruchterman-Reingold force layout over edge arrays (node ids 0..n-1).
+# Repulsion is computed particle-mesh style, the grid counterpart of
+# Barnes-Hut: node masses are spread on a grid, the field of all masses is one
+# FFT convolution with the k^2 r / |r|^2 kernel, and every node reads the field
+# back at its position. One iteration costs O(n + edges + g^2 log g) instead
+# of O(n^2). `init` (n, 2) warm-starts the layout; positions are scaled to [0, 1].
+@profiled("layout")
+def force_layout(n, rows, cols, iterations=50, seed=42, grid=None, init=None):
+    rng = np.random.default_rng(seed)
+    pos = rng.random((n, 2)) if init is None else np.array(init, dtype=float)
+    if n <= 1:
+        return pos
+    rows, cols = np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)
+    keep = rows != cols
+    rows, cols = rows[keep], cols[keep]
+    g = grid or int(np.clip(2 * np.sqrt(n), 16, LAYOUT_GRID))
+    kx, ky = _repulsion_kernel(g)
+    k = 1 / np.sqrt(n)
+    t = 0.1 if init is None else 0.02
+    dt = t / (iterations + 1)
+
+    for _ in range(iterations):
+        lo = pos.min(axis=0)
+        span = (pos.max(axis=0) - lo).max() + 1e-12
+        corners = _cic(pos, lo, span, g)
+        mass = np.zeros((2 * g, 2 * g))
+        mass[:g, :g] = sum(np.bincount(idx, w, g * g) for idx, w in corners).reshape(g, g)
+        spectrum = np.fft.rfft2(mass)
+        # the unit-spacing kernel scales as 1 / spacing
+        scale = k * k * (g - 1) / span
+        fx = np.fft.irfft2(spectrum * kx, mass.shape)[:g, :g].ravel() * scale
+        fy = np.fft.irfft2(spectrum * ky, mass.shape)[:g, :g].ravel() * scale
+        disp = np.column_stack([sum(fx[idx] * w for idx, w in corners), sum(fy[idx] * w for idx, w in corners)])
+
+        # attraction d^2 / k along every edge
+        delta = pos[rows] - pos[cols]
+        force = delta * np.sqrt((delta ** 2).sum(axis=1))[:, None] / k
+        for axis in (0, 1):
+            disp[:, axis] -= np.bincount(rows, force[:, axis], n) - np.bincount(cols, force[:, axis], n)
+
+        length = np.sqrt((disp ** 2).sum(axis=1))
+        pos += disp * (np.minimum(length, t) / np.maximum(length, 1e-12))[:, None]
+        t -= dt
+
+    pos -= pos.min(axis=0)
+    return pos / max(pos.max(), 1e-12)
+
+
+# Uniform sample of at most `max_edges` of the sampled edge groups; groups
+# with sample=False (e.g. the few drug-drug edges of interest) are always kept
+def sample_edges(edge_groups, max_edges, seed=0):
+    if max_edges is None:
+        return edge_groups
+    fixed = sum(len(g["rows"]) for g in edge_groups if not g.get("sample", True))
+    pool = sum(len(g["rows"]) for g in edge_groups if g.get("sample", True))
+    if pool + fixed <= max_edges:
+        return edge_groups
+    rng = np.random.default_rng(seed)
+    fraction = max(0, max_edges - fixed) / pool
+    out = []
+    for g in edge_groups:
+        if g.get("sample", True):
+            take = np.flatnonzero(rng.random(len(g["rows"])) < fraction)
+            g = {**g, "rows": np.asarray(g["rows"])[take], "cols": np.asarray(g["cols"])[take]}
+        out.append(g)
+    return out
+
+
+# Edge density image of one edge group: every edge is sampled about once per
+# pixel of its length (at most DENSITY_SAMPLES times) and the samples are
+# binned on a pixels x pixels grid over `extent`. Returned as RGBA in the
+# group colour with a log-scaled alpha.
+def edge_density(pos, rows, cols, color, extent, pixels=1000, alpha=0.7):
+    (x0, x1), (y0, y1) = extent
+    size = np.array([x1 - x0, y1 - y0])
+    a = (pos[np.asarray(rows, dtype=np.int64)] - (x0, y0)) / size * pixels
+    b = (pos[np.asarray(cols, dtype=np.int64)] - (x0, y0)) / size * pixels
+    counts = np.clip(np.ceil(np.abs(b - a).max(axis=1)), 1, DENSITY_SAMPLES).astype(np.int64)
+    image = np.zeros(pixels * pixels)
+    for start in range(0, len(a), DENSITY_CHUNK):
+        c = counts[start:start + DENSITY_CHUNK]
+        edge = np.repeat(np.arange(len(c)), c)
+        first = np.cumsum(c) - c
+        frac = (np.arange(len(edge)) - first[edge] + 0.5) / c[edge]
+        p = a[start:start + DENSITY_CHUNK][edge] + (b - a)[start:start + DENSITY_CHUNK][edge] * frac[:, None]
+        ix = np.clip(p[:, 0].astype(np.int64), 0, pixels - 1)
+        iy = np.clip(p[:, 1].astype(np.int64), 0, pixels - 1)
+        image += np.bincount(iy * pixels + ix, minlength=pixels * pixels)
+    image = np.log1p(image)
+    rgba = np.zeros((pixels * pixels, 4))
+    rgba[:, :3] = to_rgba(color)[:3]
+    rgba[:, 3] = alpha * image / max(image.max(), 1e-12)
+    return rgba.reshape(pixels, pixels, 4)
+
+
+# Draw a graph from arrays: `pos` (n, 2), `node_groups` as dicts with ids,
+# color, marker, size and label, `edge_groups` as dicts with rows, cols,
+# color, width, alpha, style, label and sample (False for small groups that
+# must always be drawn as lines). Edges drawn as lines go into one
+# LineCollection. Level of detail for the sampled groups:
+#   "lines"   - every edge as a line
+#   "sample"  - a uniform sample of max_edges edges as lines
+#   "density" - an edge density image
+#   "auto"    - lines up to max_edges edges, density above
+# With `output` the figure is written headless (format from the extension:
+# .png, .svg, .pdf) instead of being shown.
+@profiled("render")
+def render(pos, node_groups, edge_groups, title=None, labels=None, output=None, figsize=(12, 10),
+           lod="auto", max_edges=MAX_LINES, seed=0, dpi=150):
+    if output:
+        plt.switch_backend("Agg")
+    total = sum(len(g["rows"]) for g in edge_groups)
+    count("edges rendered", total)
+    if lod == "auto":
+        lod = "lines" if total <= max_edges else "density"
+    if lod == "sample":
+        edge_groups = sample_edges(edge_groups, max_edges, seed)
+    dense = [g for g in edge_groups if lod == "density" and g.get("sample", True)]
+    line_groups = [g for g in edge_groups if not (lod == "density" and g.get("sample", True))]
+    n_nodes = sum(len(g["ids"]) for g in node_groups)
+    scale = min(1.0, 1000 / max(n_nodes, 1))
+
+    fig, ax = plt.subplots(figsize=figsize)
+    handles = []
+    if dense:
+        drawn = pos[np.concatenate([np.asarray(g["ids"], dtype=np.int64) for g in node_groups])]
+        margin = 0.02 * max(np.ptp(drawn[:, 0]), np.ptp(drawn[:, 1]), 1e-12)
+        extent = ((drawn[:, 0].min() - margin, drawn[:, 0].max() + margin),
+                  (drawn[:, 1].min() - margin, drawn[:, 1].max() + margin))
+        for g in dense:
+            image = edge_density(pos, g["rows"], g["cols"], g.get("color", "gray"), extent,
+                                 alpha=g.get("alpha", 0.7))
+            ax.imshow(image, origin="lower", extent=(*extent[0], *extent[1]), aspect="auto",
+                      interpolation="bilinear", zorder=0)
+
+    segments, colors, widths = [], [], []
+    for g in line_groups:
+        rows, cols = np.asarray(g["rows"], dtype=np.int64), np.asarray(g["cols"], dtype=np.int64)
+        segments.append(np.stack([pos[rows], pos[cols]], axis=1))
+        colors.append(np.tile(to_rgba(g.get("color", "gray"), g.get("alpha", 0.7)), (len(rows), 1)))
+        widths.append(np.full(len(rows), g.get("width", 1.0)))
+    if segments:
+        # one linestyle for the whole collection when the groups agree
+        styles = [g.get("style", "solid") for g in line_groups]
+        if len(set(styles)) > 1:
+            styles = np.repeat(styles, [len(g["rows"]) for g in line_groups]).tolist()
+        ax.add_collection(LineCollection(np.concatenate(segments), colors=np.concatenate(colors),
+                                         linewidths=np.concatenate(widths), linestyles=styles, zorder=1))
+    for g in edge_groups:
+        if g.get("label"):
+            handles.append(Line2D([], [], color=g.get("color", "gray"), linewidth=g.get("width", 1.0),
+                                  linestyle=g.get("style", "solid"), label=g["label"]))
+
+    for g in node_groups:
+        ids = np.asarray(g["ids"], dtype=np.int64)
+        ax.scatter(pos[ids, 0], pos[ids, 1], c=g.get("color", "gray"), marker=g.get("marker", "o"),
+                   s=g.get("size", 300) * scale, label=g.get("label"), zorder=2, edgecolors="none")
+    for i, text in (labels or {}).items():
+        ax.annotate(text, pos[i], fontsize=8, ha="center", va="center", zorder=3)
+
+    node_handles, _ = ax.get_legend_handles_labels()
+    ax.legend(handles=node_handles + handles, scatterpoints=1)
+    if title:
+        ax.set_title(title)
+    ax.axis("off")
+    ax.autoscale_view()
+    fig.tight_layout()
+    if output:
+        fig.savefig(output, dpi=dpi)
+        plt.close(fig)
+        print(f"✅ Figure saved to: {output}")
+    else:
+        plt.show()
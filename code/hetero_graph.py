@@ -0,0 +1,203 @@
+import numpy as np
+import networkx as nx
+from decagon_data import COMBO_PATH, PPI_PATH, TARGETS_PATH, load_combo, load_ppi, load_targets, recode
+from edge_ingest import decode_pair_keys, unique_pairs
+
+
+# Flattened contents of several CSR rows: indices[indptr[r]:indptr[r + 1]] for r in rows
+def gather_rows(indptr, indices, rows):
+    starts = indptr[rows]
+    counts = indptr[np.asarray(rows) + 1] - starts
+    if counts.sum() == 0:
+        return indices[:0]
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    return indices[offsets + np.arange(counts.sum())]
+
+
+# Typed heterogeneous graph stored as arrays. Every node type has its own
+# integer ids 0..n-1 and a label array; every relation is an edge list
+# (src, dst) between two node types, with optional per-edge arrays, and a
+# CSR adjacency built on first use.
+class HeteroGraph:
+
+    def __init__(self):
+        self.labels = {}
+        self.relations = {}
+        self._sorted = {}
+        self._csr = {}
+
+    def add_nodes(self, node_type, labels):
+        labels = np.asarray(labels)
+        self.labels[node_type] = labels
+        self._sorted[node_type] = np.argsort(labels, kind="stable")
+
+    def num_nodes(self, node_type):
+        return len(self.labels[node_type])
+
+    # Node ids of the given labels (-1 when missing). Labels and vocabulary are
+    # compared in a common dtype, never truncated to the vocabulary's width;
+    # strings against numbers are compared as strings.
+    def index(self, node_type, labels):
+        order = self._sorted[node_type]
+        vocab = self.labels[node_type][order]
+        labels = np.asarray(labels)
+        if labels.dtype == object:
+            labels = np.array(labels.tolist())
+        if (vocab.dtype.kind in "US") != (labels.dtype.kind in "US"):
+            vocab, labels = vocab.astype(str), labels.astype(str)
+            resort = np.argsort(vocab, kind="stable")
+            order, vocab = order[resort], vocab[resort]
+        else:
+            dtype = np.result_type(vocab, labels)
+            vocab, labels = vocab.astype(dtype, copy=False), labels.astype(dtype, copy=False)
+        pos = recode(np.arange(len(labels)), labels, vocab)
+        return np.where(pos >= 0, order[pos], -1)
+
+    def add_edges(self, name, src_type, dst_type, src, dst, symmetric=False, **data):
+        self.relations[name] = {
+            "src_type": src_type, "dst_type": dst_type, "symmetric": symmetric,
+            "src": np.asarray(src, dtype=np.int32), "dst": np.asarray(dst, dtype=np.int32),
+            "data": {k: np.asarray(v) for k, v in data.items()},
+        }
+        self._csr = {k: v for k, v in self._csr.items() if k[0] != name}
+
+    def num_edges(self, name):
+        return len(self.relations[name]["src"])
+
+    # (indptr, neighbors, edge ids). reverse=True walks dst -> src; symmetric
+    # relations list every edge in both directions.
+    def csr(self, name, reverse=False):
+        key = (name, reverse)
+        if key not in self._csr:
+            rel = self.relations[name]
+            src, dst = (rel["dst"], rel["src"]) if reverse else (rel["src"], rel["dst"])
+            eids = np.arange(len(src), dtype=np.int64)
+            if rel["symmetric"]:
+                src, dst = np.concatenate([src, dst]), np.concatenate([dst, src])
+                eids = np.concatenate([eids, eids])
+            n = self.num_nodes(rel["dst_type"] if reverse else rel["src_type"])
+            order = np.argsort(src, kind="stable")
+            indptr = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+            self._csr[key] = (indptr, dst[order], eids[order])
+        return self._csr[key]
+
+    def neighbors(self, name, node, reverse=False):
+        indptr, indices, _ = self.csr(name, reverse)
+        return indices[indptr[node]:indptr[node + 1]]
+
+    # Distinct neighbors of a set of nodes
+    def neighbors_of(self, name, nodes, reverse=False):
+        indptr, indices, _ = self.csr(name, reverse)
+        return np.unique(gather_rows(indptr, indices, np.asarray(nodes)))
+
+    def degree(self, name, reverse=False):
+        indptr, _, _ = self.csr(name, reverse)
+        return np.diff(indptr)
+
+    # Induced subgraph on the kept nodes: `keep` maps node types to boolean
+    # masks or id arrays; types not listed keep all their nodes
+    def subgraph(self, keep):
+        masks = {}
+        for t in self.labels:
+            if t not in keep:
+                masks[t] = np.ones(self.num_nodes(t), dtype=bool)
+            else:
+                k = np.asarray(keep[t])
+                if k.dtype != bool:
+                    m = np.zeros(self.num_nodes(t), dtype=bool)
+                    m[k] = True
+                    k = m
+                masks[t] = k
+
+        sub = HeteroGraph()
+        new_ids = {}
+        for t, m in masks.items():
+            sub.add_nodes(t, self.labels[t][m])
+            new_ids[t] = np.cumsum(m) - 1
+        for name, rel in self.relations.items():
+            ok = masks[rel["src_type"]][rel["src"]] & masks[rel["dst_type"]][rel["dst"]]
+            sub.add_edges(name, rel["src_type"], rel["dst_type"],
+                          new_ids[rel["src_type"]][rel["src"][ok]], new_ids[rel["dst_type"]][rel["dst"][ok]],
+                          rel["symmetric"], **{k: v[ok] for k, v in rel["data"].items()})
+        return sub
+
+    # Drop nodes that have no edge in any relation
+    def without_isolated(self):
+        used = {t: np.zeros(self.num_nodes(t), dtype=bool) for t in self.labels}
+        for rel in self.relations.values():
+            used[rel["src_type"]][rel["src"]] = True
+            used[rel["dst_type"]][rel["dst"]] = True
+        return self.subgraph(used)
+
+    def nbytes(self):
+        total = sum(a.nbytes for a in self.labels.values())
+        for rel in self.relations.values():
+            total += rel["src"].nbytes + rel["dst"].nbytes + sum(v.nbytes for v in rel["data"].values())
+        return total
+
+    # One id space over all node types (types in insertion order) and the
+    # distinct undirected edges of each relation on it, as (lo, hi) arrays.
+    # Same node and edge sets as to_networkx, without building the nx graph.
+    def flatten(self, relations=None):
+        offsets, n = {}, 0
+        for t in self.labels:
+            offsets[t] = n
+            n += self.num_nodes(t)
+        edges = {}
+        for name in relations or self.relations:
+            rel = self.relations[name]
+            src = rel["src"].astype(np.int64) + offsets[rel["src_type"]]
+            dst = rel["dst"].astype(np.int64) + offsets[rel["dst_type"]]
+            edges[name] = decode_pair_keys(unique_pairs(src, dst, n), n)
+        return offsets, n, edges
+
+    # networkx copy for the plotting code. Nodes are keyed by their labels
+    # (converted with `label`), carry `node_attr` = node type, and edges carry
+    # `edge_attr` = relation name plus the relation's per-edge arrays. Parallel
+    # edges of a relation collapse (the last one's attributes win).
+    def to_networkx(self, node_attr="type", edge_attr="type", label=None, relations=None):
+        names = {t: (self.labels[t].tolist() if label is None else [label(x) for x in self.labels[t].tolist()])
+                 for t in self.labels}
+        G = nx.Graph()
+        for t, labels in names.items():
+            G.add_nodes_from(labels, **{node_attr: t})
+        for name in relations or self.relations:
+            rel = self.relations[name]
+            src, dst = names[rel["src_type"]], names[rel["dst_type"]]
+            if rel["data"]:
+                # per-edge arrays become edge attributes
+                keys = list(rel["data"])
+                values = zip(*(rel["data"][k].tolist() for k in keys))
+                G.add_edges_from((src[u], dst[v], {edge_attr: name, **dict(zip(keys, vals))})
+                                 for u, v, vals in zip(rel["src"].tolist(), rel["dst"].tolist(), values))
+            else:
+                G.add_edges_from(((src[u], dst[v]) for u, v in zip(rel["src"].tolist(), rel["dst"].tolist())),
+                                 **{edge_attr: name})
+        return G
+
+    # Drug / protein / effect graph of the Decagon files: drug-protein targets,
+    # symmetric protein-protein PPI edges and drug-drug combo edges with the
+    # side-effect id of every combo row
+    @classmethod
+    def from_decagon(cls, targets_path=TARGETS_PATH, ppi_path=PPI_PATH, combo_path=COMBO_PATH):
+        targets = load_targets(targets_path)
+        ppi = load_ppi(ppi_path)
+        combo = load_combo(combo_path) if combo_path else None
+
+        drugs = targets["drugs"] if combo is None else np.union1d(targets["drugs"], combo["drugs"])
+        proteins = np.unique(np.concatenate([targets["gene"], ppi["gene1"], ppi["gene2"]]))
+
+        G = cls()
+        G.add_nodes("drug", drugs)
+        G.add_nodes("protein", proteins)
+        G.add_edges("drug-protein", "drug", "protein",
+                    recode(targets["stitch"], targets["drugs"], drugs), np.searchsorted(proteins, targets["gene"]))
+        G.add_edges("protein-protein", "protein", "protein",
+                    np.searchsorted(proteins, ppi["gene1"]), np.searchsorted(proteins, ppi["gene2"]), symmetric=True)
+        if combo is not None:
+            G.add_nodes("effect", combo["effects"])
+            G.add_edges("drug-drug", "drug", "drug",
+                        recode(combo["stitch1"], combo["drugs"], drugs), recode(combo["stitch2"], combo["drugs"], drugs),
+                        symmetric=True, effect=combo["effect"])
+        return G
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import networkx as nx
+from decagon_data import CACHE_DIR
+from profiling import profiled
+
+LAYOUT_DIR = os.path.join("csv", CACHE_DIR, "layouts")
+
+# Iterations of a warm-started layout, previous layouts tried as a warm start,
+# smallest share of nodes a previous layout must already place, and layouts
+# kept per parameter set
+WARM_ITERATIONS = 15
+CANDIDATES = 8
+MIN_OVERLAP = 0.5
+KEEP = 32
+
+
+# Canonical digest of a graph given as node labels and (rows, cols) edge
+# arrays: independent of node order, edge order and edge direction
+def graph_digest(keys, rows, cols):
+    order = np.argsort(keys, kind="stable")
+    rank = np.empty(len(keys), dtype=np.int64)
+    rank[order] = np.arange(len(keys))
+    r, c = rank[np.asarray(rows, dtype=np.int64)], rank[np.asarray(cols, dtype=np.int64)]
+    edges = np.unique(np.minimum(r, c) * len(keys) + np.maximum(r, c))
+    h = hashlib.blake2b(digest_size=16)
+    h.update("\n".join(keys[order].tolist()).encode())
+    h.update(edges.tobytes())
+    return h.hexdigest()
+
+
+def _params_digest(params):
+    return hashlib.blake2b(json.dumps(params, sort_keys=True).encode(), digest_size=8).hexdigest()
+
+
+# Starting positions from the most overlapping recent layout: known nodes keep
+# their place, new nodes start at the mean of their placed neighbours (or at a
+# random point of the old layout's box). None when nothing overlaps enough.
+def _warm_start(directory, keys, rows, cols, seed):
+    files = sorted((os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(".npz")),
+                   key=os.path.getmtime, reverse=True)[:CANDIDATES]
+    best = None
+    for path in files:
+        with np.load(path) as f:
+            old_keys, old_pos = f["keys"], f["pos"]
+        pos_of = dict(zip(old_keys.tolist(), old_pos))
+        known = np.array([k in pos_of for k in keys.tolist()], dtype=bool)
+        if best is None or known.sum() > best[0].sum():
+            best = known, pos_of
+    if best is None or not best[0].any() or best[0].sum() < MIN_OVERLAP * len(keys):
+        return None
+
+    known, pos_of = best
+    init = np.zeros((len(keys), 2))
+    init[known] = [pos_of[k] for k in keys[known].tolist()]
+    rows, cols = np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)
+    total, count = np.zeros((len(keys), 2)), np.zeros(len(keys))
+    for a, b in ((rows, cols), (cols, rows)):
+        m = known[b] & ~known[a]
+        np.add.at(total, a[m], init[b[m]])
+        np.add.at(count, a[m], 1)
+    rng = np.random.default_rng(seed)
+    lo, hi = init[known].min(axis=0), init[known].max(axis=0)
+    new = ~known
+    init[new] = np.where(count[new, None] > 0, total[new] / np.maximum(count[new], 1)[:, None],
+                         lo + rng.random((new.sum(), 2)) * (hi - lo))
+    # small jitter so new nodes sharing their neighbours do not coincide
+    init[new] += rng.normal(0, 1e-3 * max((hi - lo).max(), 1e-9), (new.sum(), 2))
+    return init
+
+
+# Positions of a graph from the layout cache. `keys` are unique string labels
+# of the nodes, `compute(init)` runs the layout (init is None for a cold start,
+# else warm-start positions). Layouts are stored per parameter set and graph
+# digest; a graph not seen before is warm-started from a recent layout with
+# the same parameters when enough of its nodes are already placed.
+@profiled("layout cache")
+def cached_layout(keys, rows, cols, compute, params, directory=LAYOUT_DIR, seed=0):
+    keys = np.asarray(keys, dtype=str)
+    directory = os.path.join(directory, _params_digest(params))
+    path = os.path.join(directory, graph_digest(keys, rows, cols) + ".npz")
+    if os.path.exists(path):
+        with np.load(path) as f:
+            cached_keys, pos = f["keys"], f["pos"]
+        if np.array_equal(cached_keys, keys):
+            os.utime(path)
+            return pos
+        # same graph, nodes listed in another order
+        pos_of = dict(zip(cached_keys.tolist(), pos))
+        return np.array([pos_of[k] for k in keys.tolist()])
+
+    os.makedirs(directory, exist_ok=True)
+    init = _warm_start(directory, keys, rows, cols, seed)
+    pos = np.asarray(compute(init), dtype=float)
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, keys=keys, pos=pos)
+    os.replace(tmp, path)
+
+    files = sorted((os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(".npz")),
+                   key=os.path.getmtime, reverse=True)
+    for old in files[KEEP:]:
+        os.remove(old)
+    return pos
+
+
+# Cached drop-in for nx.spring_layout(G, k=k, seed=seed): the cold result is
+# exactly spring_layout's; warm starts run WARM_ITERATIONS from the seeded
+# positions
+def spring_layout(G, k=None, seed=42, iterations=50, directory=LAYOUT_DIR):
+    nodes = list(G.nodes)
+    keys = np.array([repr(n) for n in nodes], dtype=str)
+    index = {n: i for i, n in enumerate(nodes)}
+    edges = np.array([(index[u], index[v]) for u, v in G.edges], dtype=np.int64).reshape(-1, 2)
+
+    def compute(init):
+        if init is None:
+            pos = nx.spring_layout(G, k=k, seed=seed, iterations=iterations)
+        else:
+            pos = nx.spring_layout(G, k=k, seed=seed, iterations=WARM_ITERATIONS,
+                                   pos={n: init[i] for i, n in enumerate(nodes)})
+        return np.array([pos[n] for n in nodes]).reshape(-1, 2)
+
+    params = {"layout": "spring", "k": k, "seed": seed, "iterations": iterations}
+    pos = cached_layout(keys, edges[:, 0], edges[:, 1], compute, params, directory, seed)
+    return {n: pos[i] for i, n in enumerate(nodes)}
@@ -0,0 +1,243 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from decagon_data import COMBO_PATH, PPI_PATH, load_ppi, recode
+from drug_set_stats import combo_pairs
+from edge_ingest import pair_keys
+
+# PPI graph (CSR arrays) of every worker process
+_graph = {}
+
+
+# Simple undirected PPI graph as CSR arrays over the sorted PPI genes
+def ppi_graph(ppi_path=PPI_PATH):
+    ppi = load_ppi(ppi_path)
+    genes, codes = np.unique(np.concatenate([ppi["gene1"], ppi["gene2"]]), return_inverse=True)
+    rows, cols = codes.reshape(2, -1)
+    keep = rows != cols
+    n = len(genes)
+    A = sp.csr_matrix((np.ones(2 * keep.sum(), dtype=np.int8),
+                       (np.concatenate([rows[keep], cols[keep]]), np.concatenate([cols[keep], rows[keep]]))),
+                      shape=(n, n))
+    A.sum_duplicates()
+    return {"genes": genes, "indptr": A.indptr.astype(np.int64), "indices": A.indices.astype(np.int64)}
+
+
+def _init(graph):
+    _graph.update(graph)
+    # source node of every CSR entry, for the per-source dependency pass
+    _graph["src"] = np.repeat(np.arange(len(graph["indptr"]) - 1), np.diff(graph["indptr"]))
+
+
+# Hop distance of every node to the nearest of `sources` (-1 when unreachable):
+# level-synchronous BFS, each level expands the whole frontier at once
+def bfs(indptr, indices, sources):
+    dist = np.full(len(indptr) - 1, -1, dtype=np.int32)
+    frontier = np.unique(np.asarray(sources, dtype=np.int64))
+    dist[frontier] = 0
+    level = 0
+    while len(frontier):
+        level += 1
+        counts = indptr[frontier + 1] - indptr[frontier]
+        starts = np.repeat(indptr[frontier] - np.cumsum(counts) + counts, counts)
+        neighbours = indices[starts + np.arange(len(starts))]
+        frontier = np.unique(neighbours[dist[neighbours] < 0])
+        dist[frontier] = level
+    return dist
+
+
+def _distances_to(target_sets):
+    return np.stack([bfs(_graph["indptr"], _graph["indices"], t) for t in target_sets])
+
+
+# Target proximity of every pair of drugs, from one multi-source BFS per drug.
+# `drug_codes` / `genes` are drug-target rows; targets outside the PPI graph
+# are ignored. Returns (targets in the PPI per drug, shortest, closest) where
+#   shortest[i, j] = smallest distance between a target of i and one of j
+#   closest[i, j]  = mean distance of each target of i and of j to the nearest
+#                    target of the other drug (Menche et al. d_c)
+# Unreachable pairs are NaN.
+def target_proximity(drug_codes, genes, n_drugs, graph, workers=1):
+    genes = np.asarray(genes)
+    node = np.searchsorted(graph["genes"], genes)
+    node[node == len(graph["genes"])] = 0
+    in_ppi = graph["genes"][node] == genes
+    drug_codes, node = np.asarray(drug_codes)[in_ppi], node[in_ppi]
+    n = len(graph["genes"])
+    T = sp.csr_matrix((np.ones(len(node)), (drug_codes, node)), shape=(n_drugs, n))
+    T.data[:] = 1
+    target_sets = np.split(T.indices, T.indptr[1:-1])
+
+    if workers == 1:
+        _init(graph)
+        D = _distances_to(target_sets)
+    else:
+        batches = np.array_split(np.arange(n_drugs), max(1, min(n_drugs, 4 * (workers or os.cpu_count() or 1))))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=(graph,)) as pool:
+            D = np.concatenate(list(pool.map(_distances_to, [[target_sets[i] for i in b] for b in batches])))
+
+    # D[j, t]: distance of protein t to the targets of drug j
+    reach = (D >= 0).astype(float)
+    # S[j, i] = summed distances of i's targets to j, C[j, i] = how many reach j
+    S, C = (T @ np.where(D >= 0, D, 0).T).T, (T @ reach.T).T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        closest = (S + S.T) / (C + C.T)
+    shortest = np.full((n_drugs, n_drugs), np.nan)
+    for i, t in enumerate(target_sets):
+        if len(t):
+            d = np.where(D[:, t] >= 0, D[:, t], np.iinfo(np.int32).max).min(axis=1)
+            shortest[i] = np.where(d < np.iinfo(np.int32).max, d, np.nan)
+    closest[(C + C.T) == 0] = np.nan
+    return np.diff(T.indptr), shortest, closest
+
+
+# Proximity table of every drug pair of a drug-set file (STITCH, Gene rows),
+# flagged with whether the pair is a combination of the combo file
+def drug_set_proximity(path, ppi_path=PPI_PATH, combo_path=COMBO_PATH, workers=1):
+    df = pd.read_csv(path)
+    drugs, codes = np.unique(df["STITCH"].to_numpy(dtype=str), return_inverse=True)
+    num_targets, shortest, closest = target_proximity(codes, df["Gene"].to_numpy(), len(drugs),
+                                                      ppi_graph(ppi_path), workers)
+    i, j = np.triu_indices(len(drugs), 1)
+    combo_drugs, lo, hi = combo_pairs(combo_path)
+    mapping = recode(np.arange(len(combo_drugs)), combo_drugs, drugs)
+    both = (mapping[lo] >= 0) & (mapping[hi] >= 0)
+    combined = np.isin(pair_keys(i, j, len(drugs)), pair_keys(mapping[lo][both], mapping[hi][both], len(drugs)))
+    return pd.DataFrame({
+        "drug1": drugs[i], "drug2": drugs[j],
+        "targets1": num_targets[i], "targets2": num_targets[j],
+        "shortest": shortest[i, j], "closest": closest[i, j], "combined": combined,
+    })
+
+
+# Sources needed for an additive error `epsilon` with probability 1 - delta
+# (Hoeffding); with `nodes` the bound holds for all nodes at once
+def sample_size(epsilon, delta=0.05, nodes=1):
+    return math.ceil(math.log(2 * nodes / delta) / (2 * epsilon ** 2))
+
+
+# Brandes dependencies of one BFS source: distances and delta_s(v) of every node
+def _source_dependencies(s):
+    indptr, indices, src = _graph["indptr"], _graph["indices"], _graph["src"]
+    n = len(indptr) - 1
+    dist = bfs(indptr, indices, [s])
+    dag = (dist[src] >= 0) & (dist[indices] == dist[src] + 1)
+    u, v, level = src[dag], indices[dag], dist[src][dag]
+    order = np.argsort(level, kind="stable")
+    u, v, level = u[order], v[order], level[order]
+    bounds = np.searchsorted(level, np.arange(dist.max() + 1))
+
+    # shortest-path counts forward, level by level, then dependencies backward
+    sigma = np.zeros(n)
+    sigma[s] = 1
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        sigma += np.bincount(v[a:b], sigma[u[a:b]], n)
+    delta = np.zeros(n)
+    for a, b in zip(bounds[-2::-1], bounds[:0:-1]):
+        delta += np.bincount(u[a:b], sigma[u[a:b]] / sigma[v[a:b]] * (1 + delta[v[a:b]]), n)
+    # the source lies on none of its own paths
+    delta[s] = 0
+    return dist, delta
+
+
+# Summed dependencies, summed distances, reaching sources and the smallest
+# eccentricity over a batch of sources
+def _source_batch(sources):
+    n = len(_graph["indptr"]) - 1
+    dependency, distance, reached = np.zeros(n), np.zeros(n), np.zeros(n)
+    eccentricity = np.inf
+    for s in sources:
+        dist, delta = _source_dependencies(s)
+        dependency += delta
+        distance += np.maximum(dist, 0)
+        reached += dist > 0
+        if dist.max() > 0:
+            eccentricity = min(eccentricity, dist.max())
+    return dependency, distance, reached, eccentricity
+
+
+# Betweenness and closeness centrality estimated from `samples` BFS sources
+# drawn uniformly without replacement (exact with samples = n). Betweenness is
+# normalized as in networkx; closeness uses the Wasserman-Faust correction for
+# disconnected graphs as nx.closeness_centrality does. Error bounds hold per
+# node with probability 1 - delta: betweenness within +/- betweenness_error,
+# average distance to the other nodes within +/- distance_error (for a node
+# of the component holding the sources).
+def sampled_centrality(graph, samples, seed=0, delta=0.05, workers=1):
+    n = len(graph["genes"])
+    rng = np.random.default_rng(seed)
+    samples = min(samples, n)
+    sources = rng.choice(n, samples, replace=False)
+    if workers == 1:
+        _init(graph)
+        parts = [_source_batch(sources)]
+    else:
+        batches = np.array_split(sources, max(1, min(samples, 4 * (workers or os.cpu_count() or 1))))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=(graph,)) as pool:
+            parts = list(pool.map(_source_batch, batches))
+    dependency, distance, reached = (sum(p[i] for p in parts) for i in range(3))
+    eccentricity = min(p[3] for p in parts)
+
+    betweenness = dependency * n / (samples * max((n - 1) * (n - 2), 1))
+    # a node that is itself a source sees one source fewer
+    is_source = np.zeros(n, dtype=bool)
+    is_source[sources] = True
+    others = np.maximum(samples - is_source, 1)
+    reach = reached / others * (n - 1)
+    total = distance / others * (n - 1)
+    closeness = np.divide(reach * reach, total * (n - 1), out=np.zeros(n), where=total > 0)
+
+    bound = math.sqrt(math.log(2 / delta) / (2 * samples)) if samples < n else 0.0
+    return {
+        "genes": graph["genes"], "betweenness": betweenness, "closeness": closeness, "samples": samples,
+        "betweenness_error": bound * n / max(n - 1, 1),
+        # the diameter is at most twice any eccentricity
+        "distance_error": bound * 2 * eccentricity if eccentricity < np.inf else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Path-based metrics of the drug-protein network")
+    sub = parser.add_subparsers(dest="command", required=True)
+    prox = sub.add_parser("proximity", help="PPI distances between the targets of every drug pair of a drug set")
+    prox.add_argument("drug_set", help="drug-set CSV with STITCH,Gene rows (or the full targets file)")
+    prox.add_argument("--output", default="csv/drug_set_proximity.csv")
+    cent = sub.add_parser("centrality", help="sampled betweenness and closeness of the PPI proteins")
+    size = cent.add_mutually_exclusive_group()
+    size.add_argument("--samples", type=int, default=None, help="BFS sources (default: from --epsilon)")
+    size.add_argument("--epsilon", type=float, default=0.05, help="target betweenness error per node")
+    cent.add_argument("--delta", type=float, default=0.05, help="failure probability of the error bounds")
+    cent.add_argument("--seed", type=int, default=0)
+    cent.add_argument("--top", type=int, default=10)
+    cent.add_argument("--output", default="csv/ppi_centrality.csv")
+    for p in (prox, cent):
+        p.add_argument("--ppi", default=PPI_PATH)
+        p.add_argument("--workers", type=int, default=1, help="worker processes (0 = all cores)")
+    args = parser.parse_args()
+
+    if args.command == "proximity":
+        df = drug_set_proximity(args.drug_set, args.ppi, workers=args.workers or None)
+        df.to_csv(args.output, index=False)
+        print(f"✅ {len(df)} drug pairs saved to: {args.output}")
+        for combined, group in df.groupby("combined"):
+            label = "combined" if combined else "not combined"
+            print(f"{label}: {len(group)} pairs, mean shortest {group['shortest'].mean():.3f}, "
+                  f"mean closest {group['closest'].mean():.3f}")
+    else:
+        graph = ppi_graph(args.ppi)
+        samples = args.samples or sample_size(args.epsilon, args.delta)
+        result = sampled_centrality(graph, samples, args.seed, args.delta, args.workers or None)
+        df = pd.DataFrame({"gene": result["genes"], "betweenness": result["betweenness"],
+                           "closeness": result["closeness"]})
+        df.to_csv(args.output, index=False)
+        print(f"{result['samples']} sources over {len(df)} proteins: betweenness within "
+              f"±{result['betweenness_error']:.4f}, average distance within ±{result['distance_error']:.3f} "
+              f"(probability {1 - args.delta:.2f} per protein)")
+        print(df.nlargest(args.top, "betweenness").to_string(index=False))
+        print(f"\n✅ Centralities saved to: {args.output}")
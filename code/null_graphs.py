@@ -0,0 +1,180 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from decagon_data import COMBO_PATH, PPI_PATH, TARGETS_PATH, load_ppi, load_targets
+from drug_set_stats import all_drug_scores
+from edge_ingest import decode_pair_keys, pair_keys, unique_pairs
+from pair_scores import drug_protein_matrix, ppi_matrix, summarize_pairs
+
+
+# Canonical int64 key of undirected edges (low * n + high)
+def edge_keys(edges, n):
+    return pair_keys(edges[:, 0], edges[:, 1], n)
+
+
+# Simple undirected graph: no self-loops, one copy of every edge
+def simplify(edges, n):
+    lo, hi = decode_pair_keys(unique_pairs(edges[:, 0], edges[:, 1], n), n)
+    keep = lo != hi
+    return np.column_stack([lo[keep], hi[keep]]).astype(np.int32)
+
+
+def degrees(edges, n):
+    return np.bincount(edges.ravel(), minlength=n)
+
+
+# Erased configuration model: pair shuffled degree stubs, then drop self-loops
+# and multi-edges. Stubs of dropped edges are re-paired for a few rounds, so
+# the degree sequence is matched up to a small number of leftover stubs.
+def configuration_model(degree_sequence, rng, rounds=10):
+    n = len(degree_sequence)
+    stubs = np.repeat(np.arange(n, dtype=np.int64), degree_sequence)
+    if len(stubs) % 2:
+        stubs = stubs[:-1]
+    edges = np.empty((0, 2), dtype=np.int64)
+    for _ in range(rounds):
+        rng.shuffle(stubs)
+        proposed = np.concatenate([edges, stubs.reshape(-1, 2)])
+        keys = edge_keys(proposed, n)
+        _, first = np.unique(keys, return_index=True)
+        keep = np.zeros(len(proposed), dtype=bool)
+        keep[first] = True
+        keep &= proposed[:, 0] != proposed[:, 1]
+        edges = proposed[keep]
+        stubs = proposed[~keep].ravel()
+        if len(stubs) == 0:
+            break
+    return edges.astype(np.int32)
+
+
+# Degree-preserving randomization by double edge swaps, done in batches of
+# disjoint edge pairs: (a, b), (c, d) -> (a, d), (c, b) or (a, c), (b, d).
+# A swap is rejected when it would create a self-loop or an edge that
+# already exists (or is proposed twice in the same batch).
+def double_edge_swap(edges, n, n_swaps, rng, batch_size=None, max_batches=None):
+    edges = edges.astype(np.int64).copy()
+    m = len(edges)
+    if m < 2:
+        return edges.astype(np.int32), 0
+    batch_size = batch_size or max(1, m // 10)
+    max_batches = max_batches or 100 * (n_swaps // batch_size + 1)
+    keys = np.sort(edge_keys(edges, n))
+    done = 0
+    for _ in range(max_batches):
+        if done >= n_swaps:
+            break
+        b = min(batch_size, m // 2, n_swaps - done)
+        picked = rng.permutation(m)[:2 * b]
+        i, j = picked[:b], picked[b:]
+        a, bb = edges[i, 0], edges[i, 1]
+        c, d = edges[j, 0], edges[j, 1]
+        flip = rng.random(b) < 0.5
+        c, d = np.where(flip, d, c), np.where(flip, c, d)
+        new1 = np.column_stack([a, d])
+        new2 = np.column_stack([c, bb])
+
+        k1, k2 = edge_keys(new1, n), edge_keys(new2, n)
+        ok = (a != d) & (c != bb) & (k1 != k2)
+        pos1 = np.minimum(np.searchsorted(keys, k1), len(keys) - 1)
+        pos2 = np.minimum(np.searchsorted(keys, k2), len(keys) - 1)
+        ok &= (keys[pos1] != k1) & (keys[pos2] != k2)
+        proposed = np.concatenate([k1[ok], k2[ok]])
+        uniq, counts = np.unique(proposed, return_counts=True)
+        clash = np.isin(k1, uniq[counts > 1]) | np.isin(k2, uniq[counts > 1])
+        ok &= ~clash
+
+        edges[i[ok]] = new1[ok]
+        edges[j[ok]] = new2[ok]
+        keys = np.sort(edge_keys(edges, n))
+        done += int(ok.sum())
+    return edges.astype(np.int32), done
+
+
+# Null model state: PPI edges on dense protein ids, drug x protein incidence
+# and the side-effect pairs, so every copy only rebuilds A and B.A.B^T
+_state = {}
+
+
+def _init(edges, n, B, shared, side_rows, side_cols):
+    _state.update(edges=edges, n=n, B=B, shared=shared, side_rows=side_rows, side_cols=side_cols)
+
+
+def ppi_link_stats(edges, n, B, shared, side_rows, side_cols):
+    A = ppi_matrix(edges[:, 0], edges[:, 1], n)
+    Bt = B.T.tocsr()
+    ppi = (B @ A @ Bt).tocsr()
+    stats = summarize_pairs(shared, ppi, side_rows, side_cols)
+    return stats["avg_ppi_side_effect"], stats["avg_ppi_no_side_effect"]
+
+
+def _null_copy(model, swaps_per_edge, seed):
+    rng = np.random.default_rng(seed)
+    edges, n = _state["edges"], _state["n"]
+    if model == "configuration":
+        randomized = configuration_model(degrees(edges, n), rng)
+        swaps = 0
+    else:
+        randomized, swaps = double_edge_swap(edges, n, int(swaps_per_edge * len(edges)), rng)
+    side, none = ppi_link_stats(randomized, n, _state["B"], _state["shared"], _state["side_rows"], _state["side_cols"])
+    return {"edges": len(randomized), "swaps": swaps, "avg_ppi_side_effect": side, "avg_ppi_no_side_effect": none}
+
+
+def null_ppi_stats(copies, model="swap", swaps_per_edge=10, seed=0, workers=1,
+                   targets_path=TARGETS_PATH, combo_path=COMBO_PATH, ppi_path=PPI_PATH):
+    if copies < 1:
+        raise ValueError(f"need at least one null copy, got {copies}")
+    drugs, shared, _, side_rows, side_cols = all_drug_scores(targets_path, combo_path, ppi_path)
+    targets, raw = load_targets(targets_path), load_ppi(ppi_path)
+
+    # one protein id space for the whole PPI graph and the drug targets
+    proteins = np.unique(np.concatenate([raw["gene1"], raw["gene2"], targets["gene"]]))
+    n = len(proteins)
+    edges = simplify(np.column_stack([np.searchsorted(proteins, raw["gene1"]),
+                                      np.searchsorted(proteins, raw["gene2"])]), n)
+    B = drug_protein_matrix(targets["stitch"], np.searchsorted(proteins, targets["gene"]), len(drugs), n)
+    init_args = (edges, n, B, shared, side_rows, side_cols)
+    _init(*init_args)
+
+    # observed on the same simple graph (no self-loops) the null copies start from
+    observed = ppi_link_stats(edges, n, B, shared, side_rows, side_cols)
+    seeds = np.random.SeedSequence(seed).spawn(copies)
+    args = ([model] * copies, [swaps_per_edge] * copies, seeds)
+    if workers == 1:
+        rows = list(map(_null_copy, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=init_args) as pool:
+            rows = list(pool.map(_null_copy, *args))
+    return observed, pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    def positive_int(value):
+        if not value.isdigit() or int(value) < 1:
+            raise argparse.ArgumentTypeError(f"expected a positive integer, got {value!r}")
+        return int(value)
+
+    parser = argparse.ArgumentParser(description="Drug-pair PPI-link statistic on degree-preserving null PPI graphs")
+    parser.add_argument("--copies", type=positive_int, default=20)
+    parser.add_argument("--model", choices=["swap", "configuration"], default="swap")
+    parser.add_argument("--swaps-per-edge", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (0 = all cores)")
+    parser.add_argument("--output", default="csv/null_ppi_stats.csv")
+    args = parser.parse_args()
+
+    (obs_side, obs_none), null_df = null_ppi_stats(args.copies, args.model, args.swaps_per_edge,
+                                                   args.seed, args.workers or None)
+    null_df.to_csv(args.output, index=False)
+
+    diff = null_df["avg_ppi_side_effect"] - null_df["avg_ppi_no_side_effect"]
+    observed = obs_side - obs_none
+    p = ((diff >= observed).sum() + 1) / (len(diff) + 1)
+    print(f"=== PPI links on {args.copies} {args.model} null graphs ===")
+    print(f"Observed avg PPI (side-effect / no-side-effect): {obs_side:.4f} / {obs_none:.4f}")
+    print(f"Null avg PPI (side-effect / no-side-effect): "
+          f"{null_df['avg_ppi_side_effect'].mean():.4f} / {null_df['avg_ppi_no_side_effect'].mean():.4f}")
+    print(f"Observed difference: {observed:.4f}, null mean {diff.mean():.4f} ± {diff.std():.4f}, p (greater): {p:.4g}")
+    print(f"\n✅ Per-copy stats saved to: {args.output}")
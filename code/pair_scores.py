@@ -0,0 +1,85 @@
+import numpy as np
+import scipy.sparse as sp
+from edge_ingest import decode_pair_keys, unique_pairs
+from profiling import count, profiled
+
+
+# Drug x protein incidence matrix B (1 if the drug targets the protein)
+def drug_protein_matrix(drug_codes, protein_codes, n_drugs, n_proteins):
+    data = np.ones(len(drug_codes), dtype=np.int64)
+    B = sp.csr_matrix((data, (drug_codes, protein_codes)), shape=(n_drugs, n_proteins))
+    # duplicated drug-gene rows must count once, like the old python sets
+    B.data[:] = 1
+    return B
+
+
+# Symmetric protein x protein adjacency A, one entry per undirected PPI edge
+def ppi_matrix(gene1_codes, gene2_codes, n_proteins):
+    rows = np.concatenate([gene1_codes, gene2_codes])
+    cols = np.concatenate([gene2_codes, gene1_codes])
+    data = np.ones(len(rows), dtype=np.int64)
+    A = sp.csr_matrix((data, (rows, cols)), shape=(n_proteins, n_proteins))
+    A.data[:] = 1
+    return A
+
+
+# Shared-target counts B.B^T and PPI-link counts B.A.B^T for every drug pair
+@profiled("score")
+def pair_score_matrices(B, A):
+    Bt = B.T.tocsr()
+    shared = (B @ Bt).tocsr()
+    ppi = (B @ A @ Bt).tocsr()
+    count("drug pairs scored", B.shape[0] * (B.shape[0] - 1) // 2)
+    return shared, ppi
+
+
+# Build B and A from integer drug codes and gene ids, restricting the PPI to
+# proteins targeted by at least one drug
+@profiled("matrices")
+def build_matrices(drug_codes, n_drugs, gene_ids, ppi_gene1, ppi_gene2):
+    proteins = np.unique(gene_ids)
+    B = drug_protein_matrix(drug_codes, np.searchsorted(proteins, gene_ids), n_drugs, len(proteins))
+
+    g1 = np.searchsorted(proteins, ppi_gene1)
+    g2 = np.searchsorted(proteins, ppi_gene2)
+    g1[g1 == len(proteins)] = 0
+    g2[g2 == len(proteins)] = 0
+    keep = (proteins[g1] == ppi_gene1) & (proteins[g2] == ppi_gene2)
+    A = ppi_matrix(g1[keep], g2[keep], len(proteins))
+    return proteins, B, A
+
+
+# Canonical (row <= col) side-effect drug pairs, deduplicated. Negative codes
+# mark drugs outside the scored set and are dropped.
+def side_effect_pair_codes(n_drugs, codes1, codes2):
+    keep = (codes1 >= 0) & (codes2 >= 0)
+    return decode_pair_keys(unique_pairs(codes1[keep], codes2[keep], n_drugs), n_drugs)
+
+
+def _upper_sum(M):
+    return (int(M.sum()) - int(M.diagonal().sum())) // 2
+
+
+# Averages for side-effect vs no-side-effect pairs, read off the score matrices.
+# "No side effect" means every other unordered pair of distinct drugs.
+@profiled("summarize")
+def summarize_pairs(shared, ppi, side_rows, side_cols):
+    n = shared.shape[0]
+    side_shared = np.asarray(shared[side_rows, side_cols]).ravel()
+    side_ppi = np.asarray(ppi[side_rows, side_cols]).ravel()
+    off_diag = side_rows != side_cols
+
+    num_side = len(side_rows)
+    num_none = n * (n - 1) // 2 - int(off_diag.sum())
+
+    sum_shared_none = _upper_sum(shared) - int(side_shared[off_diag].sum())
+    sum_ppi_none = _upper_sum(ppi) - int(side_ppi[off_diag].sum())
+
+    return {
+        "num_side_effect_pairs": num_side,
+        "num_no_side_effect_pairs": num_none,
+        "avg_shared_proteins_side_effect": int(side_shared.sum()) / num_side if num_side else 0,
+        "avg_ppi_side_effect": int(side_ppi.sum()) / num_side if num_side else 0,
+        "avg_shared_proteins_no_side_effect": sum_shared_none / num_none if num_none else 0,
+        "avg_ppi_no_side_effect": sum_ppi_none / num_none if num_none else 0,
+    }
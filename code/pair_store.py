@@ -0,0 +1,154 @@
+import json
+import os
+
+import numpy as np
+import scipy.sparse as sp
+from decagon_data import (PPI_PATH, TARGETS_PATH, build_lock, cache_path, label_code, load_ppi, load_targets,
+                          publish_arrays, source_hash)
+from pair_scores import build_matrices, pair_score_matrices
+
+METRICS = ["shared", "ppi", "jaccard"]
+STORE_VERSION = 1
+
+_stores = {}
+
+
+# Position of the pair (i, j), i < j, in the packed upper triangle (row-major,
+# diagonal excluded): n * (n - 1) / 2 entries in total
+def pair_index(n, i, j):
+    i, j = np.minimum(i, j).astype(np.int64), np.maximum(i, j).astype(np.int64)
+    return i * n - i * (i + 1) // 2 + (j - i - 1)
+
+
+def _packed(M, n, dtype):
+    upper = sp.triu(M, k=1).tocoo()
+    out = np.zeros(n * (n - 1) // 2, dtype=dtype)
+    out[pair_index(n, upper.row, upper.col)] = upper.data
+    return out
+
+
+def _build_store(targets_path, ppi_path):
+    targets, ppi = load_targets(targets_path), load_ppi(ppi_path)
+    drugs = targets["drugs"]
+    n = len(drugs)
+    _, B, A = build_matrices(targets["stitch"], n, targets["gene"], ppi["gene1"], ppi["gene2"])
+    shared, ppi_links = pair_score_matrices(B, A)
+
+    target_counts = shared.diagonal().astype(np.int32)
+    packed_shared = _packed(shared, n, np.int32)
+    i, j = np.triu_indices(n, 1)
+    union = target_counts[i].astype(np.int64) + target_counts[j] - packed_shared
+    jaccard = np.divide(packed_shared, union, out=np.zeros(len(union), dtype=np.float32), where=union > 0)
+    return {
+        "drugs": drugs, "target_counts": target_counts, "ppi_self": ppi_links.diagonal().astype(np.int64),
+        "shared": packed_shared, "ppi": _packed(ppi_links, n, np.int64), "jaccard": jaccard.astype(np.float32),
+    }
+
+
+def _store_is_valid(directory, sources):
+    try:
+        with open(os.path.join(directory, "meta.json")) as f:
+            return json.load(f) == sources
+    except (OSError, ValueError):
+        return False
+
+
+# Shared targets, PPI links and target Jaccard of every drug pair of the targets
+# file, stored as packed upper triangles next to the targets cache. The store
+# is rebuilt when the targets or PPI file changes and is memory-mapped on load.
+def load_store(targets_path=TARGETS_PATH, ppi_path=PPI_PATH):
+    # validates (and if needed rebuilds) both source caches
+    load_targets(targets_path)
+    load_ppi(ppi_path)
+    directory = os.path.join(cache_path(targets_path), "pair_store",
+                             os.path.splitext(os.path.basename(ppi_path))[0])
+    sources = {"version": STORE_VERSION, "targets": source_hash(targets_path), "ppi": source_hash(ppi_path)}
+    key = os.path.abspath(directory)
+    if key in _stores and _stores[key]["sources"] == sources:
+        return _stores[key]
+
+    if not _store_is_valid(directory, sources):
+        with build_lock(directory):
+            # another process may have built it while we waited
+            if not _store_is_valid(directory, sources):
+                print(f"Building pair-score store for {targets_path} ...")
+                publish_arrays(directory, _build_store(targets_path, ppi_path), sources)
+
+    store = {name: np.load(os.path.join(directory, name + ".npy"), mmap_mode="r")
+             for name in ["drugs", "target_counts", "ppi_self"] + METRICS}
+    store["drugs"] = np.asarray(store["drugs"])
+    store["sources"] = sources
+    _stores[key] = store
+    return store
+
+
+def drug_code(store, drug):
+    if isinstance(drug, (int, np.integer)):
+        return int(drug)
+    code = label_code(store["drugs"], drug)
+    if code < 0:
+        raise KeyError(f"unknown drug {drug}")
+    return code
+
+
+# Score of the pair (a, b): one metric, or all of them as a dict.
+# Drugs are labels or codes; a drug paired with itself scores its own targets.
+def pair_score(store, a, b, metric=None):
+    i, j = drug_code(store, a), drug_code(store, b)
+    if i == j:
+        self_scores = {"shared": int(store["target_counts"][i]), "ppi": int(store["ppi_self"][i]),
+                       "jaccard": 1.0 if store["target_counts"][i] else 0.0}
+        return self_scores if metric is None else self_scores[metric]
+    k = pair_index(len(store["drugs"]), i, j)
+    if metric is None:
+        return {m: store[m][k].item() for m in METRICS}
+    return store[metric][k].item()
+
+
+# Every score of drug `drug` against all drugs (its own entry is 0)
+def scores_of(store, drug, metric="jaccard"):
+    n = len(store["drugs"])
+    i = drug_code(store, drug)
+    values = store[metric]
+    row = np.zeros(n, dtype=values.dtype)
+    start = pair_index(n, i, i + 1) if i + 1 < n else 0
+    row[i + 1:] = values[start:start + n - i - 1]
+    row[:i] = values[pair_index(n, np.arange(i), i)]
+    return row
+
+
+# The k drugs scoring highest against `drug`, best first: (labels, scores)
+def top_k(store, drug, k=10, metric="jaccard"):
+    i = drug_code(store, drug)
+    row = scores_of(store, i, metric)
+    candidates = np.delete(np.arange(len(row)), i)
+    k = min(k, len(candidates))
+    if k == 0:
+        return store["drugs"][:0], row[:0]
+    best = candidates[np.argpartition(row[candidates], len(candidates) - k)[len(candidates) - k:]]
+    best = best[np.lexsort((best, -row[best]))]
+    return store["drugs"][best], row[best]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Drug pair scores: shared targets, PPI links, target Jaccard")
+    parser.add_argument("--targets", default=TARGETS_PATH)
+    parser.add_argument("--ppi", default=PPI_PATH)
+    parser.add_argument("--pair", nargs=2, metavar=("DRUG1", "DRUG2"), help="scores of one drug pair")
+    parser.add_argument("--top", metavar="DRUG", help="drugs most similar to DRUG")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--metric", choices=METRICS, default="jaccard")
+    args = parser.parse_args()
+
+    store = load_store(args.targets, args.ppi)
+    print(f"{len(store['drugs'])} drugs, {len(store['shared'])} pairs in the store")
+    if args.pair:
+        scores = pair_score(store, *args.pair)
+        print(f"{args.pair[0]} / {args.pair[1]}: " + ", ".join(f"{m} {v}" for m, v in scores.items()))
+    if args.top:
+        labels, scores = top_k(store, args.top, args.k, args.metric)
+        print(f"\nTop {len(labels)} drugs by {args.metric} for {args.top}:")
+        for label, score in zip(labels.tolist(), scores.tolist()):
+            print(f"  {label}  {score:.4g}")
@@ -0,0 +1,165 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.stats import beta
+from drug_set_stats import all_drug_scores
+
+METRICS = ["shared_proteins", "ppi_links"]
+
+# Permutations per worker task
+BLOCK = 250
+
+# Per-process state for the permutation workers
+_state = {}
+
+
+# Scores of every unordered drug pair (i < j) as a (2, n_pairs) vector, plus
+# the side-effect label of each pair. Self-pairs are not part of the pair
+# universe and are left out of the test.
+def pair_score_vectors(shared, ppi, side_rows, side_cols):
+    n = shared.shape[0]
+    rows, cols = np.triu_indices(n, 1)
+    dense = [shared.toarray(), ppi.toarray()]
+    scores = np.stack([m[rows, cols] for m in dense]).astype(np.int64)
+    off_diag = side_rows != side_cols
+    labels = np.zeros((n, n), dtype=bool)
+    labels[side_rows[off_diag], side_cols[off_diag]] = True
+    return scores, labels[rows, cols], dense
+
+
+# Difference of means (side effect - no side effect) from the side-effect sums
+def _mean_difference(side_sums, k, totals, n_pairs):
+    return side_sums / k - (totals - side_sums) / (n_pairs - k)
+
+
+def _init(scores, k, dense, side_rows, side_cols):
+    _state.update(scores=scores, k=k, dense=dense, side_rows=side_rows, side_cols=side_cols)
+    _state["totals"] = scores.sum(axis=1)
+
+
+# Null statistics for a block of permutations. Only the sums over the
+# permuted "side effect" pairs are computed; the rest follows from the totals.
+def _null_block(mode, n_perm, seed):
+    rng = np.random.default_rng(seed)
+    scores, k, totals = _state["scores"], _state["k"], _state["totals"]
+    n_pairs = scores.shape[1]
+    out = np.empty((n_perm, len(METRICS)))
+    for p in range(n_perm):
+        if mode == "pairs":
+            # shuffle the pair labels: a random k-subset of all pairs
+            chosen = rng.choice(n_pairs, k, replace=False)
+            side_sums = scores[:, chosen].sum(axis=1)
+        else:
+            # shuffle the drug labels: same combo graph, permuted drugs
+            perm = rng.permutation(_state["dense"][0].shape[0])
+            r, c = perm[_state["side_rows"]], perm[_state["side_cols"]]
+            side_sums = np.array([m[r, c].sum() for m in _state["dense"]])
+        out[p] = _mean_difference(side_sums, k, totals, n_pairs)
+    return out
+
+
+# Percentile bootstrap of the observed difference, resampling both groups
+def bootstrap_ci(scores, labels, n_boot, level, seed):
+    rng = np.random.default_rng(seed)
+    side, none = scores[:, labels], scores[:, ~labels]
+    diffs = np.empty((n_boot, len(METRICS)))
+    for b in range(n_boot):
+        s = side[:, rng.integers(0, side.shape[1], side.shape[1])]
+        o = none[:, rng.integers(0, none.shape[1], none.shape[1])]
+        diffs[b] = s.mean(axis=1) - o.mean(axis=1)
+    alpha = (1 - level) / 2
+    return np.quantile(diffs, [alpha, 1 - alpha], axis=0)
+
+
+# Clopper-Pearson interval of a Monte Carlo p-value estimated from `hits`
+# exceedances out of `n_perm` permutations
+def p_value_ci(hits, n_perm, level):
+    alpha = 1 - level
+    lo = beta.ppf(alpha / 2, hits, n_perm - hits + 1) if hits > 0 else 0.0
+    hi = beta.ppf(1 - alpha / 2, hits + 1, n_perm - hits) if hits < n_perm else 1.0
+    return float(lo), float(hi)
+
+
+def permutation_test(shared, ppi, side_rows, side_cols, mode="pairs", n_perm=10000,
+                     n_boot=1000, level=0.95, seed=0, workers=1):
+    scores, labels, dense = pair_score_vectors(shared, ppi, side_rows, side_cols)
+    off_diag = side_rows != side_cols
+    side_rows, side_cols = side_rows[off_diag], side_cols[off_diag]
+    k, n_pairs = int(labels.sum()), scores.shape[1]
+    if n_perm < 1:
+        raise ValueError(f"need at least one permutation, got {n_perm}")
+    if k == 0 or k == n_pairs:
+        raise ValueError("need both side-effect and no-side-effect pairs")
+
+    init_args = (scores, k, dense, side_rows, side_cols)
+    _init(*init_args)
+    observed = _mean_difference(scores[:, labels].sum(axis=1), k, _state["totals"], n_pairs)
+
+    # fixed-size blocks with one seed stream each, so results do not depend on workers
+    blocks = np.array_split(np.arange(n_perm), max(1, -(-n_perm // BLOCK)))
+    seeds = np.random.SeedSequence(seed).spawn(len(blocks))
+    sizes = [len(b) for b in blocks]
+    if workers == 1:
+        null = [_null_block(mode, n, s) for n, s in zip(sizes, seeds)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=init_args) as pool:
+            null = list(pool.map(_null_block, [mode] * len(sizes), sizes, seeds))
+    null = np.concatenate(null)
+
+    ci = bootstrap_ci(scores, labels, n_boot, level, seed + 1) if n_boot else None
+    report = {"mode": mode, "permutations": n_perm, "side_effect_pairs": k,
+              "no_side_effect_pairs": n_pairs - k, "metrics": {}}
+    for m, name in enumerate(METRICS):
+        hits_two = int((np.abs(null[:, m]) >= abs(observed[m])).sum())
+        hits_greater = int((null[:, m] >= observed[m]).sum())
+        report["metrics"][name] = {
+            "mean_side_effect": float(scores[m, labels].mean()),
+            "mean_no_side_effect": float(scores[m, ~labels].mean()),
+            "observed_difference": float(observed[m]),
+            "p_value_two_sided": (hits_two + 1) / (n_perm + 1),
+            "p_value_greater": (hits_greater + 1) / (n_perm + 1),
+            "p_value_ci": p_value_ci(hits_two, n_perm, level),
+            "null_interval": np.quantile(null[:, m], [(1 - level) / 2, (1 + level) / 2]).tolist(),
+            "difference_ci": ci[:, m].tolist() if ci is not None else None,
+        }
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    def positive_int(value):
+        if not value.isdigit() or int(value) < 1:
+            raise argparse.ArgumentTypeError(f"expected a positive integer, got {value!r}")
+        return int(value)
+
+    parser = argparse.ArgumentParser(description="Permutation test of side-effect vs no-side-effect target overlap")
+    parser.add_argument("--mode", choices=["pairs", "drugs"], default="pairs",
+                        help="shuffle pair labels, or permute drug labels over the combo graph")
+    parser.add_argument("--permutations", type=positive_int, default=10000)
+    parser.add_argument("--bootstrap", type=int, default=1000, help="bootstrap replicates for the CI (0 = skip)")
+    parser.add_argument("--level", type=float, default=0.95)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (0 = all cores)")
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args()
+
+    drugs, shared, ppi, side_rows, side_cols = all_drug_scores()
+    report = permutation_test(shared, ppi, side_rows, side_cols, args.mode, args.permutations,
+                              args.bootstrap, args.level, args.seed, args.workers or None)
+
+    print(f"=== Permutation test ({args.mode}, {args.permutations} permutations) ===")
+    print(f"Side-effect pairs: {report['side_effect_pairs']}, no-side-effect pairs: {report['no_side_effect_pairs']}")
+    for name, r in report["metrics"].items():
+        print(f"\n{name}")
+        print(f"  side effect mean: {r['mean_side_effect']:.4f}  no side effect mean: {r['mean_no_side_effect']:.4f}")
+        print(f"  difference: {r['observed_difference']:.4f}", end="")
+        if r["difference_ci"]:
+            print(f"  ({args.level:.0%} CI {r['difference_ci'][0]:.4f} .. {r['difference_ci'][1]:.4f})", end="")
+        print()
+        print(f"  p (two-sided): {r['p_value_two_sided']:.4g}  p (greater): {r['p_value_greater']:.4g}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Report saved to: {args.output}")
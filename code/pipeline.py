@@ -0,0 +1,316 @@
+import hashlib
+import io
+import json
+import os
+import random
+import shutil
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from decagon_data import (COMBO_PATH, PPI_PATH, TARGETS_PATH, CACHE_DIR, load_combo, load_ppi, load_targets,
+                          recode, source_hash)
+from drug_set_stats import combo_pairs
+from pair_scores import build_matrices, pair_score_matrices, side_effect_pair_codes, summarize_pairs
+
+DRUG_DIR = "csv/random_drug_sets_80"
+SUMMARY_PATH = "csv/drug_set_stats_summary.csv"
+PIPELINE_VERSION = 1
+
+# Above this fraction of changed PPI edges the set scores are recomputed
+# from scratch instead of being patched
+MAX_EDGE_DELTA = 0.05
+
+SUMMARY_COLUMNS = [
+    "file", "num_drugs", "num_side_effect_pairs", "num_no_side_effect_pairs",
+    "avg_shared_proteins_side_effect", "avg_ppi_side_effect",
+    "avg_shared_proteins_no_side_effect", "avg_ppi_no_side_effect",
+]
+
+
+def _digest(*parts):
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(part.tobytes() if isinstance(part, np.ndarray) else str(part).encode())
+    return h.hexdigest()
+
+
+def pipeline_dir(targets_path=TARGETS_PATH):
+    return os.path.join(os.path.dirname(targets_path), CACHE_DIR, "pipeline")
+
+
+def _read_state(directory):
+    try:
+        with open(os.path.join(directory, "state.json")) as f:
+            state = json.load(f)
+        if state.get("version") == PIPELINE_VERSION:
+            return state
+    except (OSError, ValueError):
+        pass
+    return {"version": PIPELINE_VERSION, "extract": None, "sets": {}, "summaries": {}}
+
+
+def _write_state(directory, state):
+    tmp = os.path.join(directory, "state.json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, os.path.join(directory, "state.json"))
+
+
+# Stage 1: random, non-overlapping drug sets of the targets file, one CSV per
+# set with all target rows of its drugs. Files whose content is unchanged are
+# not rewritten. Returns (path, drugs, rows, written) per set.
+def extract_drug_sets(targets_path=TARGETS_PATH, out_dir=DRUG_DIR, drugs_per_file=80, num_files=15, seed=None):
+    df = pd.read_csv(targets_path)
+    unique_drugs = list(df['STITCH'].unique())
+    random.Random(seed).shuffle(unique_drugs)
+
+    total_needed = drugs_per_file * num_files
+    if total_needed > len(unique_drugs):
+        raise ValueError(f"Not enough unique drugs ({len(unique_drugs)}) for {num_files} files of {drugs_per_file} each.")
+
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    for i in range(num_files):
+        drug_subset = unique_drugs[i * drugs_per_file:(i + 1) * drugs_per_file]
+        subset_df = df[df['STITCH'].isin(drug_subset)]
+        buffer = io.StringIO()
+        subset_df.to_csv(buffer, index=False)
+        content = buffer.getvalue()
+
+        output_path = os.path.join(out_dir, f"random_80_drugs_set_{i+1}.csv")
+        try:
+            with open(output_path, newline="") as f:
+                changed = f.read() != content
+        except OSError:
+            changed = True
+        if changed:
+            with open(output_path, "w", newline="") as f:
+                f.write(content)
+        written.append((output_path, len(drug_subset), len(subset_df), changed))
+    return written
+
+
+# Stage 2: per-drug target sets of one set file, in canonical form (sorted
+# drugs, sorted distinct (drug, gene) rows). The digest only changes when some
+# drug's targets change, not when rows are reordered or duplicated.
+def set_targets(path):
+    df = pd.read_csv(path)
+    drugs, codes = np.unique(df['STITCH'].to_numpy(dtype=str), return_inverse=True)
+    rows = np.unique(np.column_stack([codes, df['Gene'].to_numpy()]).astype(np.int64), axis=0)
+    return {
+        "drugs": drugs, "codes": rows[:, 0], "genes": rows[:, 1],
+        "digest": _digest("\n".join(drugs.tolist()), rows),
+    }
+
+
+# Undirected PPI edges as sorted unique int64 keys (low gene << 32 | high gene)
+def ppi_edge_keys(ppi):
+    g1 = np.asarray(ppi["gene1"], dtype=np.int64)
+    g2 = np.asarray(ppi["gene2"], dtype=np.int64)
+    return np.unique((np.minimum(g1, g2) << 32) | np.maximum(g1, g2))
+
+
+def _edges_of(keys):
+    return keys >> 32, keys & 0xFFFFFFFF
+
+
+# Stage 3: shared-target and PPI-link matrices of a set
+def set_scores(targets, ppi_g1, ppi_g2):
+    proteins, B, A = build_matrices(targets["codes"], len(targets["drugs"]), targets["genes"], ppi_g1, ppi_g2)
+    shared, ppi_links = pair_score_matrices(B, A)
+    return proteins, B, shared, ppi_links
+
+
+# Patch B.A.B^T for added / removed PPI edges: with D the signed change of A
+# restricted to the set's proteins, the new PPI-link matrix is M + B.D.B^T.
+# Only drugs targeting an endpoint of a changed edge are touched.
+def update_ppi_links(ppi_links, B, proteins, added, removed):
+    lo = np.concatenate([_edges_of(added)[0], _edges_of(removed)[0]])
+    hi = np.concatenate([_edges_of(added)[1], _edges_of(removed)[1]])
+    sign = np.concatenate([np.ones(len(added), dtype=np.int64), -np.ones(len(removed), dtype=np.int64)])
+    p, q = recode(np.arange(len(lo)), lo, proteins), recode(np.arange(len(hi)), hi, proteins)
+    keep = (p >= 0) & (q >= 0)
+    if not keep.any():
+        return ppi_links
+    p, q, sign = p[keep], q[keep], sign[keep]
+    loop = p == q
+    rows = np.concatenate([p, q[~loop]])
+    cols = np.concatenate([q, p[~loop]])
+    data = np.concatenate([sign, sign[~loop]])
+    D = sp.csr_matrix((data, (rows, cols)), shape=(len(proteins), len(proteins)))
+    updated = (ppi_links + B @ D @ B.T.tocsr()).tocsr()
+    updated.eliminate_zeros()
+    return updated
+
+
+def _scores_file(directory, digest):
+    return os.path.join(directory, "scores", digest + ".npz")
+
+
+def _save_scores(directory, digest, proteins, B, shared, ppi_links, ppi_hash):
+    path = _scores_file(directory, digest)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    arrays = {"proteins": proteins, "ppi_hash": np.array(ppi_hash)}
+    for name, M in (("B", B), ("shared", shared), ("ppi", ppi_links)):
+        M = M.tocsr()
+        arrays.update({f"{name}_data": M.data, f"{name}_indices": M.indices,
+                       f"{name}_indptr": M.indptr, f"{name}_shape": np.array(M.shape)})
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, **arrays)
+    os.replace(tmp, path)
+
+
+def _load_scores(directory, digest):
+    path = _scores_file(directory, digest)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as f:
+        mats = {name: sp.csr_matrix((f[f"{name}_data"], f[f"{name}_indices"], f[f"{name}_indptr"]),
+                                    shape=tuple(f[f"{name}_shape"]))
+                for name in ("B", "shared", "ppi")}
+        return f["proteins"], mats["B"], mats["shared"], mats["ppi"], str(f["ppi_hash"])
+
+
+def _ppi_snapshot(directory, ppi_hash):
+    return os.path.join(directory, "ppi", ppi_hash + ".npy")
+
+
+def _prune(directory, state, names, digests, summary_keys, ppi_hash):
+    state["sets"] = {k: v for k, v in state["sets"].items() if k in names}
+    state["summaries"] = {k: v for k, v in state["summaries"].items() if k in summary_keys}
+    for sub, keep in (("scores", {d + ".npz" for d in digests}), ("ppi", {ppi_hash + ".npy"})):
+        folder = os.path.join(directory, sub)
+        if os.path.isdir(folder):
+            for f in set(os.listdir(folder)) - keep:
+                os.remove(os.path.join(folder, f))
+
+
+# Scores of one set under the current PPI file: reused when computed against
+# the same PPI file, patched edge by edge when it changed by a few edges,
+# recomputed otherwise. Returns (B, shared, ppi_links, how).
+def _current_scores(directory, targets, ppi, ppi_hash, ppi_keys):
+    stored = _load_scores(directory, targets["digest"])
+    if stored is not None:
+        proteins, B, shared, ppi_links, stored_hash = stored
+        if stored_hash == ppi_hash:
+            return B, shared, ppi_links, "scores reused"
+        snapshot = _ppi_snapshot(directory, stored_hash)
+        if os.path.exists(snapshot):
+            old_keys = np.load(snapshot)
+            added = np.setdiff1d(ppi_keys(), old_keys, assume_unique=True)
+            removed = np.setdiff1d(old_keys, ppi_keys(), assume_unique=True)
+            if len(added) + len(removed) <= MAX_EDGE_DELTA * max(1, len(old_keys)):
+                ppi_links = update_ppi_links(ppi_links, B, proteins, added, removed)
+                _save_scores(directory, targets["digest"], proteins, B, shared, ppi_links, ppi_hash)
+                return B, shared, ppi_links, "scores patched"
+    proteins, B, shared, ppi_links = set_scores(targets, ppi["gene1"], ppi["gene2"])
+    _save_scores(directory, targets["digest"], proteins, B, shared, ppi_links, ppi_hash)
+    return B, shared, ppi_links, "scores computed"
+
+
+# The whole drug-set analysis as one incremental run: extraction, per-drug
+# target sets, pair scores and per-set summaries. A summary is reused when the
+# set's target digest, the PPI file and the combo file are unchanged, so a run
+# on a warm cache only stats the set files and checks the source hashes.
+def run(drug_dir=DRUG_DIR, targets_path=TARGETS_PATH, combo_path=COMBO_PATH, ppi_path=PPI_PATH,
+        output=SUMMARY_PATH, seed=None, drugs_per_file=80, num_files=15, log=print):
+    directory = pipeline_dir(targets_path)
+    os.makedirs(directory, exist_ok=True)
+    state = _read_state(directory)
+    counts = {"sets extracted": 0, "summaries reused": 0, "scores reused": 0,
+              "scores patched": 0, "scores computed": 0}
+
+    # extraction reruns when no sets exist yet, or for a seeded extraction
+    # whose inputs changed
+    load_targets(targets_path)
+    extract_key = {"targets": source_hash(targets_path), "seed": seed,
+                   "drugs_per_file": drugs_per_file, "num_files": num_files}
+    has_sets = os.path.isdir(drug_dir) and any(f.endswith(".csv") for f in os.listdir(drug_dir))
+    if not has_sets or (seed is not None and state["extract"] != extract_key):
+        written = extract_drug_sets(targets_path, drug_dir, drugs_per_file, num_files, seed)
+        counts["sets extracted"] = sum(changed for *_, changed in written)
+        state["extract"] = extract_key if seed is not None else None
+
+    ppi = load_ppi(ppi_path)
+    load_combo(combo_path)
+    ppi_hash, combo_hash = source_hash(ppi_path), source_hash(combo_path)
+    lazy = {}
+
+    def ppi_keys():
+        if "ppi_keys" not in lazy:
+            lazy["ppi_keys"] = ppi_edge_keys(ppi)
+        return lazy["ppi_keys"]
+
+    names = sorted(f for f in os.listdir(drug_dir) if f.endswith(".csv"))
+    rows, digests, summary_keys = [], set(), set()
+    for name in names:
+        path = os.path.join(drug_dir, name)
+        st = os.stat(path)
+        cached = state["sets"].get(name)
+        targets = None
+        if cached and cached["size"] == st.st_size and cached["mtime_ns"] == st.st_mtime_ns:
+            digest = cached["digest"]
+        else:
+            targets = set_targets(path)
+            digest = targets["digest"]
+            state["sets"][name] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "digest": digest}
+        summary_key = _digest(digest, ppi_hash, combo_hash)
+        digests.add(digest)
+        summary_keys.add(summary_key)
+
+        summary = state["summaries"].get(summary_key)
+        if summary is None:
+            targets = targets or set_targets(path)
+            B, shared, ppi_links, how = _current_scores(directory, targets, ppi, ppi_hash, ppi_keys)
+            counts[how] += 1
+
+            if "pairs" not in lazy:
+                lazy["pairs"] = combo_pairs(combo_path)
+            combo_drugs, pair_lo, pair_hi = lazy["pairs"]
+            drugs = targets["drugs"]
+            mapping = recode(np.arange(len(combo_drugs)), combo_drugs, drugs)
+            side_rows, side_cols = side_effect_pair_codes(len(drugs), mapping[pair_lo], mapping[pair_hi])
+            summary = {"num_drugs": len(drugs), **summarize_pairs(shared, ppi_links, side_rows, side_cols)}
+            state["summaries"][summary_key] = summary
+        else:
+            counts["summaries reused"] += 1
+        rows.append({"file": name, **summary})
+
+    # the current PPI edges are the base of the next incremental update
+    snapshot = _ppi_snapshot(directory, ppi_hash)
+    if not os.path.exists(snapshot):
+        os.makedirs(os.path.dirname(snapshot), exist_ok=True)
+        np.save(snapshot, ppi_keys())
+    _prune(directory, state, set(names), digests, summary_keys, ppi_hash)
+    _write_state(directory, state)
+
+    summary_df = pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
+    summary_df.to_csv(output, index=False)
+    log(", ".join(f"{k}: {v}" for k, v in counts.items()))
+    return summary_df
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Incremental drug-set pipeline")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_parser = sub.add_parser("run", help="bring the drug-set summary up to date")
+    run_parser.add_argument("--drug-dir", default=DRUG_DIR)
+    run_parser.add_argument("--output", default=SUMMARY_PATH)
+    run_parser.add_argument("--seed", type=int, default=None,
+                            help="re-extract the drug sets with this seed (default: keep existing sets)")
+    run_parser.add_argument("--drugs-per-file", type=int, default=80)
+    run_parser.add_argument("--num-files", type=int, default=15)
+    clean_parser = sub.add_parser("clean", help="drop all pipeline state")
+    args = parser.parse_args()
+
+    if args.command == "clean":
+        shutil.rmtree(pipeline_dir(), ignore_errors=True)
+        print(f"Removed {pipeline_dir()}")
+    else:
+        summary_df = run(args.drug_dir, output=args.output, seed=args.seed,
+                         drugs_per_file=args.drugs_per_file, num_files=args.num_files)
+        print(f"\n✅ Summary saved to: {args.output}")
+        print(summary_df)
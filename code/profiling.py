@@ -0,0 +1,221 @@
+import atexit
+import contextlib
+import functools
+import glob
+import json
+import multiprocessing
+import multiprocessing.util
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+# DECAGON_PROFILE=<file.json> (or 1 for profile_<script>.json) turns the
+# instrumentation on; DECAGON_PROFILE_TRACE=1 adds tracemalloc peaks per stage.
+# Unset, stage() returns a shared no-op context and profiled() returns the
+# function itself, so instrumented code runs unchanged. Pool workers write
+# their own records when they exit; the main process merges them under a
+# "worker" root stage (summed over workers, so worker seconds can exceed the
+# wall time of the pool).
+PROFILE = os.environ.get("DECAGON_PROFILE", "")
+TRACE = os.environ.get("DECAGON_PROFILE_TRACE", "") not in ("", "0")
+ENABLED = PROFILE not in ("", "0")
+
+_NULL = contextlib.nullcontext()
+
+
+def _script():
+    return os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python"
+
+
+def _profile_path():
+    return PROFILE if PROFILE.endswith(".json") else f"profile_{_script()}.json"
+
+
+# Prefix of the per-worker record files, set by the main process for its workers
+WORKERS_ENV = "DECAGON_PROFILE_WORKERS"
+
+# open stages (innermost last) and per-stack-path records
+_stack = []
+_records = {}
+_totals = {}
+_start = time.perf_counter()
+# allocation peak of the run; per-stage peaks reset the tracemalloc peak
+_alloc_peak = [0]
+
+
+def _record(path):
+    if path not in _records:
+        _records[path] = {"calls": 0, "seconds": 0.0, "self_seconds": 0.0, "cpu_seconds": 0.0,
+                          "peak_rss_mb": 0.0, "alloc_peak_mb": None, "counters": {}}
+    return _records[path]
+
+
+class _Stage:
+    __slots__ = ("name", "path", "start", "cpu", "children", "peak")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        parent = _stack[-1] if _stack else None
+        self.path = f"{parent.path};{self.name}" if parent else self.name
+        self.children, self.peak = 0.0, 0
+        if TRACE:
+            before = tracemalloc.get_traced_memory()[1]
+            _alloc_peak[0] = max(_alloc_peak[0], before)
+            if parent:
+                parent.peak = max(parent.peak, before)
+            tracemalloc.reset_peak()
+        _stack.append(self)
+        self.cpu, self.start = time.process_time(), time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        cpu = time.process_time() - self.cpu
+        _stack.pop()
+        rec = _record(self.path)
+        rec["calls"] += 1
+        rec["seconds"] += seconds
+        rec["self_seconds"] += seconds - self.children
+        rec["cpu_seconds"] += cpu
+        rec["peak_rss_mb"] = max(rec["peak_rss_mb"], resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+        if _stack:
+            _stack[-1].children += seconds
+        if TRACE:
+            peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            rec["alloc_peak_mb"] = max(rec["alloc_peak_mb"] or 0, peak / 2 ** 20)
+            if _stack:
+                _stack[-1].peak = max(_stack[-1].peak, peak)
+        return False
+
+
+# Timed (and memory-tracked) stage; stages nest into stack paths a;b;c
+def stage(name):
+    return _Stage(name) if ENABLED else _NULL
+
+
+# Add `n` to the counter `name` of the current stage and of the whole run
+def count(name, n=1):
+    if not ENABLED:
+        return
+    n = int(n)
+    _totals[name] = _totals.get(name, 0) + n
+    if _stack:
+        counters = _record(_stack[-1].path)["counters"]
+        counters[name] = counters.get(name, 0) + n
+
+
+# Decorator running the whole function as a stage
+def profiled(name):
+    def wrap(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def inner(*args, **kwargs):
+            with _Stage(name):
+                return func(*args, **kwargs)
+        return inner
+    return wrap
+
+
+# JSON profile plus a .folded file (one "script;a;b self_microseconds" line per
+# stack path) for flamegraph.pl, speedscope or inferno
+def write_profile(path=None):
+    path = path or _profile_path()
+    script = _script()
+    _merge_workers()
+    profile = {
+        "script": " ".join(sys.argv),
+        "seconds": time.perf_counter() - _start,
+        "cpu_seconds": time.process_time(),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "alloc_peak_mb": max(_alloc_peak[0], tracemalloc.get_traced_memory()[1]) / 2 ** 20 if TRACE else None,
+        "counters": _totals,
+        "stages": [{"stage": p, **r} for p, r in sorted(_records.items(), key=lambda kv: -kv[1]["seconds"])],
+    }
+    with open(path, "w") as f:
+        json.dump(profile, f, indent=2)
+    with open(os.path.splitext(path)[0] + ".folded", "w") as f:
+        outside = profile["seconds"] - sum(r["seconds"] for p, r in _records.items() if ";" not in p)
+        f.write(f"{script} {max(int(outside * 1e6), 0)}\n")
+        for p, r in sorted(_records.items()):
+            f.write(f"{script};{p} {max(int(r['self_seconds'] * 1e6), 0)}\n")
+    print(f"Profile written to: {path}", file=sys.stderr)
+
+
+def _add_record(path, other):
+    rec = _record(path)
+    for key in ("calls", "seconds", "self_seconds", "cpu_seconds"):
+        rec[key] += other[key]
+    rec["peak_rss_mb"] = max(rec["peak_rss_mb"], other["peak_rss_mb"])
+    if other["alloc_peak_mb"] is not None:
+        rec["alloc_peak_mb"] = max(rec["alloc_peak_mb"] or 0, other["alloc_peak_mb"])
+    for name, n in other["counters"].items():
+        rec["counters"][name] = rec["counters"].get(name, 0) + n
+
+
+# Fold the record files of finished pool workers into this process' records
+def _merge_workers():
+    prefix = os.environ.get(WORKERS_ENV)
+    if not prefix:
+        return
+    for path in sorted(glob.glob(glob.escape(prefix) + "*.json")):
+        try:
+            with open(path) as f:
+                worker = json.load(f)
+        except (OSError, ValueError):
+            continue
+        os.remove(path)
+        for stage_path, rec in worker["records"].items():
+            _add_record(f"worker;{stage_path}", rec)
+        for name, n in worker["counters"].items():
+            _totals[name] = _totals.get(name, 0) + n
+
+
+def _write_worker():
+    if not _records:
+        return
+    with open(f"{os.environ[WORKERS_ENV]}{os.getpid()}.json", "w") as f:
+        json.dump({"records": _records, "counters": _totals}, f)
+
+
+# A forked worker starts with a copy of the parent's records: drop them and
+# write its own records when the worker process exits
+def _start_worker(_=None):
+    _stack.clear()
+    _records.clear()
+    _totals.clear()
+    multiprocessing.util.Finalize(None, _write_worker, exitpriority=100)
+
+
+class _Hook:
+    pass
+
+
+_hook = _Hook()
+
+
+# only the main process writes the profile, not pool workers
+def _at_exit():
+    if multiprocessing.parent_process() is None:
+        write_profile()
+
+
+if ENABLED:
+    if TRACE:
+        tracemalloc.start()
+    if multiprocessing.parent_process() is None:
+        prefix = os.path.splitext(os.path.abspath(_profile_path()))[0] + ".worker-"
+        os.environ[WORKERS_ENV] = prefix
+        # records left over by workers of an interrupted run
+        for stale in glob.glob(glob.escape(prefix) + "*.json"):
+            os.remove(stale)
+        atexit.register(_at_exit)
+    elif os.environ.get(WORKERS_ENV):
+        # spawned worker: this module was imported in the new process
+        _start_worker()
+    multiprocessing.util.register_after_fork(_hook, _start_worker)
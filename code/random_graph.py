@@ -1,98 +1,115 @@
+import numpy as np
 import networkx as nx
-import random
-import itertools
+from pair_scores import drug_protein_matrix, pair_score_matrices, ppi_matrix
 
 num_drugs = 1774
 num_proteins = 19081
 
-# Random edge counts
-num_drug_drug_edges = random.randint(14256, 14257)
-num_drug_protein_edges = random.randint(400, 100000)
-num_protein_protein_edges = random.randint(2000, 100000)
-
-print("Edge counts chosen:")
-print(f"  Drug–Drug edges: {num_drug_drug_edges}")
-print(f"  Drug–Protein edges: {num_drug_protein_edges}")
-print(f"  Protein–Protein edges: {num_protein_protein_edges}\n")
-
-# Create graph
-G = nx.Graph()
-
-# Add nodes
-for i in range(num_drugs):
-    G.add_node(f"Drug_{i+1}", type="drug")
-for i in range(num_proteins):
-    G.add_node(f"Protein_{i+1}", type="protein")
-
-drugs = [n for n, d in G.nodes(data=True) if d["type"] == "drug"]
-proteins = [n for n, d in G.nodes(data=True) if d["type"] == "protein"]
-
-def add_random_edges(G, nodes_a, nodes_b, edge_type, num_edges, allow_same_set=False):
-    possible_edges = (
-        list(itertools.combinations(nodes_a, 2)) if allow_same_set
-        else list(itertools.product(nodes_a, nodes_b))
-    )
-    random.shuffle(possible_edges)
-    added = 0
-    for edge in possible_edges:
-        if added >= num_edges:
-            break
-        if G.has_edge(*edge):
-            continue
-        G.add_edge(edge[0], edge[1], type=edge_type)
-        added += 1
-
-add_random_edges(G, drugs, drugs, "drug_drug", num_drug_drug_edges, allow_same_set=True)
-add_random_edges(G, drugs, proteins, "drug_protein", num_drug_protein_edges)
-add_random_edges(G, proteins, proteins, "protein_protein", num_protein_protein_edges, allow_same_set=True)
-
-
-
-# Map drug → connected proteins
-drug_to_proteins = {
-    d: {nbr for nbr in G.neighbors(d) if G.nodes[nbr]["type"] == "protein"}
-    for d in drugs
-}
-
-linked_drug_pairs = [
-    (d1, d2) for d1, d2 in itertools.combinations(drugs, 2)
-    if G.has_edge(d1, d2) and G.edges[d1, d2]["type"] == "drug_drug"
-]
-
-# Average shared proteins between linked drugs 
-shared_counts = []
-for d1, d2 in linked_drug_pairs:
-    shared = len(drug_to_proteins[d1].intersection(drug_to_proteins[d2]))
-    shared_counts.append(shared)
-avg_shared_linked = sum(shared_counts) / len(shared_counts) if shared_counts else 0
-
-# Metric 2: Average PPI between linked drugs
-ppi_counts = []
-for d1, d2 in linked_drug_pairs:
-    ppi_count = 0
-    for p1 in drug_to_proteins[d1]:
-        for p2 in drug_to_proteins[d2]:
-            if G.has_edge(p1, p2) and G.edges[p1, p2]["type"] == "protein_protein":
-                ppi_count += 1
-    ppi_counts.append(ppi_count)
-avg_ppi_linked = sum(ppi_counts) / len(ppi_counts) if ppi_counts else 0
-
-# Network-level stats
-density = nx.density(G)
-degrees = dict(G.degree())
-avg_degree = sum(degrees.values()) / len(degrees)
-max_degree = max(degrees.values())
-min_degree = min(degrees.values())
-
-
-print("=== Graph Statistics ===")
-print(f"Number of nodes: {G.number_of_nodes()}")
-print(f"Number of edges: {G.number_of_edges()}")
-print(f"Density: {density:.4f}")
-print(f"Average degree: {avg_degree:.2f}")
-print(f"Maximum degree: {max_degree}")
-print(f"Minimum degree: {min_degree}")
-
-print("\n=== Drug Interaction Metrics ===")
-print(f"Average shared proteins between linked drugs: {avg_shared_linked:.2f}")
-print(f"Average protein–protein interactions between linked drugs: {avg_ppi_linked:.2f}")
+
+# Draw `num_edges` distinct node pairs uniformly at random without listing
+# the candidates: pairs are drawn as integers, deduplicated, and drawn again
+# until enough are found. Same-set pairs are unordered and never self-loops.
+# Returns an int32 (k, 2) array; k is capped by the number of possible pairs.
+def sample_pairs(n_a, n_b, num_edges, rng, same_set=False):
+    total = n_a * (n_a - 1) // 2 if same_set else n_a * n_b
+    num_edges = min(num_edges, total)
+    keys = np.empty(0, dtype=np.int64)
+    while len(keys) < num_edges:
+        draw = int((num_edges - len(keys)) * 1.1) + 16
+        a = rng.integers(0, n_a, draw, dtype=np.int64)
+        b = rng.integers(0, n_a if same_set else n_b, draw, dtype=np.int64)
+        if same_set:
+            keep = a != b
+            a, b = np.minimum(a[keep], b[keep]), np.maximum(a[keep], b[keep])
+            new = a * n_a + b
+        else:
+            new = a * n_b + b
+        keys = np.union1d(keys, new)
+    # keep a uniform random subset of the distinct keys
+    keys = rng.permutation(keys)[:num_edges]
+    width = n_a if same_set else n_b
+    return np.column_stack([keys // width, keys % width]).astype(np.int32)
+
+
+# Typed random graph as compact edge arrays on per-type node indices
+def random_typed_graph(num_drugs, num_proteins, num_drug_drug_edges, num_drug_protein_edges,
+                       num_protein_protein_edges, seed=None):
+    rng = np.random.default_rng(seed)
+    return {
+        "drug_drug": sample_pairs(num_drugs, num_drugs, num_drug_drug_edges, rng, same_set=True),
+        "drug_protein": sample_pairs(num_drugs, num_proteins, num_drug_protein_edges, rng),
+        "protein_protein": sample_pairs(num_proteins, num_proteins, num_protein_protein_edges, rng, same_set=True),
+    }
+
+
+# networkx view with the original "Drug_i" / "Protein_i" node names
+def to_networkx(edges, num_drugs, num_proteins):
+    G = nx.Graph()
+    G.add_nodes_from((f"Drug_{i+1}" for i in range(num_drugs)), type="drug")
+    G.add_nodes_from((f"Protein_{i+1}" for i in range(num_proteins)), type="protein")
+    G.add_edges_from(((f"Drug_{u+1}", f"Drug_{v+1}") for u, v in edges["drug_drug"].tolist()), type="drug_drug")
+    G.add_edges_from(((f"Drug_{u+1}", f"Protein_{v+1}") for u, v in edges["drug_protein"].tolist()), type="drug_protein")
+    G.add_edges_from(((f"Protein_{u+1}", f"Protein_{v+1}") for u, v in edges["protein_protein"].tolist()), type="protein_protein")
+    return G
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Random drug/protein graph with Decagon-like sizes")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+
+    # Random edge counts
+    num_drug_drug_edges = int(rng.integers(14256, 14257, endpoint=True))
+    num_drug_protein_edges = int(rng.integers(400, 100000, endpoint=True))
+    num_protein_protein_edges = int(rng.integers(2000, 100000, endpoint=True))
+
+    print("Edge counts chosen:")
+    print(f"  Drug–Drug edges: {num_drug_drug_edges}")
+    print(f"  Drug–Protein edges: {num_drug_protein_edges}")
+    print(f"  Protein–Protein edges: {num_protein_protein_edges}\n")
+
+    edges = random_typed_graph(num_drugs, num_proteins, num_drug_drug_edges, num_drug_protein_edges,
+                               num_protein_protein_edges, seed=rng)
+
+    # Shared proteins and PPI links of every drug pair, read at the linked pairs
+    dp, pp, dd = edges["drug_protein"], edges["protein_protein"], edges["drug_drug"]
+    B = drug_protein_matrix(dp[:, 0], dp[:, 1], num_drugs, num_proteins)
+    A = ppi_matrix(pp[:, 0], pp[:, 1], num_proteins)
+    shared, ppi = pair_score_matrices(B, A)
+
+    # Average shared proteins between linked drugs
+    shared_counts = np.asarray(shared[dd[:, 0], dd[:, 1]]).ravel()
+    avg_shared_linked = shared_counts.mean() if len(shared_counts) else 0
+
+    # Metric 2: Average PPI between linked drugs
+    ppi_counts = np.asarray(ppi[dd[:, 0], dd[:, 1]]).ravel()
+    avg_ppi_linked = ppi_counts.mean() if len(ppi_counts) else 0
+
+    # Network-level stats
+    num_nodes = num_drugs + num_proteins
+    num_edges = len(dd) + len(dp) + len(pp)
+    degrees = np.concatenate([
+        np.bincount(dd.ravel(), minlength=num_drugs) + np.bincount(dp[:, 0], minlength=num_drugs),
+        np.bincount(dp[:, 1], minlength=num_proteins) + np.bincount(pp.ravel(), minlength=num_proteins),
+    ])
+    density = 2 * num_edges / (num_nodes * (num_nodes - 1))
+    avg_degree = degrees.sum() / num_nodes
+    max_degree = degrees.max()
+    min_degree = degrees.min()
+
+
+    print("=== Graph Statistics ===")
+    print(f"Number of nodes: {num_nodes}")
+    print(f"Number of edges: {num_edges}")
+    print(f"Density: {density:.4f}")
+    print(f"Average degree: {avg_degree:.2f}")
+    print(f"Maximum degree: {max_degree}")
+    print(f"Minimum degree: {min_degree}")
+
+    print("\n=== Drug Interaction Metrics ===")
+    print(f"Average shared proteins between linked drugs: {avg_shared_linked:.2f}")
+    print(f"Average protein–protein interactions between linked drugs: {avg_ppi_linked:.2f}")
@@ -0,0 +1,223 @@
+import contextlib
+import hashlib
+import io
+import json
+import os
+import re
+import runpy
+import shutil
+import subprocess
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from decagon_data import CACHE_DIR, COMBO_PATH, PPI_PATH, file_hash, load_ppi, load_targets
+from effect_index import load_index
+
+RESULTS_DIR = "results"
+MANIFEST_PATH = os.path.join("csv", CACHE_DIR, "figures.json")
+CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+SHORT_TARGETS_PATH = "csv/short_bio-decagon-targets-all.csv"
+
+# Binary caches the figure scripts read, per input file (the effect index
+# loads the combo cache too)
+CACHES = {COMBO_PATH: load_index, PPI_PATH: load_ppi, SHORT_TARGETS_PATH: load_targets}
+
+
+def _figure(name, script, inputs, output):
+    return {"name": name, "script": script, "args": ["--output", output], "inputs": inputs, "outputs": [output]}
+
+
+# Every figure of results/: the script drawing it, its arguments, the data
+# files it reads and the files it writes
+FIGURES = [
+    {
+        "name": "drug_set_charts", "script": "3. 80_random_drugs_visual.py",
+        "args": ["--output-dir", RESULTS_DIR], "inputs": ["csv/drug_set_stats_summary.csv"],
+        "outputs": [os.path.join(RESULTS_DIR, f) for f in
+                    ["stats_80_drugs_sets.pdf", "projection_80_drugs_sets.pdf", "matrix_80_deugs_sets.pdf"]],
+    },
+    _figure("similar_drug_network", "similar_drug_visual.py", ["csv/similar_drug_protein.csv", COMBO_PATH],
+            os.path.join(RESULTS_DIR, "similar_drug_network.png")),
+    _figure("similar_drug_network_light", "similar_drug_visual_light.py", ["csv/similar_drug_protein.csv", COMBO_PATH],
+            os.path.join(RESULTS_DIR, "similar_drug_network_light.png")),
+    _figure("different_drug_network", "different_drug_visual.py", ["csv/different_drug_protein.csv", COMBO_PATH],
+            os.path.join(RESULTS_DIR, "different_drug_network.png")),
+    _figure("different_drug_ppi_network", "different_drug_visual_and_ppi.py",
+            ["csv/different_drug_protein.csv", COMBO_PATH, PPI_PATH],
+            os.path.join(RESULTS_DIR, "different_drug_ppi_network.png")),
+    _figure("full_network", "full_graph_visual.py", [SHORT_TARGETS_PATH, PPI_PATH, COMBO_PATH],
+            os.path.join(RESULTS_DIR, "full_drug_protein_network.png")),
+    _figure("fever_hypertension_network", "co_occurence_visual.py",
+            ["csv/fever_hyperT_drug_protein.csv", COMBO_PATH, PPI_PATH],
+            os.path.join(RESULTS_DIR, "fever_hypertension_network.png")),
+]
+
+
+# The script and every module of code/ it imports, directly or not
+def code_inputs(script):
+    seen, todo = set(), [os.path.join(CODE_DIR, script)]
+    while todo:
+        path = todo.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        with open(path, encoding="utf-8") as f:
+            for module in re.findall(r"^\s*(?:from|import)\s+(\w+)", f.read(), re.M):
+                dep = os.path.join(CODE_DIR, module + ".py")
+                if os.path.exists(dep):
+                    todo.append(dep)
+    return sorted(os.path.relpath(p) for p in seen)
+
+
+def _read_manifest():
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"files": {}, "figures": {}}
+
+
+def _write_manifest(manifest):
+    os.makedirs(os.path.dirname(MANIFEST_PATH), exist_ok=True)
+    tmp = MANIFEST_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, MANIFEST_PATH)
+
+
+# Content hash of a file, recomputed only when its size or mtime changed
+def _fingerprint(manifest, path):
+    st = os.stat(path)
+    known = manifest["files"].get(path)
+    if known and known["size"] == st.st_size and known["mtime_ns"] == st.st_mtime_ns:
+        return known["hash"]
+    digest = file_hash(path)
+    manifest["files"][path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": digest}
+    return digest
+
+
+# Digest of everything a figure depends on: data files, code and arguments
+def figure_digest(manifest, figure):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(json.dumps([figure["script"], figure["args"]]).encode())
+    for path in sorted(set(figure["inputs"])) + code_inputs(figure["script"]):
+        h.update(f"{path}:{_fingerprint(manifest, path)}\n".encode())
+    return h.hexdigest()
+
+
+# Build the binary caches of the figures' inputs in this process, before the
+# pool starts, so that the workers all find them warm
+def warm_caches(figures):
+    for path in sorted({p for figure in figures for p in figure["inputs"]} & set(CACHES)):
+        CACHES[path](path)
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use("Agg")
+    if CODE_DIR not in sys.path:
+        sys.path.insert(0, CODE_DIR)
+
+
+# Run one figure script headless in a worker: (name, error or None, seconds, log)
+def _render(figure):
+    import matplotlib.pyplot as plt
+
+    script = os.path.join(CODE_DIR, figure["script"])
+    argv, log = sys.argv, io.StringIO()
+    sys.argv = [script] + figure["args"]
+    start = time.perf_counter()
+    error = None
+    try:
+        with contextlib.redirect_stdout(log):
+            runpy.run_path(script, run_name="__main__")
+    except BaseException:
+        error = traceback.format_exc()
+    finally:
+        sys.argv = argv
+        plt.close("all")
+    return figure["name"], error, time.perf_counter() - start, log.getvalue()
+
+
+# Render every figure whose inputs changed since its last successful render
+# (or whose output is missing) on a pool of `jobs` processes. Returns the
+# names of the figures that failed.
+def render_all(figures=FIGURES, jobs=None, force=False):
+    manifest = _read_manifest()
+    todo = {}
+    for figure in figures:
+        missing = [p for p in figure["inputs"] if not os.path.exists(p)]
+        if missing:
+            print(f"⚠️ {figure['name']}: missing {', '.join(missing)}, skipped")
+            continue
+        digest = figure_digest(manifest, figure)
+        up_to_date = manifest["figures"].get(figure["name"]) == digest and all(
+            os.path.exists(p) for p in figure["outputs"])
+        if up_to_date and not force:
+            print(f"{figure['name']}: up to date")
+            continue
+        todo[figure["name"]] = (figure, digest)
+    _write_manifest(manifest)
+    if not todo:
+        return []
+
+    warm_caches([figure for figure, _ in todo.values()])
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    failed = []
+    jobs = min(jobs or os.cpu_count() or 1, len(todo))
+    print(f"Rendering {len(todo)} figure(s) on {jobs} process(es) ...")
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as pool:
+        futures = [pool.submit(_render, figure) for figure, _ in todo.values()]
+        for future in as_completed(futures):
+            name, error, seconds, log = future.result()
+            if error:
+                failed.append(name)
+                print(f"❌ {name} failed after {seconds:.1f}s\n{log}{error}")
+                continue
+            # recorded as soon as it is done, so an interrupted batch keeps its progress
+            manifest["figures"][name] = todo[name][1]
+            _write_manifest(manifest)
+            print(f"✅ {name} ({seconds:.1f}s): {', '.join(todo[name][0]['outputs'])}")
+    return failed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Render every figure of results/ headless")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--force", action="store_true", help="render even the figures whose inputs are unchanged")
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="render only these figures")
+    parser.add_argument("--list", action="store_true", help="list the figures and exit")
+    parser.add_argument("--cold-check", type=int, default=0, metavar="RUNS",
+                        help="regression check: RUNS times, remove csv/.decagon_cache and render on 2+ processes")
+    args = parser.parse_args()
+
+    if args.list:
+        for figure in FIGURES:
+            print(f"{figure['name']}: {figure['script']} -> {', '.join(figure['outputs'])}")
+        sys.exit()
+    figures = FIGURES
+    if args.only:
+        unknown = set(args.only) - {f["name"] for f in FIGURES}
+        if unknown:
+            parser.error(f"unknown figure(s): {', '.join(sorted(unknown))}")
+        figures = [f for f in FIGURES if f["name"] in args.only]
+    if not args.cold_check:
+        failed = render_all(figures, jobs=args.jobs, force=args.force)
+        sys.exit(1 if failed else 0)
+
+    # every run is a fresh process (loaded caches are kept per process); the
+    # figures manifest lives in the cache directory too, so it renders everything
+    jobs = max(args.jobs or os.cpu_count() or 1, 2)
+    command = [sys.executable, os.path.abspath(__file__), "--jobs", str(jobs)] + (
+        ["--only"] + args.only if args.only else [])
+    failed_runs = 0
+    for run in range(args.cold_check):
+        print(f"=== Cold-cache run {run + 1} of {args.cold_check} ===", flush=True)
+        shutil.rmtree(os.path.join("csv", CACHE_DIR), ignore_errors=True)
+        failed_runs += subprocess.run(command).returncode != 0
+    print(f"{'❌' if failed_runs else '✅'} {args.cold_check - failed_runs} of {args.cold_check} cold-cache runs passed")
+    sys.exit(1 if failed_runs else 0)
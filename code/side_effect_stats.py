@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+from decagon_data import COMBO_PATH, PPI_PATH, TARGETS_PATH, load_combo, recode
+from drug_set_stats import all_drug_scores
+from effect_index import load_index
+from pair_scores import summarize_pairs
+from profiling import count, profiled
+
+COLUMNS = [
+    "effect", "name", "num_pairs", "mean_shared_proteins", "median_shared_proteins", "mean_ppi", "median_ppi",
+    "shared_fraction", "shared_enrichment", "ppi_enrichment",
+]
+
+
+# Sum, mean and median of `values` per group, groups given as sorted ids
+def _grouped(groups, values, n_groups):
+    counts = np.bincount(groups, minlength=n_groups)
+    sums = np.bincount(groups, values, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+    ordered = values[np.lexsort((values, groups))]
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    low = np.minimum(starts + (counts - 1) // 2, max(len(ordered) - 1, 0))
+    high = np.minimum(starts + counts // 2, max(len(ordered) - 1, 0))
+    medians = np.full(n_groups, np.nan)
+    has = counts > 0
+    medians[has] = (ordered[low[has]] + ordered[high[has]]) / 2
+    return counts, means, medians
+
+
+# Shared proteins and PPI links of every combo pair, scored once, then
+# reduced per side effect over the effect -> pair CSR of the effect index.
+# Pairs with a drug outside the targets file are left out, as in
+# all_drugs_stats. Enrichments are relative to the pairs without any side
+# effect; effects are ranked by shared-target enrichment.
+@profiled("side effect stats")
+def side_effect_stats(targets_path=TARGETS_PATH, combo_path=COMBO_PATH, ppi_path=PPI_PATH, min_pairs=1):
+    index = load_index(combo_path)
+    drugs, shared, ppi, side_rows, side_cols = all_drug_scores(targets_path, combo_path, ppi_path)
+    background = summarize_pairs(shared, ppi, side_rows, side_cols)
+
+    # score of every distinct combo pair, in effect-index pair order
+    mapping = recode(np.arange(len(index["drugs"])), index["drugs"], drugs)
+    n = len(index["drugs"])
+    pairs = np.asarray(index["pairs"])
+    lo, hi = mapping[pairs // n], mapping[pairs % n]
+    scored = (lo >= 0) & (hi >= 0)
+    pair_shared = np.zeros(len(pairs))
+    pair_ppi = np.zeros(len(pairs))
+    pair_shared[scored] = np.asarray(shared[lo[scored], hi[scored]]).ravel()
+    pair_ppi[scored] = np.asarray(ppi[lo[scored], hi[scored]]).ravel()
+    count("pairs scored", scored.sum())
+
+    # effect of every CSR entry, keeping the entries of scored pairs
+    indptr = np.asarray(index["effect_indptr"])
+    n_effects = len(indptr) - 1
+    effect = np.repeat(np.arange(n_effects), np.diff(indptr))
+    entries = np.asarray(index["effect_pairs"])
+    keep = scored[entries]
+    effect, entries = effect[keep], entries[keep]
+    count("effect pairs", len(entries))
+
+    num_pairs, mean_shared, median_shared = _grouped(effect, pair_shared[entries], n_effects)
+    _, mean_ppi, median_ppi = _grouped(effect, pair_ppi[entries], n_effects)
+    _, shared_fraction, _ = _grouped(effect, (pair_shared[entries] > 0).astype(float), n_effects)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shared_enrichment = mean_shared / background["avg_shared_proteins_no_side_effect"]
+        ppi_enrichment = mean_ppi / background["avg_ppi_no_side_effect"]
+
+    df = pd.DataFrame({
+        "effect": index["effects"], "name": load_combo(combo_path)["effect_names"], "num_pairs": num_pairs,
+        "mean_shared_proteins": mean_shared, "median_shared_proteins": median_shared,
+        "mean_ppi": mean_ppi, "median_ppi": median_ppi, "shared_fraction": shared_fraction,
+        "shared_enrichment": shared_enrichment, "ppi_enrichment": ppi_enrichment,
+    }, columns=COLUMNS)
+    df = df[df["num_pairs"] >= max(min_pairs, 1)]
+    return df.sort_values(["shared_enrichment", "num_pairs"], ascending=False, ignore_index=True), background
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Shared targets and PPI links of the drug pairs of every side effect")
+    parser.add_argument("--targets", default=TARGETS_PATH)
+    parser.add_argument("--combo", default=COMBO_PATH)
+    parser.add_argument("--ppi", default=PPI_PATH)
+    parser.add_argument("--min-pairs", type=int, default=10, help="skip effects with fewer scored drug pairs")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--output", default="csv/side_effect_stats.csv")
+    args = parser.parse_args()
+
+    df, background = side_effect_stats(args.targets, args.combo, args.ppi, args.min_pairs)
+    df.to_csv(args.output, index=False)
+    print(f"No-side-effect pairs: {background['num_no_side_effect_pairs']}, average shared proteins "
+          f"{background['avg_shared_proteins_no_side_effect']:.3f}, average PPI interactions "
+          f"{background['avg_ppi_no_side_effect']:.3f}")
+    print(df.head(args.top).to_string(index=False))
+    print(f"\n✅ {len(df)} side effects saved to: {args.output}")
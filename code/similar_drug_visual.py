@@ -1,9 +1,19 @@
+import argparse
 import pandas as pd
 import networkx as nx
 import matplotlib.pyplot as plt
-from extract_drug_drug_effect import drug_pair
+from edge_ingest import add_edges, both_in
+from extract_drug_drug_effect import get_side_effect_pairs
+from layout_cache import spring_layout
+from profiling import stage
 from pprint import pprint as print
 
+parser = argparse.ArgumentParser(description="Drug-protein network of the cancer side-effect drug pairs")
+parser.add_argument("--output", help="write the figure to this .png/.svg/.pdf instead of showing it")
+args = parser.parse_args()
+if args.output:
+    plt.switch_backend("Agg")
+
 
 dpi = pd.read_csv(
     "csv/similar_drug_protein.csv",
@@ -11,15 +21,15 @@ dpi = pd.read_csv(
     names=["drug", "protein"] 
 )
 
-drug_side_effects = drug_pair
+drug_side_effects = get_side_effect_pairs("C0006826", limit=30)
 
 
 # Keep only pairs where both drugs exist in the drug–protein file
 valid_drugs = set(dpi["drug"])
-filtered_pairs = [pair for pair in drug_side_effects if pair.issubset(valid_drugs)]
+filtered_pairs = drug_side_effects[both_in(drug_side_effects[:, 0], drug_side_effects[:, 1], valid_drugs)]
 
 # Collect drugs involved in at least one valid side-effect pair
-drugs_with_side_effects = {d for pair in filtered_pairs for d in pair}
+drugs_with_side_effects = set(filtered_pairs.ravel().tolist())
 
 # Filter the drug–protein data to only include these drugs
 dpi_filtered = dpi[dpi["drug"].isin(drugs_with_side_effects)]
@@ -41,13 +51,10 @@ for p in proteins:
     G.add_node(p, type='protein')
 
 # Add drug–protein edges
-for _, row in dpi_filtered.iterrows():
-    G.add_edge(row["drug"], row["protein"], type='drug-protein')
+add_edges(G, dpi_filtered["drug"], dpi_filtered["protein"], type='drug-protein')
 
 # Add drug–drug side-effect edges
-for pair in filtered_pairs:
-    d1, d2 = tuple(pair)
-    G.add_edge(d1, d2, type='side-effect', effect='cancer')
+add_edges(G, filtered_pairs[:, 0], filtered_pairs[:, 1], type='side-effect', effect='cancer')
 
 
 # Separate node types
@@ -55,24 +62,30 @@ drug_nodes = [n for n, attr in G.nodes(data=True) if attr["type"] == "drug"]
 protein_nodes = [n for n, attr in G.nodes(data=True) if attr["type"] == "protein"]
 
 
-pos = nx.spring_layout(G, seed=42)
+pos = spring_layout(G, seed=42)
 
-# Draw nodes
-nx.draw_networkx_nodes(G, pos, nodelist=drug_nodes, node_color="lightcoral", node_shape="o", label="Drugs")
-nx.draw_networkx_nodes(G, pos, nodelist=protein_nodes, node_color="lightblue", node_shape="s", label="Proteins")
+# Drawing and saving the figure
+with stage("render"):
+    # Draw nodes
+    nx.draw_networkx_nodes(G, pos, nodelist=drug_nodes, node_color="lightcoral", node_shape="o", label="Drugs")
+    nx.draw_networkx_nodes(G, pos, nodelist=protein_nodes, node_color="lightblue", node_shape="s", label="Proteins")
 
-# Draw edges
-side_effect_edges = [(u, v) for u, v, e in G.edges(data=True) if e["type"] == "side-effect"]
-dpi_edges = [(u, v) for u, v, e in G.edges(data=True) if e["type"] == "drug-protein"]
+    # Draw edges
+    side_effect_edges = [(u, v) for u, v, e in G.edges(data=True) if e["type"] == "side-effect"]
+    dpi_edges = [(u, v) for u, v, e in G.edges(data=True) if e["type"] == "drug-protein"]
 
-nx.draw_networkx_edges(G, pos, edgelist=side_effect_edges, edge_color="red", width=2, label="Side effect: cancer")
-nx.draw_networkx_edges(G, pos, edgelist=dpi_edges, edge_color="gray", style="dashed", label="Drug–Protein interaction")
+    nx.draw_networkx_edges(G, pos, edgelist=side_effect_edges, edge_color="red", width=2, label="Side effect: cancer")
+    nx.draw_networkx_edges(G, pos, edgelist=dpi_edges, edge_color="gray", style="dashed", label="Drug–Protein interaction")
 
 
-nx.draw_networkx_labels(G, pos, font_size=8)
+    nx.draw_networkx_labels(G, pos, font_size=8)
 
 
-plt.legend()
-plt.title("Drug–Drug Side Effects (Cancer) and Drug–Protein Interactions")
-plt.axis("off")
-plt.show()
+    plt.legend()
+    plt.title("Drug–Drug Side Effects (Cancer) and Drug–Protein Interactions")
+    plt.axis("off")
+    if args.output:
+        plt.savefig(args.output, dpi=150)
+        print(f"✅ Figure saved to: {args.output}")
+    else:
+        plt.show()
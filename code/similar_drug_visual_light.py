@@ -1,8 +1,18 @@
+import argparse
 import pandas as pd
 import networkx as nx
 import matplotlib.pyplot as plt
 from pprint import pprint as print
-from extract_drug_drug_effect import drug_pair
+from edge_ingest import add_edges, both_in
+from extract_drug_drug_effect import get_side_effect_pairs
+from layout_cache import spring_layout
+from profiling import stage
+
+parser = argparse.ArgumentParser(description="Drug-protein network of the cancer side-effect drug pairs, multi-drug proteins only")
+parser.add_argument("--output", help="write the figure to this .png/.svg/.pdf instead of showing it")
+args = parser.parse_args()
+if args.output:
+    plt.switch_backend("Agg")
 
 
 dpi = pd.read_csv(
@@ -10,14 +20,14 @@ dpi = pd.read_csv(
     header=None,
     names=["drug", "protein"] 
 )
-drug_side_effects = drug_pair
+drug_side_effects = get_side_effect_pairs("C0006826", limit=30)
 
 
 valid_drugs = set(dpi["drug"])
-filtered_pairs = [pair for pair in drug_side_effects if pair.issubset(valid_drugs)]
+filtered_pairs = drug_side_effects[both_in(drug_side_effects[:, 0], drug_side_effects[:, 1], valid_drugs)]
 
 # Collect drugs involved in at least one valid side-effect pair
-drugs_with_side_effects = {d for pair in filtered_pairs for d in pair}
+drugs_with_side_effects = set(filtered_pairs.ravel().tolist())
 
 # Filter the drug–protein data to only include these drugs
 dpi_filtered = dpi[dpi["drug"].isin(drugs_with_side_effects)]
@@ -48,45 +58,48 @@ for p in multi_drug_proteins:
     G.add_node(p, type='protein')
 
 # Add drug–protein edges
-for _, row in dpi_filtered.iterrows():
-    G.add_edge(row["drug"], row["protein"], type='drug-protein')
+add_edges(G, dpi_filtered["drug"], dpi_filtered["protein"], type='drug-protein')
 
 # Add drug–drug side-effect edges
-for pair in filtered_pairs:
-    d1, d2 = tuple(pair)
-    # Only add if both drugs are still in the graph
-    if d1 in G.nodes and d2 in G.nodes:
-        G.add_edge(d1, d2, type='side-effect', effect='cancer')
+# Only add if both drugs are still in the graph
+kept = filtered_pairs[both_in(filtered_pairs[:, 0], filtered_pairs[:, 1], list(G.nodes))]
+add_edges(G, kept[:, 0], kept[:, 1], type='side-effect', effect='cancer')
 
 
 
-pos = nx.spring_layout(G, seed=42)
+pos = spring_layout(G, seed=42)
 
 
 
-plt.figure(figsize=(10, 6))
+# Drawing and saving the figure
+with stage("render"):
+    plt.figure(figsize=(10, 6))
 
-# Separate node types
-drug_nodes = [n for n, attr in G.nodes(data=True) if attr["type"] == "drug"]
-protein_nodes = [n for n, attr in G.nodes(data=True) if attr["type"] == "protein"]
+    # Separate node types
+    drug_nodes = [n for n, attr in G.nodes(data=True) if attr["type"] == "drug"]
+    protein_nodes = [n for n, attr in G.nodes(data=True) if attr["type"] == "protein"]
 
-# Draw nodes
-nx.draw_networkx_nodes(G, pos, nodelist=drug_nodes, node_color="lightcoral", node_shape="o", label="Drugs")
-nx.draw_networkx_nodes(G, pos, nodelist=protein_nodes, node_color="lightblue", node_shape="s", label="Proteins")
+    # Draw nodes
+    nx.draw_networkx_nodes(G, pos, nodelist=drug_nodes, node_color="lightcoral", node_shape="o", label="Drugs")
+    nx.draw_networkx_nodes(G, pos, nodelist=protein_nodes, node_color="lightblue", node_shape="s", label="Proteins")
 
-# Draw edges
-side_effect_edges = [(u, v) for u, v, e in G.edges(data=True) if e["type"] == "side-effect"]
-dpi_edges = [(u, v) for u, v, e in G.edges(data=True) if e["type"] == "drug-protein"]
+    # Draw edges
+    side_effect_edges = [(u, v) for u, v, e in G.edges(data=True) if e["type"] == "side-effect"]
+    dpi_edges = [(u, v) for u, v, e in G.edges(data=True) if e["type"] == "drug-protein"]
 
-nx.draw_networkx_edges(G, pos, edgelist=side_effect_edges, edge_color="red", width=2, label="Side effect: cancer")
-nx.draw_networkx_edges(G, pos, edgelist=dpi_edges, edge_color="gray", style="dashed", label="Drug–Protein interaction")
+    nx.draw_networkx_edges(G, pos, edgelist=side_effect_edges, edge_color="red", width=2, label="Side effect: cancer")
+    nx.draw_networkx_edges(G, pos, edgelist=dpi_edges, edge_color="gray", style="dashed", label="Drug–Protein interaction")
 
 
-nx.draw_networkx_labels(G, pos, font_size=8)
+    nx.draw_networkx_labels(G, pos, font_size=8)
 
 
-plt.legend()
-plt.title("Drug–Drug Side Effects (Cancer) and Multi-Drug Protein Interactions")
-plt.axis("off")
-plt.tight_layout()
-plt.show()
+    plt.legend()
+    plt.title("Drug–Drug Side Effects (Cancer) and Multi-Drug Protein Interactions")
+    plt.axis("off")
+    plt.tight_layout()
+    if args.output:
+        plt.savefig(args.output, dpi=150)
+        print(f"✅ Figure saved to: {args.output}")
+    else:
+        plt.show()
@@ -0,0 +1,225 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from decagon_data import COMBO_PATH, PPI_PATH, TARGETS_PATH, recode
+from drug_subgraph import induced_subgraph, load_subgraph_index
+from edge_ingest import decode_pair_keys, pair_keys
+from effect_index import load_index
+from hetero_graph import gather_rows
+
+CATEGORIES_PATH = "csv/bio-decagon-effectcategories.csv"
+
+GRAPHS = ["protein", "drug", "drug_protein", "general"]
+STATS = ["nodes", "edges", "density", "avg_degree", "min_degree", "max_degree"]
+
+# Samples per worker task
+BLOCK = 250
+
+# Per-process state of the sampling workers
+_state = {}
+
+
+# Combo drugs with a side effect of `disease_class` (effect categories file),
+# and every combo drug, as codes over the combo drug vocabulary
+def drug_pools(combo_path=COMBO_PATH, categories_path=CATEGORIES_PATH, disease_class="cancer"):
+    index = load_index(combo_path)
+    categories = pd.read_csv(categories_path, dtype=str)
+    wanted = categories.loc[categories["Disease Class"] == disease_class, "Side Effect"].to_numpy(dtype=str)
+    effects = recode(np.arange(len(wanted)), wanted, index["effects"])
+    pairs = gather_rows(index["effect_indptr"], index["effect_pairs"], effects[effects >= 0])
+    lo, hi = decode_pair_keys(np.asarray(index["pairs"])[pairs], len(index["drugs"]))
+    return {disease_class: np.unique(np.concatenate([lo, hi])), "all": np.arange(len(index["drugs"]))}
+
+
+# nodes, edges, density, average / min / max degree of a graph given by its
+# degree sequence, with the networkx conventions (a self-loop adds 2 to the
+# degree of its node, the density of a graph of 0 or 1 node is 0)
+def graph_stats(degree):
+    n, m = len(degree), degree.sum() / 2
+    if n == 0:
+        return [0, 0, 0.0, np.nan, np.nan, np.nan]
+    return [n, m, 2 * m / (n * (n - 1)) if n > 1 else 0.0, 2 * m / n, degree.min(), degree.max()]
+
+
+def _init(index, combo_drugs, combo_indptr, combo_indices):
+    _state.update(index=index, combo_drugs=combo_drugs, combo_indptr=combo_indptr, combo_indices=combo_indices)
+    _state["target_code"] = recode(np.arange(len(combo_drugs)), combo_drugs, index["drugs"])
+
+
+# Properties of the four graphs of one drug sample (sorted combo drug codes),
+# as in the report notebook:
+#   protein       targets of the drugs, PPI edges between them
+#   drug          the sampled drugs, combo pairs between them
+#   drug_protein  drug-target edges (and only their end points)
+#   general       union of the three edge sets (and only their end points)
+def sample_properties(drugs):
+    index = _state["index"]
+    sub = induced_subgraph(index, _state["combo_drugs"][drugs])
+    proteins = sub["proteins"]
+    n_p = len(proteins)
+    keys = np.unique(pair_keys(np.searchsorted(proteins, sub["ppi_src"]), np.searchsorted(proteins, sub["ppi_dst"]), n_p))
+    lo, hi = decode_pair_keys(keys, n_p)
+    protein_degree = np.bincount(np.concatenate([lo, hi]), minlength=n_p)
+
+    # combo partners of the sampled drugs that are sampled too, each pair once
+    counts = _state["combo_indptr"][drugs + 1] - _state["combo_indptr"][drugs]
+    owner = np.repeat(np.arange(len(drugs)), counts)
+    found = gather_rows(_state["combo_indptr"], _state["combo_indices"], drugs)
+    partner = np.minimum(np.searchsorted(drugs, found), len(drugs) - 1)
+    hit = (drugs[partner] == found) & (owner <= partner)
+    drug_degree = np.bincount(np.concatenate([owner[hit], partner[hit]]), minlength=len(drugs))
+
+    # distinct targets of every sampled drug (0 when it has none)
+    code = _state["target_code"][drugs]
+    indptr = index["target_indptr"]
+    target_degree = np.where(code >= 0, indptr[np.maximum(code, 0) + 1] - indptr[np.maximum(code, 0)], 0)
+    protein_targeted = np.bincount(np.searchsorted(proteins, sub["target_protein"]), minlength=n_p)
+
+    general_drugs = drug_degree + target_degree
+    return [
+        graph_stats(protein_degree),
+        graph_stats(drug_degree),
+        graph_stats(np.concatenate([target_degree[target_degree > 0], protein_targeted])),
+        graph_stats(np.concatenate([general_drugs[general_drugs > 0], protein_degree + protein_targeted])),
+    ]
+
+
+# Properties of `n_samples` random samples of `size` drugs of `pool`
+def _sample_block(pool, size, n_samples, seed):
+    rng = np.random.default_rng(seed)
+    out = np.empty((n_samples, len(GRAPHS), len(STATS)))
+    for s in range(n_samples):
+        out[s] = sample_properties(np.sort(rng.choice(pool, size, replace=False)))
+    return out
+
+
+# Degree sequences of `samples` Barabasi-Albert graphs with `n` nodes and `m`
+# edges per new node, grown side by side. Same process as
+# nx.barabasi_albert_graph: a star on m + 1 nodes, then every new node links
+# to m distinct nodes drawn with probability proportional to their degree.
+def barabasi_albert_degrees(n, m, samples, rng):
+    m = min(max(m, 1), n - 1)
+    degree = np.zeros((samples, n), dtype=np.int64)
+    if n < 2:
+        return degree
+    degree[:, 0] = m
+    degree[:, 1:m + 1] = 1
+    # every node repeated once per edge end, as in networkx
+    repeated = np.empty((samples, 2 * m * (n - m)), dtype=np.int64)
+    repeated[:, :m] = 0
+    repeated[:, m:2 * m] = np.arange(1, m + 1)
+    filled = 2 * m
+    rows = np.arange(samples)
+    for source in range(m + 1, n):
+        targets = np.empty((samples, m), dtype=np.int64)
+        for j in range(m):
+            todo = rows
+            while len(todo):
+                pick = repeated[todo, rng.integers(0, filled, len(todo))]
+                targets[todo, j] = pick
+                todo = todo[(targets[todo, :j] == pick[:, None]).any(axis=1)]
+        degree[rows[:, None], targets] += 1
+        degree[:, source] = m
+        repeated[:, filled:filled + m] = targets
+        repeated[:, filled + m:filled + 2 * m] = source
+        filled += 2 * m
+    return degree
+
+
+# Barabasi-Albert counterparts of the four graphs: per graph, n = mean node
+# count and m = int(mean edges / n) of the reference samples
+def _barabasi_block(sizes, n_samples, seed):
+    rng = np.random.default_rng(seed)
+    out = np.empty((n_samples, len(GRAPHS), len(STATS)))
+    for g, (n, m) in enumerate(sizes):
+        for s, degree in enumerate(barabasi_albert_degrees(n, m, n_samples, rng)):
+            out[s, g] = graph_stats(degree)
+    return out
+
+
+def _table(pool, results):
+    samples = len(results)
+    return pd.DataFrame({
+        "pool": pool,
+        "sample": np.repeat(np.arange(samples), len(GRAPHS)),
+        "graph": np.tile(GRAPHS, samples),
+        **{stat: results[:, :, i].ravel() for i, stat in enumerate(STATS)},
+    })
+
+
+# Tidy table (one row per sample and graph) of the subgraph properties of
+# `samples` random sets of `size` drugs from every pool, plus, with
+# barabasi=True, Barabasi-Albert graphs sized after the first pool.
+# Seeds are spawned per block, so results do not depend on `workers`.
+def sample_subgraphs(pools, samples=1000, size=10, seed=0, barabasi=False, workers=1,
+                     targets_path=TARGETS_PATH, ppi_path=PPI_PATH, combo_path=COMBO_PATH):
+    index = load_subgraph_index(targets_path, ppi_path)
+    combo = load_index(combo_path)
+    n = len(combo["drugs"])
+    lo, hi = decode_pair_keys(np.asarray(combo["pairs"]), n)
+    # combo partners of every drug, both directions (a self pair once)
+    both = lo != hi
+    src, dst = np.concatenate([lo, hi[both]]), np.concatenate([hi, lo[both]])
+    order = np.lexsort((dst, src))
+    combo_indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=combo_indptr[1:])
+    init_args = (index, combo["drugs"], combo_indptr, dst[order])
+
+    blocks = [len(b) for b in np.array_split(np.arange(samples), max(1, -(-samples // BLOCK)))]
+    names = list(pools)
+    seeds = np.random.SeedSequence(seed).spawn(len(names) + 1)
+    tasks = [(name, b, s) for name, parent in zip(names, seeds) for b, s in zip(blocks, parent.spawn(len(blocks)))]
+    args = [(pools[name], size, b, s) for name, b, s in tasks]
+    if workers == 1:
+        _init(*init_args)
+        parts = [_sample_block(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=init_args) as pool:
+            parts = list(pool.map(_sample_block, *zip(*args)))
+    results = {name: np.concatenate([p for (t, _, _), p in zip(tasks, parts) if t == name]) for name in names}
+    tables = [_table(name, results[name]) for name in names]
+
+    if barabasi:
+        means = results[names[0]].mean(axis=0)
+        sizes = [(int(round(nodes)), int(edges / nodes) if nodes else 0) for nodes, edges in means[:, :2]]
+        block_seeds = seeds[-1].spawn(len(blocks))
+        if workers == 1:
+            parts = [_barabasi_block(sizes, b, s) for b, s in zip(blocks, block_seeds)]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parts = list(pool.map(_barabasi_block, [sizes] * len(blocks), blocks, block_seeds))
+        tables.append(_table("barabasi", np.concatenate(parts)))
+    return pd.concat(tables, ignore_index=True)
+
+
+# Mean, standard deviation and 5 / 50 / 95 % quantiles of every property
+def summarize_samples(df):
+    grouped = df.groupby(["pool", "graph"], sort=False)[STATS]
+    parts = {"mean": grouped.mean(), "std": grouped.std(),
+             **{f"q{int(q * 100)}": grouped.quantile(q) for q in (0.05, 0.5, 0.95)}}
+    summary = pd.concat(parts, axis=1).swaplevel(axis=1)
+    return summary[[(s, a) for s in STATS for a in parts]]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Subgraph properties of random drug samples, disease-linked vs all drugs")
+    parser.add_argument("--samples", type=int, default=1000, help="samples per pool")
+    parser.add_argument("--size", type=int, default=10, help="drugs per sample")
+    parser.add_argument("--disease-class", default="cancer", help="disease class of the first pool's side effects")
+    parser.add_argument("--barabasi", action="store_true", help="add Barabasi-Albert graphs sized after the first pool")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--categories", default=CATEGORIES_PATH)
+    parser.add_argument("--output", default="csv/subgraph_samples.csv")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (0 = all cores)")
+    args = parser.parse_args()
+
+    pools = drug_pools(categories_path=args.categories, disease_class=args.disease_class)
+    print(", ".join(f"{name}: {len(drugs)} drugs" for name, drugs in pools.items()))
+    df = sample_subgraphs(pools, args.samples, args.size, args.seed, args.barabasi, args.workers or None)
+    df.to_csv(args.output, index=False)
+    with pd.option_context("display.width", 200, "display.max_columns", None, "display.float_format", "{:.3f}".format):
+        print(summarize_samples(df).xs("mean", axis=1, level=1))
+    print(f"\n✅ {len(df)} rows saved to: {args.output}")
@@ -0,0 +1,147 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Sizes of the Decagon files at scale 1
+DRUGS = 1774
+COMBO_DRUGS = 645
+PROTEINS = 19081
+PPI_EDGES = 715612
+COMBO_ROWS = 4649441
+COMBO_PAIRS = 63473
+EFFECTS = 1317
+TARGET_ROWS = 131034
+
+# Combo pairs whose effects are drawn per step
+EFFECT_BLOCK = 2048
+
+# Side effects the extraction and visual scripts query, always present
+KNOWN_EFFECTS = {
+    "C0006826": "Malignant neoplasms",
+    "C0018621": "hay fever",
+    "C0020542": "Pulmonary Hypertension",
+}
+
+# Disease classes of the effect categories file; like Decagon, only part of
+# the effects (CATEGORIZED) has a class
+DISEASE_CLASSES = ["cancer", "cardiovascular system disease", "respiratory system disease",
+                   "nervous system disease", "gastrointestinal system disease", "skin disease"]
+CATEGORIZED = 0.43
+
+
+# Heavy-tailed node weights (Pareto, exponent ~2.1 like the PPI degree tail)
+def _weights(n, rng, exponent=2.1):
+    w = rng.pareto(exponent - 1, n) + 1
+    return w / w.sum()
+
+
+# `m` distinct unordered pairs with endpoints drawn by weight (Chung-Lu), no self-loops
+def _chung_lu_pairs(n, m, weights, rng):
+    m = min(m, n * (n - 1) // 2)
+    keys = np.empty(0, dtype=np.int64)
+    while len(keys) < m:
+        draw = int((m - len(keys)) * 1.2) + 16
+        a, b = rng.choice(n, draw, p=weights), rng.choice(n, draw, p=weights)
+        keep = a != b
+        a, b = np.minimum(a[keep], b[keep]), np.maximum(a[keep], b[keep])
+        keys = np.union1d(keys, a.astype(np.int64) * n + b)
+    keys = rng.permutation(keys)[:m]
+    return keys // n, keys % n
+
+
+def _labels(prefix, n, rng, width, space):
+    return np.array([f"{prefix}{x:0{width}d}" for x in np.sort(rng.choice(space, n, replace=False))])
+
+
+# Decagon-shaped CSVs in `out_dir`/csv: combo, PPI, targets-all (and its short
+# head), effect categories. Every count is the Decagon count times `scale`;
+# drug and protein degrees are heavy-tailed, and combo pairs carry a skewed
+# number of effects.
+def generate(out_dir, scale=1.0, seed=0):
+    rng = np.random.default_rng(seed)
+    n_drugs = max(int(DRUGS * scale), 20)
+    n_combo_drugs = max(int(COMBO_DRUGS * scale), 10)
+    n_proteins = max(int(PROTEINS * scale), 50)
+    n_effects = max(int(EFFECTS * scale), len(KNOWN_EFFECTS))
+    drugs = _labels("CID", n_drugs, rng, 9, 10 ** 8)
+    genes = np.sort(rng.choice(10 ** 7, n_proteins, replace=False)).astype(np.int32)
+    effects = np.concatenate([list(KNOWN_EFFECTS), _labels("C", n_effects - len(KNOWN_EFFECTS), rng, 7, 10 ** 6)])
+    names = np.array(list(KNOWN_EFFECTS.values())
+                     + [f"side effect {i}" for i in range(n_effects - len(KNOWN_EFFECTS))], dtype=object)
+    csv_dir = os.path.join(out_dir, "csv")
+    os.makedirs(csv_dir, exist_ok=True)
+
+    # PPI: Chung-Lu graph on the proteins
+    g1, g2 = _chung_lu_pairs(n_proteins, max(int(PPI_EDGES * scale), n_proteins), _weights(n_proteins, rng), rng)
+    pd.DataFrame({"Gene 1": genes[g1], "Gene 2": genes[g2]}).to_csv(
+        os.path.join(csv_dir, "bio-decagon-ppi.csv"), index=False)
+
+    # targets: drug and protein popularity both heavy-tailed
+    n_targets = max(int(TARGET_ROWS * scale), n_drugs)
+    t_drug = rng.choice(n_drugs, n_targets, p=_weights(n_drugs, rng))
+    t_gene = rng.choice(n_proteins, n_targets, p=_weights(n_proteins, rng))
+    targets = pd.DataFrame({"STITCH": drugs[t_drug], "Gene": genes[t_gene]})
+    targets.to_csv(os.path.join(csv_dir, "bio-decagon-targets-all.csv"), index=False)
+    targets.head(200).to_csv(os.path.join(csv_dir, "short_bio-decagon-targets-all.csv"), index=False)
+
+    # combo: skewed pairs over the combo drugs, then a skewed number of
+    # effects per pair (one row each) drawn by effect popularity
+    combo_drugs = rng.choice(n_drugs, n_combo_drugs, replace=False)
+    lo, hi = _chung_lu_pairs(n_combo_drugs, max(int(COMBO_PAIRS * scale), 10), _weights(n_combo_drugs, rng), rng)
+    n_rows = max(int(COMBO_ROWS * scale), len(lo))
+    # effects per pair: heavy-tailed shares of n_rows, capped at every effect
+    # once, the cut-off rows spread over the other pairs
+    share = rng.pareto(1.5, len(lo)) + 1
+    factor = n_rows / share.sum()
+    for _ in range(20):
+        per_pair = np.clip(np.round(share * factor), 1, n_effects)
+        factor *= n_rows / per_pair.sum()
+    per_pair = per_pair.astype(np.int64)
+    effect_weights = _weights(n_effects, rng, exponent=1.8)
+    # the queried effects are among the most frequent ones
+    effect_weights[:len(KNOWN_EFFECTS)] = effect_weights.max()
+
+    # distinct effects of every pair drawn by popularity (Gumbel top-k), by blocks of pairs
+    pair, effect = [], []
+    for start in range(0, len(lo), EFFECT_BLOCK):
+        k = per_pair[start:start + EFFECT_BLOCK]
+        keys = np.log(effect_weights) + rng.gumbel(size=(len(k), n_effects))
+        ranked = np.argsort(-keys, axis=1)
+        take = np.arange(n_effects) < k[:, None]
+        pair.append(np.repeat(np.arange(start, start + len(k)), k))
+        effect.append(ranked[take])
+    pair, effect = np.concatenate(pair), np.concatenate(effect)
+    order = rng.permutation(len(pair))
+    pair, effect = pair[order], effect[order]
+    flip = rng.random(len(pair)) < 0.5
+    d1 = np.where(flip, combo_drugs[hi[pair]], combo_drugs[lo[pair]])
+    d2 = np.where(flip, combo_drugs[lo[pair]], combo_drugs[hi[pair]])
+    pd.DataFrame({
+        "STITCH 1": drugs[d1], "STITCH 2": drugs[d2],
+        "Polypharmacy Side Effect": effects[effect], "Side Effect Name": names[effect],
+    }).to_csv(os.path.join(csv_dir, "bio-decagon-combo.csv"), index=False)
+
+    # effect categories of a random part of the effects, Malignant neoplasms being cancer
+    categorized = np.flatnonzero(rng.random(n_effects) < CATEGORIZED)
+    classes = np.array(DISEASE_CLASSES)[rng.integers(0, len(DISEASE_CLASSES), len(categorized))]
+    keep = categorized > 0
+    categorized, classes = np.concatenate([[0], categorized[keep]]), np.concatenate([["cancer"], classes[keep]])
+    pd.DataFrame({"Side Effect": effects[categorized], "Side Effect Name": names[categorized],
+                  "Disease Class": classes}).to_csv(os.path.join(csv_dir, "bio-decagon-effectcategories.csv"), index=False)
+    return {"drugs": n_drugs, "proteins": n_proteins, "ppi_edges": len(g1), "targets": n_targets,
+            "combo_pairs": len(lo), "combo_rows": len(pair)}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Synthetic Decagon-shaped CSVs")
+    parser.add_argument("out_dir", help="directory receiving csv/")
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sizes = generate(args.out_dir, args.scale, args.seed)
+    print(", ".join(f"{k}: {v}" for k, v in sizes.items()))
+    print(f"✅ Synthetic Decagon data written to: {os.path.join(args.out_dir, 'csv')}")